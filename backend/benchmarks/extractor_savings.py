@@ -0,0 +1,95 @@
+"""How much text site-specific extractors save over the generic path.
+
+Runs every saved page in ``tests/fixtures/job_pages`` through the
+generic extractor and through the host-specific one (HTML markers /
+JSON-LD, and the public API payload where a fixture exists), then
+prints chars and tokens for each.
+
+Usage::
+
+    uv run python -m benchmarks.extractor_savings
+"""
+
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from lxml import etree
+
+from src.job_extractors import (
+    PageCollector,
+    SiteExtractor,
+    find_extractor,
+    pick_text,
+)
+
+_FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "job_pages"
+_PAGES = {
+    "hh": ("https://hh.ru/vacancy/123456", "hh_vacancy.html", "hh_api.json"),
+    "linkedin": (
+        "https://www.linkedin.com/jobs/view/4000000001",
+        "linkedin_job.html",
+        None,
+    ),
+    "greenhouse": (
+        "https://job-boards.greenhouse.io/initech/jobs/4567890",
+        "greenhouse_job.html",
+        "greenhouse_api.json",
+    ),
+    "lever": (
+        "https://jobs.lever.co/globex/0d5a3f7e-1b2c-4d3e-8f9a-0b1c2d3e4f5a",
+        "lever_job.html",
+        "lever_api.json",
+    ),
+}
+
+
+def _token_counter() -> tuple[str, Callable[[str], int]]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model("gpt-4o")
+    except Exception:
+        return "≈tokens", lambda text: len(text) // 4
+    return "tokens", lambda text: len(encoding.encode(text))
+
+
+def _extract(html: bytes, extractor: SiteExtractor | None) -> str:
+    markers = extractor.markers if extractor else ()
+    collector = PageCollector(max_chars=10**9, markers=markers)
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(html)
+    parser.close()
+    if extractor is None:
+        return "\n".join(collector.lines)
+    return pick_text(collector, extractor)
+
+
+def main() -> None:
+    unit, count = _token_counter()
+    print(f"{'site':<11}{'path':<9}{'chars':>7}{unit:>10}{'saved':>8}")
+    for site, (url, page, api) in _PAGES.items():
+        html = (_FIXTURES / page).read_bytes()
+        extractor = find_extractor(url)
+        assert extractor is not None
+
+        generic = _extract(html, None)
+        variants = [("generic", generic), ("html", _extract(html, extractor))]
+        if api and extractor.from_api:
+            payload = json.loads((_FIXTURES / api).read_text())
+            variants.append(("api", extractor.from_api(payload)))
+
+        base = count(generic)
+        for path, text in variants:
+            tokens = count(text)
+            saved = 1 - tokens / base
+            print(
+                f"{site:<11}{path:<9}{len(text):>7}{tokens:>10}{saved:>8.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
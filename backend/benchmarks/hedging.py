@@ -0,0 +1,128 @@
+"""Time to first token with and without hedged LLM requests.
+
+Streams letters through ``stream_cover_letter`` against two local fake
+OpenAI servers (primary and fallback) where ``--slow-fraction`` of the
+requests stall for ``--slow-delay`` extra seconds, once without hedging
+and once with it, and prints the first-token latency percentiles, the
+share of requests that were hedged and how many upstream requests each
+letter cost.
+
+Usage::
+
+    uv run python -m benchmarks.hedging [--requests 600 --slow-fraction 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from src import chain
+from src.config import LLMEndpoint, settings
+from src.hedging import Hedger
+from src.service import stream_cover_letter
+from tests.fake_openai import FakeOpenAI
+
+_RESUME = "Иван Петров, Python-разработчик, 5 лет FastAPI и PostgreSQL."
+
+
+async def _first_token(job: str) -> float:
+    start = time.perf_counter()
+    first = 0.0
+    async for token in stream_cover_letter(b"cv", "cv.pdf", job_text=job):
+        if isinstance(token, str) and not first:
+            first = time.perf_counter() - start
+    return first
+
+
+async def _measure(
+    args: argparse.Namespace, hedger: Hedger, servers: list[FakeOpenAI]
+) -> list[float]:
+    for server in servers:
+        server.requests.clear()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int) -> float:
+        async with semaphore:
+            return await _first_token(f"Python developer {index}")
+
+    with patch("src.service.hedger", hedger):
+        return list(
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+        )
+
+
+def _report(
+    label: str, latencies: list[float], hedger: Hedger, upstream: int
+) -> None:
+    cuts = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<8}p50={cuts[49] * 1000:>6.0f}ms "
+        f"p90={cuts[89] * 1000:>6.0f}ms p99={cuts[98] * 1000:>6.0f}ms "
+        f"max={max(latencies) * 1000:>6.0f}ms "
+        f"hedged={hedger.hedges / len(latencies):>5.1%} "
+        f"upstream/letter={upstream / len(latencies):.3f}"
+    )
+
+
+async def _run(args: argparse.Namespace) -> None:
+    with (
+        FakeOpenAI(
+            reply="Здравствуйте!",
+            first_token_delay=args.delay,
+            slow_fraction=args.slow_fraction,
+            slow_delay=args.slow_delay,
+            seed=1,
+        ) as primary,
+        FakeOpenAI(
+            reply="Здравствуйте!",
+            first_token_delay=args.delay,
+            slow_fraction=args.slow_fraction,
+            slow_delay=args.slow_delay,
+            seed=2,
+        ) as fallback,
+        patch("src.service.parse_resume", return_value=_RESUME),
+    ):
+        settings.openai_base_url = primary.base_url
+        settings.llm_fallbacks = [
+            LLMEndpoint(name="fallback", model="gpt-4o-mini",
+                        base_url=fallback.base_url)
+        ]
+        settings.llm_hedge_fallback_first = args.fallback_first
+        chain._get_routes.cache_clear()  # noqa: SLF001
+
+        for enabled in (False, True):
+            settings.llm_hedge_enabled = enabled
+            hedger = Hedger(
+                percentile=args.percentile,
+                min_delay=args.min_delay,
+                min_samples=settings.llm_hedge_min_samples,
+                window=settings.llm_hedge_window,
+                max_rate=args.max_rate,
+            )
+            latencies = await _measure(args, hedger, [primary, fallback])
+            upstream = len(primary.requests) + len(fallback.requests)
+            _report("hedged" if enabled else "plain", latencies, hedger,
+                    upstream)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--slow-fraction", type=float, default=0.02)
+    parser.add_argument("--slow-delay", type=float, default=1.0)
+    parser.add_argument("--percentile", type=float, default=0.95)
+    parser.add_argument("--min-delay", type=float, default=0.1)
+    parser.add_argument("--max-rate", type=float, default=0.05)
+    parser.add_argument("--fallback-first", action="store_true")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""End-to-end load test of the API against local fake upstreams.
+
+Starts the app with uvicorn in a subprocess, pointed at the fake
+OpenAI-compatible server from ``tests/fake_openai.py`` (configurable
+token rate, first-token latency distribution and error rate) and at the
+stub job board from ``benchmarks/stub_server.py``. It then drives a mix
+of ``POST /api/generate``, ``POST /api/generate/stream`` and
+``POST /api/resumes`` at a fixed concurrency and reports, per scenario,
+throughput, latency percentiles of successful requests, status codes
+and, for streams, time to first token, plus the RSS of the server and
+its worker processes.
+
+The result is written as JSON (``benchmarks/results/load-<commit>.json``
+by default); ``--compare`` prints it side by side with an earlier run::
+
+    uv run python -m benchmarks.load
+    git checkout feature
+    uv run python -m benchmarks.load --compare benchmarks/results/load-abc1234.json
+
+Usage::
+
+    uv run python -m benchmarks.load [--requests 1000 --concurrency 200]
+        [--mix generate=3,stream=6,upload=1] [--job-url-share 0.5]
+        [--tokens-per-second 100 --reply-words 100]
+        [--first-token 0.3 --jitter 0.2 --slow-fraction 0.02 --slow-delay 3]
+        [--error-rate 0.01] [--env LLM_MAX_INFLIGHT=16 ...]
+
+The server gets ``LLM_MAX_INFLIGHT=256`` and ``LLM_QUEUE_SIZE=1024`` so
+that the LLM limiter does not turn most of the load into ``503``; pass
+``--env`` to measure other settings. The load generator and the fakes
+share one process, so at high concurrency check that it is not the
+bottleneck (``load_generator_cpu_s`` in the result).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pymupdf
+
+from benchmarks.stub_server import serve_job_page
+from tests.fake_openai import FakeOpenAI
+
+_BACKEND = Path(__file__).parent.parent
+_RESULTS = Path(__file__).parent / "results"
+_SCENARIOS = ("generate", "stream", "upload")
+_SERVER_ENV = {
+    "OPENAI_API_KEY": "sk-bench",
+    "LLM_MAX_INFLIGHT": "256",
+    "LLM_QUEUE_SIZE": "1024",
+    "JOB_WORKERS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+@dataclass
+class Sample:
+    scenario: str
+    status: str
+    latency: float
+    first_token: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("200", "201")
+
+
+def _mix(spec: str) -> dict[str, int]:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in _SCENARIOS:
+            msg = f"unknown scenario {name!r}, expected one of {_SCENARIOS}"
+            raise argparse.ArgumentTypeError(msg)
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def _make_resume(index: int) -> bytes:
+    lines = [f"Кандидат {index}, Python-разработчик"] + [
+        f"- Проект {i}: FastAPI, PostgreSQL, ускорил API на {i * 3}%"
+        for i in range(40)
+    ]
+    with pymupdf.open() as doc:  # type: ignore[no-untyped-call]
+        page = doc.new_page()
+        for row, line in enumerate(lines):
+            page.insert_text((36, 36 + row * 18), line, fontsize=9)
+        return doc.tobytes()  # type: ignore[no-any-return]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@contextmanager
+def _serve_app(env: dict[str, str]) -> Iterator[tuple[str, int]]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=_BACKEND,
+        env={**os.environ, **env},
+    )
+    try:
+        yield f"http://127.0.0.1:{port}", process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child in task.read_text().split():
+            pids += _process_tree(int(child))
+    return pids
+
+
+def _rss_mib(pid: int) -> float | None:
+    """RSS of ``pid`` and its descendants; ``None`` without ``/proc``."""
+    total = 0
+    try:
+        for member in _process_tree(pid):
+            status = Path(f"/proc/{member}/status").read_text()
+            for line in status.splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+    except OSError:
+        return None
+    return total / 1024
+
+
+async def _sample_rss(pid: int, samples: list[float]) -> None:
+    while True:
+        rss = _rss_mib(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(0.25)
+
+
+def _form(
+    args: argparse.Namespace, index: int, board: str
+) -> dict[str, str]:
+    if random.Random(index).random() < args.job_url_share:
+        return {"job_url": f"{board}/vacancy/{index}"}
+    return {"job_text": f"Вакансия {index}: Python-разработчик, FastAPI"}
+
+
+async def _stream(
+    client: httpx.AsyncClient, data: dict[str, str], files: dict[str, Any]
+) -> tuple[str, float | None]:
+    start = time.perf_counter()
+    first = None
+    async with client.stream(
+        "POST", "/api/generate/stream", data=data, files=files
+    ) as response:
+        if response.status_code != 200:
+            return str(response.status_code), None
+        event = None
+        has_data = False
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line.removeprefix("event:").strip()
+            elif line.startswith("data:"):
+                has_data = True
+            elif not line:
+                if event == "error":
+                    return "sse_error", first
+                if event is None and has_data and first is None:
+                    first = time.perf_counter() - start
+                event, has_data = None, False
+    return "200", first
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    scenario: str,
+    index: int,
+    resume: bytes,
+    board: str,
+) -> Sample:
+    files = {"resume": ("cv.pdf", resume, "application/pdf")}
+    start = time.perf_counter()
+    first = None
+    try:
+        if scenario == "upload":
+            response = await client.post("/api/resumes", files=files)
+            status = str(response.status_code)
+        elif scenario == "generate":
+            response = await client.post(
+                "/api/generate", data=_form(args, index, board), files=files
+            )
+            status = str(response.status_code)
+        else:
+            status, first = await _stream(
+                client, _form(args, index, board), files
+            )
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    return Sample(scenario, status, time.perf_counter() - start, first)
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    count: int,
+    offset: int,
+    resumes: list[bytes],
+    board: str,
+) -> list[Sample]:
+    rng = random.Random(offset)
+    scenarios = rng.choices(
+        list(args.mix), weights=list(args.mix.values()), k=count
+    )
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for index, scenario in enumerate(scenarios, start=offset):
+        queue.put_nowait((index, scenario))
+    samples: list[Sample] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            index, scenario = queue.get_nowait()
+            resume = resumes[index % len(resumes)]
+            samples.append(
+                await _request(client, args, scenario, index, resume, board)
+            )
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return samples
+
+
+def _percentiles(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def at(pct: float) -> float:
+        index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "p50": at(50),
+        "p95": at(95),
+        "p99": at(99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _summary(samples: list[Sample], duration: float) -> dict[str, Any]:
+    ok = [s for s in samples if s.ok]
+    summary = {
+        "requests": len(samples),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4),
+        "statuses": dict(Counter(s.status for s in samples)),
+        "rps": round(len(ok) / duration, 2),
+        "latency_ms": _percentiles([s.latency for s in ok]),
+    }
+    first = [s.first_token for s in ok if s.first_token is not None]
+    if first:
+        summary["ttft_ms"] = _percentiles(first)
+    return summary
+
+
+def _git(*command: str) -> str:
+    result = subprocess.run(
+        ["git", *command],
+        cwd=_BACKEND,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip()
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    resumes = [_make_resume(i) for i in range(args.resumes)]
+    fake = FakeOpenAI(
+        reply=" ".join(["слово"] * args.reply_words),
+        first_token_delay=args.first_token,
+        first_token_jitter=args.jitter,
+        token_delay=1 / args.tokens_per_second,
+        slow_fraction=args.slow_fraction,
+        slow_delay=args.slow_delay,
+        error_rate=args.error_rate,
+        # Far above the prompts here: skips the prefix-cache bookkeeping,
+        # which is quadratic in the number of requests.
+        cache_min_tokens=1_000_000,
+    )
+    env = dict(_SERVER_ENV)
+    env.update(item.split("=", 1) for item in args.env)
+
+    with (
+        fake,
+        serve_job_page() as board,
+        tempfile.TemporaryDirectory() as data_dir,
+    ):
+        env["OPENAI_BASE_URL"] = fake.base_url
+        env["JOB_QUEUE_PATH"] = str(Path(data_dir) / "jobs.sqlite3")
+        with _serve_app(env) as (base_url, pid):
+            async with httpx.AsyncClient(
+                base_url=base_url,
+                timeout=args.timeout,
+                limits=httpx.Limits(max_connections=args.concurrency),
+            ) as client:
+                await _wait_ready(client)
+                await _drive(client, args, args.warmup, 0, resumes, board)
+                fake.requests.clear()
+
+                rss_start = _rss_mib(pid)
+                rss: list[float] = []
+                sampler = asyncio.create_task(_sample_rss(pid, rss))
+                cpu = resource.getrusage(resource.RUSAGE_SELF)
+                start = time.perf_counter()
+                samples = await _drive(
+                    client, args, args.requests, args.warmup, resumes, board
+                )
+                duration = time.perf_counter() - start
+                used = resource.getrusage(resource.RUSAGE_SELF)
+                sampler.cancel()
+                rss_end = _rss_mib(pid)
+
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "compare")
+    }
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", ".")),
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {**config, "server_env": env | {"OPENAI_BASE_URL": ""}},
+        "duration_s": round(duration, 3),
+        "rps": round(sum(s.ok for s in samples) / duration, 2),
+        "scenarios": {
+            scenario: _summary(
+                [s for s in samples if s.scenario == scenario], duration
+            )
+            for scenario in args.mix
+            if any(s.scenario == scenario for s in samples)
+        },
+        "server": {
+            "rss_mib": {
+                "start": rss_start,
+                "peak": max(rss, default=None),
+                "end": rss_end,
+            }
+        },
+        "upstream": {
+            "llm_requests": len(fake.requests),
+            "completed_streams": fake.completed_streams,
+            "aborted_streams": fake.aborted_streams,
+        },
+        "load_generator_cpu_s": round(
+            used.ru_utime + used.ru_stime - cpu.ru_utime - cpu.ru_stime, 3
+        ),
+    }
+
+
+def _metrics(result: dict[str, Any]) -> dict[str, float]:
+    metrics = {"rps": result["rps"]}
+    for name, scenario in result["scenarios"].items():
+        metrics[f"{name}.rps"] = scenario["rps"]
+        metrics[f"{name}.error_rate"] = scenario["error_rate"]
+        for kind in ("latency_ms", "ttft_ms"):
+            for pct, value in (scenario.get(kind) or {}).items():
+                metrics[f"{name}.{kind}.{pct}"] = value
+    for point, value in result["server"]["rss_mib"].items():
+        if value is not None:
+            metrics[f"server.rss_mib.{point}"] = value
+    return metrics
+
+
+def _print(result: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    current = _metrics(result)
+    if baseline is None:
+        for name, value in current.items():
+            print(f"{name:<32}{value:>12.2f}")
+        return
+    previous = _metrics(baseline)
+    print(
+        f"{'metric':<32}{baseline['commit'] or '?':>12}"
+        f"{result['commit'] or '?':>12}{'change':>9}"
+    )
+    for name, value in current.items():
+        old = previous.get(name)
+        if old is None:
+            continue
+        change = f"{(value - old) / old:+.1%}" if old else ""
+        print(f"{name:<32}{old:>12.2f}{value:>12.2f}{change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--mix", type=_mix, default=_mix("generate=3,stream=6,upload=1")
+    )
+    parser.add_argument("--job-url-share", type=float, default=0.5)
+    parser.add_argument("--resumes", type=int, default=20)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--reply-words", type=int, default=100)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--slow-fraction", type=float, default=0.02)
+    parser.add_argument("--slow-delay", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="NAME=VALUE"
+    )
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    args = parser.parse_args()
+
+    result = asyncio.run(_run(args))
+    output = args.output or _RESULTS / f"load-{result['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+    _print(result, baseline)
+    print(f"result written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Latency of concurrent requests while large PDFs are being parsed.
+
+Usage::
+
+    uv run python -m benchmarks.parse_load [--inline] [--pages 40]
+
+``--inline`` reproduces the old behaviour where ``parse_resume`` ran on
+the event loop. The LLM and scraper are replaced with instant fakes so
+only parsing is measured.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import pymupdf
+from httpx import ASGITransport, AsyncClient
+
+from src.app import app, lifespan
+from src.parse_executor import parse_executor
+
+
+def _make_pdf(pages: int) -> bytes:
+    line = "Senior Python developer, FastAPI, PostgreSQL, Kubernetes. " * 3
+    with pymupdf.open() as doc:  # type: ignore[no-untyped-call]
+        for _ in range(pages):
+            page = doc.new_page()
+            for row in range(60):
+                page.insert_text((36, 36 + row * 12), line, fontsize=8)
+        return doc.tobytes()  # type: ignore[no-any-return]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _probe_health(
+    client: AsyncClient, stop: asyncio.Event, samples: list[float]
+) -> None:
+    # Latency is measured from when the probe was due, so time spent
+    # waiting for a blocked event loop is counted too.
+    due = time.perf_counter()
+    while not stop.is_set():
+        await client.get("/api/health")
+        samples.append((time.perf_counter() - due) * 1000)
+        due += 0.01
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+
+async def _run(args: argparse.Namespace) -> None:
+    pdf = _make_pdf(args.pages)
+    chain = AsyncMock()
+    chain.ainvoke = AsyncMock(
+        return_value=SimpleNamespace(content="ok", usage_metadata=None)
+    )
+
+    async with lifespan(app):
+        if args.inline:
+            await parse_executor.shutdown()
+
+            async def inline(fn, *a, **kw):  # type: ignore[no-untyped-def]
+                return fn(*a, **kw)
+
+            run_patch = patch.object(parse_executor, "run", inline)
+        else:
+            run_patch = patch.object(parse_executor, "run", parse_executor.run)
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            with run_patch, patch("src.service.get_chain", return_value=chain):
+                stop = asyncio.Event()
+                health: list[float] = []
+                generate: list[float] = []
+                statuses: dict[int, int] = {}
+                prober = asyncio.create_task(
+                    _probe_health(client, stop, health)
+                )
+                await asyncio.sleep(0.05)
+
+                async def upload() -> None:
+                    start = time.perf_counter()
+                    resp = await client.post(
+                        "/api/generate",
+                        files={"resume": ("cv.pdf", pdf)},
+                        data={"job_text": "Python developer"},
+                    )
+                    generate.append((time.perf_counter() - start) * 1000)
+                    statuses[resp.status_code] = (
+                        statuses.get(resp.status_code, 0) + 1
+                    )
+
+                await asyncio.gather(
+                    *(upload() for _ in range(args.requests))
+                )
+                stop.set()
+                await prober
+
+    mode = "inline" if args.inline else "pool"
+    print(f"mode={mode} pages={args.pages} requests={args.requests}")
+    print(f"statuses={statuses}")
+    for name, samples in (("health", health), ("generate", generate)):
+        print(
+            f"{name:<9} n={len(samples):<4} "
+            f"p50={statistics.median(samples):8.1f}ms "
+            f"p99={_percentile(samples, 99):8.1f}ms "
+            f"max={max(samples):8.1f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""PDF text extraction: whole document vs char budget vs parse workers.
+
+Usage::
+
+    uv run python -m benchmarks.pdf_extract [--workers 4] [--repeat 5]
+
+For 1-, 10- and 100-page resumes compares
+
+* ``full`` — the old way: read the file into ``bytes`` and join the
+  text of every page;
+* ``budget`` — the memory-mapped file, stopping at ``PARSE_MAX_CHARS``;
+* ``pool`` — the service path, which splits long PDFs into
+  ``PARSE_PDF_CHUNK_PAGES`` ranges across the parse workers.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import pymupdf
+
+from benchmarks.parse_load import _make_pdf
+from src.config import settings
+from src.parse_executor import parse_executor
+from src.resume_parser import extract_pdf_pages
+from src.service import _extract_text
+
+_PAGES = (1, 10, 100)
+
+
+def _full(path: Path) -> str:
+    data = path.read_bytes()
+    with pymupdf.open(stream=data, filetype="pdf") as doc:  # type: ignore[no-untyped-call]
+        return "\n".join(page.get_text() for page in doc).strip()
+
+
+async def _measure(
+    fn: Callable[[], Awaitable[str]], repeat: int
+) -> tuple[float, int]:
+    samples = []
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chars = len(await fn())
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), chars
+
+
+async def _run(args: argparse.Namespace) -> None:
+    await parse_executor.start(workers=args.workers, queue_size=args.workers)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for pages in _PAGES:
+                path = Path(tmp) / f"cv-{pages}.pdf"
+                path.write_bytes(_make_pdf(pages))
+                modes = {
+                    "full": lambda p=path: asyncio.to_thread(_full, p),
+                    "budget": lambda p=path: asyncio.to_thread(
+                        extract_pdf_pages,
+                        p,
+                        max_chars=settings.parse_max_chars,
+                    ),
+                    "pool": lambda p=path: _extract_text(p, "cv.pdf"),
+                }
+                for name, fn in modes.items():
+                    ms, chars = await _measure(fn, args.repeat)
+                    print(
+                        f"pages={pages:<4} {name:<7} "
+                        f"p50={ms:8.1f}ms chars={chars}"
+                    )
+    finally:
+        await parse_executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
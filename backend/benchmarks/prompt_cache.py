@@ -0,0 +1,94 @@
+"""Provider prompt-cache hit ratio for the prompt layout.
+
+Drives ``generate_cover_letter`` against the local fake OpenAI server
+(which simulates prefix caching and records every prompt) with several
+candidates each applying to several vacancies, and prints how much of
+the prompt the provider could serve from cache. ``--job-first`` swaps
+the resume and vacancy messages to show what a badly ordered prompt
+costs.
+
+Usage::
+
+    uv run python -m benchmarks.prompt_cache [--candidates 5 --vacancies 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from src import chain
+from src.config import settings
+from src.service import generate_cover_letter
+from tests.fake_openai import FakeOpenAI
+
+_SKILLS = ["Python", "FastAPI", "PostgreSQL", "Kafka", "Docker", "Redis"]
+
+
+def _resume(candidate: int) -> str:
+    rng = random.Random(candidate)
+    lines = [f"Кандидат {candidate}, backend-разработчик"]
+    lines += [
+        f"- {rng.choice(_SKILLS)}: проект {i}, ускорил API на {i * 7}%"
+        for i in range(120)
+    ]
+    return "\n".join(lines)
+
+
+def _vacancy(index: int) -> str:
+    return f"Вакансия {index}: Python-разработчик, " + "требования " * 80
+
+
+async def _run(args: argparse.Namespace) -> None:
+    requests = [
+        (c, v) for v in range(args.vacancies) for c in range(args.candidates)
+    ]
+    random.Random(0).shuffle(requests)
+
+    with FakeOpenAI() as server:
+        settings.openai_base_url = server.base_url
+        chain._get_routes.cache_clear()  # noqa: SLF001
+        prompt = chain._prompt  # noqa: SLF001
+        if args.job_first:
+            system, resume, job = prompt.messages
+            prompt = ChatPromptTemplate.from_messages([system, job, resume])
+
+        with patch.object(chain, "_prompt", prompt):
+            for candidate, vacancy in requests:
+                with patch(
+                    "src.service.parse_resume",
+                    return_value=_resume(candidate),
+                ):
+                    await generate_cover_letter(
+                        f"cv-{candidate}".encode(),
+                        "cv.pdf",
+                        job_text=_vacancy(vacancy),
+                    )
+
+        prompt_tokens = sum(r.prompt_tokens for r in server.requests)
+        cached = sum(r.cached_tokens for r in server.requests)
+        keys = {r.body.get("prompt_cache_key") for r in server.requests}
+
+    layout = "job-first" if args.job_first else "system/resume/job"
+    print(f"layout={layout} requests={len(requests)} cache_keys={len(keys)}")
+    print(
+        f"prompt_tokens={prompt_tokens} cached_tokens={cached} "
+        f"hit_ratio={cached / prompt_tokens:.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=5)
+    parser.add_argument("--vacancies", type=int, default=10)
+    parser.add_argument("--job-first", action="store_true")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
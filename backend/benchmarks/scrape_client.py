@@ -0,0 +1,56 @@
+"""Per-scrape latency with a fresh client vs the shared pooled client.
+
+Usage::
+
+    uv run python -m benchmarks.scrape_client [--requests 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from benchmarks.stub_server import serve_job_page
+from src.job_scraper import close_client, scrape_job, start_client
+
+
+async def _measure(base_url: str, requests: int) -> list[float]:
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await scrape_job(f"{base_url}/vacancy/{i}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def _run(args: argparse.Namespace) -> None:
+    with serve_job_page() as base_url:
+        fresh = await _measure(base_url, args.requests)
+
+        await start_client()
+        try:
+            pooled = await _measure(base_url, args.requests)
+        finally:
+            await close_client()
+
+    for name, samples in (("fresh", fresh), ("pooled", pooled)):
+        print(
+            f"{name:<7} n={len(samples)} "
+            f"mean={statistics.fmean(samples):6.2f}ms "
+            f"p50={statistics.median(samples):6.2f}ms"
+        )
+    saved = statistics.fmean(fresh) - statistics.fmean(pooled)
+    print(f"saved per scrape: {saved:.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
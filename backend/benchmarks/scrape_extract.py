@@ -0,0 +1,102 @@
+"""CPU time and peak memory of job page text extraction.
+
+Compares the old whole-document BeautifulSoup pipeline with the
+streaming lxml extractor used by ``job_scraper``. Pass saved job pages
+as arguments; without arguments two synthetic 3.5 MB pages are used
+(vacancy text before and after a large "similar vacancies" block).
+
+Usage::
+
+    uv run python -m benchmarks.scrape_extract [page.html ...]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import httpx
+from bs4 import BeautifulSoup
+
+from src.job_extractors import STRIP_TAGS
+from src.job_scraper import _extract_text, _truncate
+
+_CHUNK = 64 * 1024
+
+
+def _synthetic_page(*, noise_first: bool = False) -> bytes:
+    vacancy = "".join(
+        f"<li>Requirement {i}: Python, FastAPI, PostgreSQL</li>"
+        for i in range(150)
+    )
+    noise = "".join(
+        f"<div class='similar'><a href='/v/{i}'>Similar vacancy {i}</a>"
+        f"<script>window.__state_{i} = {{'id': {i}}};</script></div>"
+        for i in range(30000)
+    )
+    main = f"<main><h1>Python Developer</h1><ul>{vacancy}</ul></main>"
+    aside = f"<aside>{noise}</aside>"
+    body = aside + main if noise_first else main + aside
+    return (
+        "<html><head><title>Python Developer</title></head><body>"
+        f"<nav>Menu</nav>{body}<footer>Footer</footer></body></html>"
+    ).encode()
+
+
+def _old_extract(html: bytes) -> str:
+    soup = BeautifulSoup(html.decode(errors="replace"), "lxml")
+    for tag in soup.find_all(STRIP_TAGS):
+        tag.decompose()
+    text = soup.get_text(separator="\n", strip=True)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return _truncate("\n".join(lines))
+
+
+def _new_extract(html: bytes) -> str:
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(html), _CHUNK):
+            yield html[start : start + _CHUNK]
+
+    resp = httpx.Response(200, content=chunks())
+    return asyncio.run(_extract_text(resp, "bench"))
+
+
+def _measure(fn: Callable[[bytes], str], html: bytes) -> tuple[float, int, str]:
+    start = time.process_time()
+    text = fn(html)
+    cpu = time.process_time() - start
+
+    # Peak memory is measured on a separate run: tracing skews CPU time.
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak, text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pages", nargs="*", type=Path)
+    args = parser.parse_args()
+
+    pages = [(p.name, p.read_bytes()) for p in args.pages] or [
+        ("synthetic", _synthetic_page()),
+        ("synthetic-noise-first", _synthetic_page(noise_first=True)),
+    ]
+    for name, html in pages:
+        print(f"{name}: {len(html) / 1024:.0f} KiB")
+        for label, fn in (("old", _old_extract), ("new", _new_extract)):
+            cpu, peak, text = _measure(fn, html)
+            print(
+                f"  {label}: cpu={cpu * 1000:8.1f}ms "
+                f"peak={peak / 1024 / 1024:7.1f}MiB chars={len(text)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Writes and bytes on the wire: per-token SSE frames vs coalesced frames.
+
+Every ``http.response.body`` message becomes one socket write, so the
+number of sends is the number of write syscalls the server makes.
+
+Usage::
+
+    uv run python -m benchmarks.sse_framing [--tokens 600] [--delay 0.005]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from fastapi.responses import StreamingResponse
+from starlette.types import ASGIApp, Message
+
+from src.app import _sse_response, _stream_messages
+from src.sse import StreamSessions
+from tests.fake_openai import FakeOpenAI
+
+_CHUNK_CHARS = 4
+
+
+async def _tokens(count: int, delay: float) -> AsyncIterator[str]:
+    reply = FakeOpenAI().reply + "\n"
+    text = (reply * (count * _CHUNK_CHARS // len(reply) + 1))[
+        : count * _CHUNK_CHARS
+    ]
+    for i in range(0, len(text), _CHUNK_CHARS):
+        await asyncio.sleep(delay)
+        yield text[i : i + _CHUNK_CHARS]
+
+
+async def _legacy(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    async for token in tokens:
+        yield f"data: {token}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+async def _measure(app: ASGIApp) -> tuple[int, int, float]:
+    sends = 0
+    size = 0
+    scope: dict[str, Any] = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [],
+    }
+
+    async def receive() -> Message:
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal sends, size
+        if message["type"] == "http.response.body" and message.get("body"):
+            sends += 1
+            size += len(message["body"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return sends, size, time.perf_counter() - start
+
+
+async def _run(args: argparse.Namespace) -> None:
+    def per_token() -> ASGIApp:
+        return StreamingResponse(
+            _legacy(_tokens(args.tokens, args.delay)),
+            media_type="text/event-stream",
+        )
+
+    def coalesced() -> ASGIApp:
+        session = StreamSessions(ttl=60).create()
+        session.start(_stream_messages(_tokens(args.tokens, args.delay)))
+        return _sse_response(session.follow())
+
+    for name, build in (("per-token", per_token), ("coalesced", coalesced)):
+        sends, size, elapsed = await _measure(build())
+        print(
+            f"{name:<10} writes={sends:5d} bytes={size:7d} "
+            f"bytes/write={size / sends:6.1f} time={elapsed:.2f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=600)
+    parser.add_argument(
+        "--delay", type=float, default=0.005, help="seconds between tokens"
+    )
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Tiny threaded HTTP/1.1 server that serves a fixed job page."""
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JOB_PAGE = (
+    "<html><head><title>Python Developer</title></head><body>"
+    "<nav>Home | Jobs</nav><main><h1>Python Developer</h1>"
+    + "".join(f"<p>Requirement {i}: FastAPI, asyncio</p>" for i in range(200))
+    + "</main><footer>Copyright</footer></body></html>"
+).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = JOB_PAGE
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve_job_page(body: bytes = JOB_PAGE) -> Iterator[str]:
+    handler = type("Handler", (_Handler,), {"body": body})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
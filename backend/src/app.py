@@ -1,58 +1,201 @@
+import asyncio
+import dataclasses
+import json
 import logging
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import TypeAdapter, ValidationError
 
 from src.config import settings
+from src.job_queue import TERMINAL, job_store
+from src.job_scraper import close_client, start_client
+from src.job_worker import job_workers
 from src.logging_config import setup_logging
+from src.parse_executor import parse_executor
+from src.resume_store import resume_store
 from src.service import (
+    BatchJob,
+    BatchResult,
     GenerationError,
+    ProgressEvent,
+    QueuedEvent,
+    StreamItem,
+    check_llm_capacity,
+    check_parse_capacity,
+    check_request,
+    generate_batch,
     generate_cover_letter,
+    prepare_resume,
     stream_cover_letter,
 )
+from src.sse import (
+    coalesce,
+    encode_event,
+    stream_sessions,
+    with_keepalive,
+)
+from src.token_budget import warm_tokenizer
+from src.uploads import (
+    ResumeUpload,
+    UploadLimitMiddleware,
+    UploadTooLargeError,
+    read_upload,
+)
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     setup_logging(settings.log_level)
+    await parse_executor.start()
+    await start_client()
+    if not await asyncio.to_thread(warm_tokenizer):
+        logging.getLogger(__name__).warning(
+            "Tokenizer is not loaded yet, estimating tokens from characters"
+        )
+    job_workers.start()
     logging.getLogger(__name__).info("Application started")
     yield
+    await asyncio.to_thread(job_workers.shutdown)
+    job_store.close()
+    await close_client()
+    await parse_executor.shutdown()
 
 
 app = FastAPI(title="Cover Letter Generator", lifespan=lifespan)
+app.add_middleware(UploadLimitMiddleware)
 
 logger = logging.getLogger(__name__)
 
+_batch_jobs = TypeAdapter(list[BatchJob])
+
+
+def _http_error(exc: GenerationError) -> HTTPException:
+    headers = None
+    if exc.retry_after is not None:
+        headers = {"Retry-After": str(exc.retry_after)}
+    return HTTPException(
+        status_code=exc.status_code, detail=str(exc), headers=headers
+    )
+
+
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _sse_response(
+    frames: AsyncIterator[str], headers: dict[str, str] | None = None
+) -> StreamingResponse:
+    return StreamingResponse(
+        with_keepalive(frames, settings.sse_keepalive_interval),
+        media_type="text/event-stream",
+        headers={**_SSE_HEADERS, **(headers or {})},
+    )
+
+
+async def _read_resume(resume: UploadFile) -> ResumeUpload:
+    try:
+        return await read_upload(resume)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+
+async def _resume_input(
+    resume: UploadFile | None, resume_id: str | None
+) -> tuple[ResumeUpload, str | None]:
+    """The uploaded file, or a stored resume's name and parsed text.
+
+    For a ``resume_id`` the returned upload is empty: the text is already
+    known and nothing is re-sent or re-parsed.
+    """
+    if resume_id:
+        stored = resume_store.get(resume_id)
+        if stored is None:
+            msg = "Resume not found or expired, upload it again."
+            raise HTTPException(status_code=404, detail=msg)
+        return ResumeUpload(stored.filename, 0, ""), stored.text
+    if resume is None:
+        msg = "Provide either a resume file or a resume_id."
+        raise HTTPException(status_code=422, detail=msg)
+    return await _read_resume(resume), None
+
 
 @app.get("/api/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post("/api/resumes", status_code=201)
+async def upload_resume(resume: UploadFile = File(...)) -> dict[str, object]:
+    """Parse a resume once and keep its text for later generate calls."""
+    upload = await _read_resume(resume)
+    filename = upload.filename
+
+    try:
+        check_parse_capacity(upload, filename)
+        resume_text = await prepare_resume(upload, filename)
+    except GenerationError as exc:
+        raise _http_error(exc) from exc
+    finally:
+        upload.close()
+
+    stored = resume_store.add(filename, resume_text)
+    logger.info("Stored resume '%s' (%d chars)", filename, len(resume_text))
+    return {
+        "resume_id": stored.id,
+        "filename": filename,
+        "chars": len(resume_text),
+    }
+
+
 @app.post("/api/generate")
 async def generate(
-    resume: UploadFile = File(...),
+    resume: UploadFile | None = File(None),
+    resume_id: str | None = Form(None),
     job_url: str | None = Form(None),
     job_text: str | None = Form(None),
     language: str = Form("ru"),
+    fresh: bool = Form(False),
 ) -> dict[str, str]:
-    data = await resume.read()
-    filename = resume.filename or "file.pdf"
+    upload, resume_text = await _resume_input(resume, resume_id)
+    filename = upload.filename
 
     try:
         cover_letter = await generate_cover_letter(
-            resume_data=data,
+            resume_data=upload,
             filename=filename,
             job_url=job_url,
             job_text=job_text,
             language=language,
+            fresh=fresh,
+            resume_text=resume_text,
         )
     except GenerationError as exc:
-        raise HTTPException(
-            status_code=exc.status_code, detail=str(exc)
-        ) from exc
+        raise _http_error(exc) from exc
+    finally:
+        upload.close()
 
     logger.info("Cover letter generated for '%s'", filename)
     return {"cover_letter": cover_letter}
@@ -60,41 +203,204 @@ async def generate(
 
 @app.post("/api/generate/stream")
 async def generate_stream(
-    resume: UploadFile = File(...),
+    resume: UploadFile | None = File(None),
+    resume_id: str | None = Form(None),
     job_url: str | None = Form(None),
     job_text: str | None = Form(None),
     language: str = Form("ru"),
+    fresh: bool = Form(False),
 ) -> StreamingResponse:
-    data = await resume.read()
-    filename = resume.filename or "file.pdf"
+    upload, resume_text = await _resume_input(resume, resume_id)
+    filename = upload.filename
 
     try:
+        if resume_text is None:
+            check_parse_capacity(upload, filename)
+        check_llm_capacity()
         token_stream = stream_cover_letter(
-            resume_data=data,
+            resume_data=upload,
             filename=filename,
             job_url=job_url,
             job_text=job_text,
             language=language,
+            fresh=fresh,
+            resume_text=resume_text,
         )
     except GenerationError as exc:
-        raise HTTPException(
-            status_code=exc.status_code, detail=str(exc)
-        ) from exc
-
-    async def sse_generator() -> AsyncIterator[str]:
-        try:
-            async for token in token_stream:
-                yield f"data: {token}\n\n"
-            yield "data: [DONE]\n\n"
-        except GenerationError as exc:
-            yield f"error: {exc}\n\n"
+        upload.close()
+        raise _http_error(exc) from exc
 
+    session = stream_sessions.create()
+    session.start(_stream_messages(token_stream, upload))
     logger.info("Streaming cover letter for '%s'", filename)
-    return StreamingResponse(
-        sse_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-        },
+    return _sse_response(session.follow(), {"X-Stream-Id": session.id})
+
+
+async def _stream_messages(
+    items: AsyncIterator[StreamItem],
+    upload: ResumeUpload | None = None,
+) -> AsyncIterator[tuple[str | None, str]]:
+    """Turn pipeline items into ``(event, data)`` pairs for the session.
+
+    The spooled ``upload`` is removed once the stream ends.
+    """
+    try:
+        async for item in coalesce(
+            items,
+            window=settings.sse_coalesce_window,
+            max_bytes=settings.sse_coalesce_bytes,
+        ):
+            if isinstance(item, str):
+                yield None, item
+            elif isinstance(item, QueuedEvent):
+                yield "queued", str(item.position)
+            elif isinstance(item, ProgressEvent):
+                yield "progress", item.stage
+        yield "done", "[DONE]"
+    except GenerationError as exc:
+        yield "error", str(exc)
+    finally:
+        if upload is not None:
+            upload.close()
+
+
+@app.get("/api/generate/stream/{stream_id}")
+async def resume_stream(
+    stream_id: str,
+    last_event_id: str | None = Header(None),
+) -> StreamingResponse:
+    """Re-attach to a stream, replaying frames after ``Last-Event-ID``."""
+    session = stream_sessions.get(stream_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Stream not found.")
+    after = 0
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    return _sse_response(session.follow(after), {"X-Stream-Id": session.id})
+
+
+def _parse_batch_jobs(raw: str) -> list[BatchJob]:
+    try:
+        jobs = _batch_jobs.validate_json(raw)
+    except ValidationError as exc:
+        msg = "jobs must be a JSON list of {url} or {text} objects."
+        raise HTTPException(status_code=400, detail=msg) from exc
+    if not 0 < len(jobs) <= settings.batch_max_jobs:
+        msg = f"Provide between 1 and {settings.batch_max_jobs} jobs."
+        raise HTTPException(status_code=400, detail=msg)
+    return jobs
+
+
+@app.post("/api/generate/batch")
+async def generate_batch_stream(
+    request: Request,
+    jobs: str = Form(...),
+    resume: UploadFile | None = File(None),
+    resume_id: str | None = Form(None),
+    language: str = Form("ru"),
+    fresh: bool = Form(False),
+) -> StreamingResponse:
+    batch = _parse_batch_jobs(jobs)
+    upload, resume_text = await _resume_input(resume, resume_id)
+    filename = upload.filename
+
+    try:
+        check_llm_capacity()
+        if resume_text is None:
+            resume_text = await prepare_resume(upload, filename)
+    except GenerationError as exc:
+        raise _http_error(exc) from exc
+    finally:
+        upload.close()
+
+    results = generate_batch(
+        resume_text, batch, language=language, fresh=fresh
+    )
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def encode(result: BatchResult) -> str:
+        payload = json.dumps(dataclasses.asdict(result), ensure_ascii=False)
+        if sse:
+            return encode_event(payload, event="result")
+        return f"{payload}\n"
+
+    async def body() -> AsyncGenerator[str]:
+        async for result in results:
+            yield encode(result)
+        if sse:
+            yield encode_event("[DONE]", event="done")
+
+    logger.info("Streaming %d cover letters for '%s'", len(batch), filename)
+    if not sse:
+        return StreamingResponse(
+            body(), media_type="application/x-ndjson", headers=_SSE_HEADERS
+        )
+    return _sse_response(body())
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    resume: UploadFile = File(...),
+    job_url: str | None = Form(None),
+    job_text: str | None = Form(None),
+    language: str = Form("ru"),
+    fresh: bool = Form(False),
+    idempotency_key: str | None = Header(None),
+) -> JSONResponse:
+    upload = await _read_resume(resume)
+    try:
+        check_request(upload.filename, job_url, job_text)
+        resume_data = await asyncio.to_thread(upload.read_bytes)
+        job, created = await asyncio.to_thread(
+            job_store.submit,
+            resume_data,
+            upload.filename,
+            {
+                "job_url": job_url,
+                "job_text": job_text,
+                "language": language,
+                "fresh": fresh,
+            },
+            idempotency_key=idempotency_key,
+        )
+    except GenerationError as exc:
+        raise _http_error(exc) from exc
+    finally:
+        upload.close()
+    return JSONResponse(
+        job.to_dict(),
+        status_code=202 if created else 200,
+        headers={"Location": f"/api/jobs/{job.id}"},
     )
+
+
+async def _get_job_or_404(job_id: str) -> dict[str, object]:
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str) -> dict[str, object]:
+    return await _get_job_or_404(job_id)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    current = await _get_job_or_404(job_id)
+
+    async def sse_generator() -> AsyncGenerator[str]:
+        state = current
+        previous = None
+        while True:
+            if state != previous:
+                payload = json.dumps(state, ensure_ascii=False)
+                yield encode_event(payload, event=str(state["status"]))
+                previous = state
+            if state["status"] in TERMINAL:
+                return
+            await asyncio.sleep(settings.job_poll_interval)
+            state = await _get_job_or_404(job_id)
+
+    return _sse_response(sse_generator())
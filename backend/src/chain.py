@@ -1,11 +1,29 @@
 import functools
+import hashlib
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
 
+from langchain_core.language_models import LanguageModelInput
 from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_openai import ChatOpenAI
 
-from src.config import settings
+from src.circuit_breaker import CircuitBreaker
+from src.config import LLMEndpoint, settings
+from src.metrics import LLM_ENDPOINT_REQUESTS
+from src.streams import aclose
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = "2"
+TEMPERATURE = 0.2
+# ``response_metadata`` key naming the endpoint that answered.
+ENDPOINT_METADATA = "llm_endpoint"
 
 _SYSTEM_PROMPT = """\
 Ты пишешь сопроводительные письма, которые звучат как живой человек, \
@@ -47,10 +65,16 @@ _SYSTEM_PROMPT = """\
 - Выводи только текст письма, без комментариев.\
 """
 
-_USER_PROMPT = """\
+# The prompt is ordered from most to least reusable so that provider-side
+# prompt caching can reuse the longest possible prefix: the system prompt
+# is shared by everyone, the resume by all requests of one candidate, and
+# only the vacancy message changes between them.
+_RESUME_PROMPT = """\
 === RESUME ===
-{resume_text}
+{resume_text}\
+"""
 
+_JOB_PROMPT = """\
 === JOB DESCRIPTION ===
 {job_description}
 
@@ -60,16 +84,236 @@ _USER_PROMPT = """\
 _prompt = ChatPromptTemplate.from_messages(
     [
         ("system", _SYSTEM_PROMPT),
-        ("human", _USER_PROMPT),
+        ("human", _RESUME_PROMPT),
+        ("human", _JOB_PROMPT),
     ]
 )
 
 
-@functools.lru_cache(maxsize=1)
-def get_chain() -> Runnable[dict[str, str], BaseMessage]:
-    model = ChatOpenAI(
-        api_key=settings.openai_api_key,
+def prompt_cache_key(resume_text: str) -> str:
+    digest = hashlib.sha256(resume_text.encode()).hexdigest()
+    return f"resume-{digest[:32]}"
+
+
+class NoEndpointAvailableError(Exception):
+    """Raised when the breakers of all LLM endpoints are open."""
+
+
+@dataclass(frozen=True)
+class Route:
+    """An LLM endpoint with its client and circuit breaker."""
+
+    name: str
+    model: ChatOpenAI
+    breaker: CircuitBreaker
+    send_cache_key: bool = True
+
+
+def _endpoints() -> list[LLMEndpoint]:
+    primary = LLMEndpoint(
+        name="primary",
         model=settings.openai_model,
-        temperature=0.2,
+        base_url=settings.openai_base_url,
+        timeout=settings.openai_timeout,
+        max_retries=settings.openai_max_retries,
     )
-    return _prompt | model
+    return [primary, *settings.llm_fallbacks]
+
+
+def _endpoint_name(endpoint: LLMEndpoint) -> str:
+    if endpoint.name:
+        return endpoint.name
+    host = urlparse(endpoint.base_url or "").netloc or "openai"
+    return f"{endpoint.model}@{host}"
+
+
+@functools.lru_cache(maxsize=1)
+def _get_routes() -> tuple[Route, ...]:
+    routes = []
+    for endpoint in _endpoints():
+        name = _endpoint_name(endpoint)
+        model = ChatOpenAI(
+            api_key=endpoint.api_key or settings.openai_api_key,
+            base_url=endpoint.base_url,
+            model=endpoint.model,
+            temperature=TEMPERATURE,
+            timeout=endpoint.timeout,
+            max_retries=endpoint.max_retries,
+            stream_usage=True,
+        )
+        breaker = CircuitBreaker(
+            name,
+            window=settings.llm_breaker_window,
+            min_calls=settings.llm_breaker_min_calls,
+            error_rate=settings.llm_breaker_error_rate,
+            slow_call=settings.llm_breaker_slow_call,
+            cooldown=settings.llm_breaker_cooldown,
+        )
+        routes.append(Route(name, model, breaker, endpoint.send_cache_key))
+    return tuple(routes)
+
+
+def served_by_fallback(message: Any) -> bool:
+    """Whether ``message`` (or a stream chunk) came from a fallback."""
+    metadata = getattr(message, "response_metadata", None) or {}
+    endpoint = metadata.get(ENDPOINT_METADATA)
+    return endpoint is not None and endpoint != _get_routes()[0].name
+
+
+class FailoverModel(Runnable[LanguageModelInput, BaseMessage]):
+    """Chat model that tries the endpoints in order, skipping open breakers.
+
+    A call that fails (or, when streaming, fails before its first chunk)
+    is retried on the next endpoint. Once a stream has produced output it
+    is not switched, so the client never sees text from two models; a
+    later error is recorded against the endpoint and raised. Calls the
+    caller cancels are not counted against the endpoint.
+    """
+
+    def __init__(
+        self, routes: Sequence[Route], cache_key: str | None = None
+    ) -> None:
+        self.routes = routes
+        self.cache_key = cache_key
+
+    def _kwargs(self, route: Route, kwargs: dict[str, Any]) -> dict[str, Any]:
+        if self.cache_key is not None and route.send_cache_key:
+            return {"prompt_cache_key": self.cache_key, **kwargs}
+        return kwargs
+
+    def _available(self) -> Iterator[Route]:
+        for number, route in enumerate(self.routes):
+            if not route.breaker.allow():
+                LLM_ENDPOINT_REQUESTS.labels(route.name, "skipped").inc()
+                continue
+            if number:
+                logger.warning("Failing over to LLM endpoint '%s'", route.name)
+            yield route
+
+    def _succeeded(self, route: Route, duration: float) -> None:
+        route.breaker.record(ok=True, duration=duration)
+        outcome = "slow" if duration > route.breaker.slow_call else "success"
+        LLM_ENDPOINT_REQUESTS.labels(route.name, outcome).inc()
+
+    def _failed(self, route: Route, exc: Exception) -> None:
+        route.breaker.record(ok=False)
+        LLM_ENDPOINT_REQUESTS.labels(route.name, "error").inc()
+        logger.warning("LLM endpoint '%s' failed: %s", route.name, exc)
+
+    def _unavailable(self, last_error: Exception | None) -> Exception:
+        if last_error is not None:
+            return last_error
+        msg = "All LLM endpoints are unavailable, try again later."
+        return NoEndpointAvailableError(msg)
+
+    def invoke(
+        self,
+        input: LanguageModelInput,
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseMessage:
+        last_error: Exception | None = None
+        for route in self._available():
+            start = time.monotonic()
+            try:
+                result = route.model.invoke(
+                    input, config, **self._kwargs(route, kwargs)
+                )
+            except Exception as exc:
+                self._failed(route, exc)
+                last_error = exc
+                continue
+            except BaseException:
+                route.breaker.release()
+                raise
+            self._succeeded(route, time.monotonic() - start)
+            result.response_metadata[ENDPOINT_METADATA] = route.name
+            return result
+        raise self._unavailable(last_error)
+
+    async def ainvoke(
+        self,
+        input: LanguageModelInput,
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseMessage:
+        last_error: Exception | None = None
+        for route in self._available():
+            start = time.monotonic()
+            try:
+                result = await route.model.ainvoke(
+                    input, config, **self._kwargs(route, kwargs)
+                )
+            except Exception as exc:
+                self._failed(route, exc)
+                last_error = exc
+                continue
+            except BaseException:
+                route.breaker.release()
+                raise
+            self._succeeded(route, time.monotonic() - start)
+            result.response_metadata[ENDPOINT_METADATA] = route.name
+            return result
+        raise self._unavailable(last_error)
+
+    async def astream(
+        self,
+        input: LanguageModelInput,
+        config: RunnableConfig | None = None,
+        **kwargs: Any | None,
+    ) -> AsyncIterator[BaseMessage]:
+        last_error: Exception | None = None
+        for route in self._available():
+            start = time.monotonic()
+            chunks = route.model.astream(
+                input, config, **self._kwargs(route, kwargs)
+            )
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                self._succeeded(route, time.monotonic() - start)
+                return
+            except Exception as exc:
+                await aclose(chunks)
+                self._failed(route, exc)
+                last_error = exc
+                continue
+            except BaseException:
+                await aclose(chunks)
+                route.breaker.release()
+                raise
+
+            # Latency of a stream is judged by its first chunk; the rest
+            # depends on the length of the letter.
+            first_chunk = time.monotonic() - start
+            first.response_metadata[ENDPOINT_METADATA] = route.name
+            try:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+            except Exception as exc:
+                self._failed(route, exc)
+                raise
+            except BaseException:
+                route.breaker.release()
+                raise
+            finally:
+                await aclose(chunks)
+            self._succeeded(route, first_chunk)
+            return
+        raise self._unavailable(last_error)
+
+
+def get_chain(
+    cache_key: str | None = None, *, hedge: bool = False
+) -> Runnable[dict[str, str], BaseMessage]:
+    """The prompt and the failover model.
+
+    A ``hedge`` chain starts at the first fallback endpoint when
+    ``llm_hedge_fallback_first`` is set, so that a duplicate request
+    does not queue behind a slow primary.
+    """
+    routes = _get_routes()
+    if hedge and settings.llm_hedge_fallback_first and len(routes) > 1:
+        routes = (*routes[1:], routes[0])
+    return _prompt | FailoverModel(routes, cache_key)
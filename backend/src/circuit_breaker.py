@@ -0,0 +1,114 @@
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+
+from src.metrics import LLM_BREAKER_STATE, LLM_BREAKER_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """Error-rate and latency breaker for one LLM endpoint.
+
+    The outcomes of the last ``window`` calls are kept; a call fails if
+    it raised or took longer than ``slow_call`` seconds. Once at least
+    ``min_calls`` are recorded and the failure share reaches
+    ``error_rate``, the breaker opens and ``allow`` refuses calls for
+    ``cooldown`` seconds. After that a single trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int,
+        min_calls: int,
+        error_rate: float,
+        slow_call: float,
+        cooldown: float,
+    ) -> None:
+        self.name = name
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self._min_calls = min_calls
+        self._error_rate = error_rate
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        LLM_BREAKER_STATE.labels(endpoint=name).set(self._state)
+
+    @property
+    def state(self) -> BreakerState:
+        if (
+            self._state is BreakerState.OPEN
+            and time.monotonic() - self._opened_at >= self.cooldown
+        ):
+            self._transition(BreakerState.HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the endpoint now.
+
+        In the half-open state only one trial call is allowed at a time;
+        its outcome must be reported with ``record``.
+        """
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record(self, *, ok: bool, duration: float = 0.0) -> None:
+        failed = not ok or duration > self.slow_call
+        if self._state is BreakerState.HALF_OPEN:
+            self._trial_running = False
+            if failed:
+                self._open()
+            else:
+                self._outcomes.clear()
+                self._transition(BreakerState.CLOSED)
+            return
+
+        self._outcomes.append(failed)
+        if self._state is BreakerState.CLOSED and self._tripped():
+            self._open()
+
+    def release(self) -> None:
+        """Give up a granted call without an outcome (e.g. cancelled)."""
+        self._trial_running = False
+
+    def _tripped(self) -> bool:
+        calls = len(self._outcomes)
+        if calls < self._min_calls:
+            return False
+        return sum(self._outcomes) / calls >= self._error_rate
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(BreakerState.OPEN)
+
+    def _transition(self, state: BreakerState) -> None:
+        if state is self._state:
+            return
+        logger.warning(
+            "LLM endpoint '%s' breaker %s -> %s",
+            self.name,
+            self._state.name.lower(),
+            state.name.lower(),
+        )
+        self._state = state
+        LLM_BREAKER_STATE.labels(endpoint=self.name).set(state)
+        LLM_BREAKER_TRANSITIONS.labels(
+            endpoint=self.name, state=state.name.lower()
+        ).inc()
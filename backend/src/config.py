@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from pydantic import SecretStr
+from pydantic import BaseModel, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _BASE_DIR = Path(__file__).resolve().parent.parent
@@ -9,6 +9,22 @@ if not _ENV_FILE.exists():
     _ENV_FILE = _BASE_DIR.parent / ".env"
 
 
+class LLMEndpoint(BaseModel):
+    """An OpenAI-compatible endpoint to fail over to.
+
+    ``api_key`` defaults to ``OPENAI_API_KEY``; ``send_cache_key`` can be
+    turned off for providers that reject the ``prompt_cache_key`` field.
+    """
+
+    model: str
+    base_url: str | None = None
+    api_key: SecretStr | None = None
+    timeout: float = 60.0
+    max_retries: int = 1
+    send_cache_key: bool = True
+    name: str = ""
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=str(_ENV_FILE),
@@ -18,6 +34,87 @@ class Settings(BaseSettings):
 
     openai_api_key: SecretStr
     openai_model: str = "gpt-4o"
+    openai_base_url: str | None = None
+    openai_timeout: float = 60.0
+    openai_max_retries: int = 1
+
+    parse_workers: int = 2
+    parse_queue_size: int = 8
+    parse_timeout: float = 20.0
+    parse_retry_after: int = 5
+    parse_max_chars: int = 60_000
+    parse_pdf_chunk_pages: int = 16
+
+    upload_max_bytes: int = 10 * 1024 * 1024
+    upload_spool_threshold: int = 1024 * 1024
+    upload_spool_dir: Path | None = None
+
+    resume_cache_max_bytes: int = 64 * 1024 * 1024
+    resume_cache_path: Path | None = None
+
+    resume_store_ttl: float = 3600.0
+    resume_store_max_entries: int = 1000
+
+    scrape_http2: bool = False
+    scrape_max_connections: int = 100
+    scrape_max_keepalive: int = 20
+    scrape_keepalive_expiry: float = 30.0
+    scrape_per_host_limit: int = 4
+    scrape_timeout: float = 30.0
+    scrape_connect_timeout: float = 5.0
+    scrape_max_bytes: int = 5 * 1024 * 1024
+    scrape_cache_ttl: float = 600.0
+    scrape_cache_max_bytes: int = 16 * 1024 * 1024
+
+    llm_max_inflight: int = 16
+    llm_tokens_per_minute: int = 0
+    llm_queue_size: int = 64
+    llm_queue_timeout: float = 60.0
+    llm_queue_heartbeat: float = 5.0
+    llm_retry_after: int = 10
+    llm_fallbacks: list[LLMEndpoint] = []
+    llm_breaker_window: int = 20
+    llm_breaker_min_calls: int = 5
+    llm_breaker_error_rate: float = 0.5
+    llm_breaker_slow_call: float = 30.0
+    llm_breaker_cooldown: float = 30.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_delay: float = 0.5
+    llm_hedge_min_samples: int = 20
+    llm_hedge_window: int = 200
+    llm_hedge_max_rate: float = 0.05
+    llm_hedge_fallback_first: bool = False
+
+    sse_keepalive_interval: float = 15.0
+    sse_coalesce_window: float = 0.03
+    sse_coalesce_bytes: int = 64
+    sse_resume_ttl: float = 120.0
+    sse_detach_grace: float = 5.0
+
+    job_queue_path: Path = Path("data/jobs.sqlite3")
+    job_workers: int = 1
+    job_max_attempts: int = 3
+    job_retry_backoff: float = 5.0
+    job_lease: float = 300.0
+    job_poll_interval: float = 0.5
+
+    batch_max_jobs: int = 50
+    batch_scrape_concurrency: int = 8
+    batch_llm_concurrency: int = 4
+
+    prompt_token_budget: int = 6000
+    prompt_resume_share: float = 0.5
+    tokenizer_warmup_timeout: float = 10.0
+    tokenizer_retry_interval: float = 300.0
+
+    resume_select_top_k: int = 0
+    resume_select_min_tokens: int = 600
+    resume_select_cache_entries: int = 256
+
+    generation_cache_enabled: bool = False
+    generation_cache_ttl: float = 3600.0
+    generation_cache_max_entries: int = 1000
 
     log_level: str = "INFO"
 
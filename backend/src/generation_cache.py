@@ -0,0 +1,76 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from src.chain import PROMPT_VERSION, TEMPERATURE
+from src.config import settings
+from src.metrics import GENERATION_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_REPLAY_CHUNK = re.compile(r"\S+\s*|\s+")
+
+
+def generation_key(chain_input: dict[str, str]) -> str:
+    payload = json.dumps(
+        {
+            "resume_text": chain_input["resume_text"],
+            "job_description": chain_input["job_description"],
+            "language": chain_input["language"],
+            "model": settings.openai_model,
+            "prompt_version": PROMPT_VERSION,
+            "temperature": TEMPERATURE,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay_chunks(letter: str) -> list[str]:
+    """Split a cached letter into word-sized chunks for SSE replay."""
+    return _REPLAY_CHUNK.findall(letter)
+
+
+class GenerationCache:
+    """Exact-match cache of generated letters with TTL and LRU bound."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            GENERATION_CACHE_REQUESTS.labels(result="hit").inc()
+            logger.info("Generation cache hit")
+            return entry[1]
+
+        if entry is not None:
+            del self._entries[key]
+        GENERATION_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    def put(self, key: str, letter: str) -> None:
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), letter)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+generation_cache = GenerationCache(
+    settings.generation_cache_ttl, settings.generation_cache_max_entries
+)
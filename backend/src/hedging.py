@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from src.config import settings
+from src.metrics import LLM_HEDGE_DELAY, LLM_HEDGE_RATE, LLM_HEDGES
+from src.streams import aclose
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = object()
+
+
+async def _first(stream: AsyncIterator[Any]) -> Any:
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return _EMPTY
+
+
+class Hedger:
+    """Duplicates LLM streams whose first token is late.
+
+    The hedge delay is the ``percentile`` of recent first-token
+    latencies (at least ``min_delay``); before ``min_samples`` are known
+    nothing is hedged. Every stream earns ``max_rate`` of a hedge and a
+    hedge spends one, so over time at most ``max_rate`` of the requests
+    are duplicated. Whichever attempt yields first is streamed, the
+    other is cancelled.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float,
+        min_delay: float,
+        min_samples: int,
+        window: int,
+        max_rate: float,
+    ) -> None:
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.requests = 0
+        self.hedges = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._credit = 0.0
+
+    @property
+    def delay(self) -> float | None:
+        if not self._latencies or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def observe(self, first_token: float) -> None:
+        self._latencies.append(first_token)
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.hedges = 0
+        self._latencies.clear()
+        self._credit = 0.0
+
+    def _spend(self) -> bool:
+        # Ten credits of 0.1 add up to 0.999..., not 1.
+        if self._credit < 1 - 1e-9:
+            return False
+        self._credit -= 1
+        self.hedges += 1
+        LLM_HEDGE_RATE.set(self.hedges / self.requests)
+        return True
+
+    async def stream(
+        self, start: Callable[[bool], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """Stream ``start(False)``, hedged with ``start(True)`` if late."""
+        self.requests += 1
+        # Capped so that a quiet period cannot bank a burst of hedges.
+        self._credit = min(self._credit + self.max_rate, 1.0)
+        LLM_HEDGE_RATE.set(self.hedges / self.requests)
+
+        started = time.monotonic()
+        primary = start(False)
+        streams = {asyncio.create_task(_first(primary)): primary}
+        hedged = False
+        try:
+            delay = self.delay
+            if delay is not None:
+                LLM_HEDGE_DELAY.set(delay)
+            done, _ = await asyncio.wait(set(streams), timeout=delay)
+            if not done and self._spend():
+                hedged = True
+                logger.info("Hedging LLM stream after %.2fs", delay)
+                hedge = start(True)
+                streams[asyncio.create_task(_first(hedge))] = hedge
+
+            winner, first = await self._race(list(streams))
+            # Measured from the primary's start either way; when a hedge
+            # wins this understates how slow the primary would have been.
+            self.observe(time.monotonic() - started)
+            if hedged:
+                won = streams[winner] is not primary
+                LLM_HEDGES.labels(outcome="won" if won else "lost").inc()
+
+            for task, stream in list(streams.items()):
+                if task is not winner:
+                    await self._drop(task, stream)
+                    del streams[task]
+
+            if first is _EMPTY:
+                return
+            yield first
+            async for chunk in streams[winner]:
+                yield chunk
+        finally:
+            for task, stream in streams.items():
+                await self._drop(task, stream)
+
+    async def _race(
+        self, tasks: list[asyncio.Task[Any]]
+    ) -> tuple[asyncio.Task[Any], Any]:
+        """The first attempt to produce a chunk, and that chunk.
+
+        A failed attempt loses; if every attempt fails, the error of the
+        first one (the primary) is raised.
+        """
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    return task, task.result()
+        error = tasks[0].exception()
+        assert error is not None
+        raise error
+
+    async def _drop(
+        self, task: asyncio.Task[Any], stream: AsyncIterator[Any]
+    ) -> None:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        elif not task.cancelled():
+            task.exception()
+        await aclose(stream)
+
+
+hedger = Hedger(
+    percentile=settings.llm_hedge_percentile,
+    min_delay=settings.llm_hedge_min_delay,
+    min_samples=settings.llm_hedge_min_samples,
+    window=settings.llm_hedge_window,
+    max_rate=settings.llm_hedge_max_rate,
+)
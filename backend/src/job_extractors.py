@@ -0,0 +1,324 @@
+import html
+import json
+import logging
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+STRIP_TAGS = frozenset(
+    {
+        "script",
+        "style",
+        "nav",
+        "footer",
+        "header",
+        "noscript",
+        "svg",
+        "img",
+        "iframe",
+        "form",
+    }
+)
+
+_JSON_LD_TYPE = "application/ld+json"
+_MARKER_SLACK = 3
+
+
+class PageCollector:
+    """lxml parser target that keeps visible text outside ``STRIP_TAGS``.
+
+    Each text node becomes one or more stripped lines, matching
+    ``BeautifulSoup.get_text(separator="\\n", strip=True)``. Along the way
+    it keeps JSON-LD blocks and, separately, the text of the first element
+    matching one of ``markers`` (``(attribute, value)`` pairs; ``class``
+    is matched per token).
+    """
+
+    def __init__(
+        self,
+        max_chars: int,
+        markers: tuple[tuple[str, str], ...] = (),
+    ) -> None:
+        self.lines: list[str] = []
+        self.section: list[str] = []
+        self.json_ld: list[str] = []
+        self.chars = 0
+        self._max_chars = max_chars
+        self._markers = markers
+        self._depth = 0
+        self._skip_depth = 0
+        self._section_depth: int | None = None
+        self._section_chars = 0
+        self._section_done = False
+        self._json_buffer: list[str] | None = None
+        self._buffer: list[str] = []
+
+    @property
+    def full(self) -> bool:
+        if self._markers and (
+            self._section_done or self._section_chars > self._max_chars
+        ):
+            return True
+        # With markers the description may start after some page text,
+        # so the page gets more room, but a page without the marked
+        # element (a new layout, a listing) still stops early.
+        limit = self._max_chars * (_MARKER_SLACK if self._markers else 1)
+        return self.chars > limit
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        self._flush()
+        self._depth += 1
+        if tag == "script" and attrib.get("type") == _JSON_LD_TYPE:
+            self._json_buffer = []
+        if tag in STRIP_TAGS:
+            self._skip_depth += 1
+        if (
+            self._section_depth is None
+            and not self._section_done
+            and self._matches(attrib)
+        ):
+            self._section_depth = self._depth
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        if tag == "script" and self._json_buffer is not None:
+            self.json_ld.append("".join(self._json_buffer))
+            self._json_buffer = None
+        if tag in STRIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if self._section_depth == self._depth:
+            self._section_depth = None
+            self._section_done = True
+        self._depth -= 1
+
+    def data(self, text: str) -> None:
+        if self._json_buffer is not None:
+            self._json_buffer.append(text)
+        elif not self._skip_depth:
+            self._buffer.append(text)
+
+    def comment(self, _text: str) -> None:
+        self._flush()
+
+    def close(self) -> str:
+        self._flush()
+        return "\n".join(self.lines)
+
+    def _matches(self, attrib: dict[str, str]) -> bool:
+        for name, value in self._markers:
+            actual = attrib.get(name)
+            if actual is None:
+                continue
+            if name == "class" and value in actual.split():
+                return True
+            if actual == value:
+                return True
+        return False
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            self.lines.append(stripped)
+            self.chars += len(stripped) + 1
+            if self._section_depth is not None:
+                self.section.append(stripped)
+                self._section_chars += len(stripped) + 1
+
+
+def html_to_text(fragment: str) -> str:
+    if "<" not in fragment and "&lt;" in fragment:
+        fragment = html.unescape(fragment)
+    collector = PageCollector(max_chars=len(fragment))
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(f"<div>{fragment}</div>")
+    return str(parser.close())
+
+
+def _iter_json_ld(blocks: list[str]) -> list[dict[str, Any]]:
+    items: list[dict[str, Any]] = []
+    pending: list[Any] = []
+    for block in blocks:
+        try:
+            pending.append(json.loads(block))
+        except json.JSONDecodeError:
+            logger.debug("Skipping malformed JSON-LD block")
+    while pending:
+        item = pending.pop(0)
+        if isinstance(item, list):
+            pending.extend(item)
+        elif isinstance(item, dict):
+            items.append(item)
+            pending.extend(item.get("@graph", []))
+    return items
+
+
+def _is_job_posting(item: dict[str, Any]) -> bool:
+    kind = item.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    return "JobPosting" in kinds
+
+
+def job_posting_text(blocks: list[str]) -> str | None:
+    for item in _iter_json_ld(blocks):
+        if not _is_job_posting(item) or not item.get("description"):
+            continue
+        organization = item.get("hiringOrganization")
+        company = (
+            organization.get("name")
+            if isinstance(organization, dict)
+            else organization
+        )
+        parts = [
+            str(item.get("title") or ""),
+            str(company or ""),
+            html_to_text(str(item["description"])),
+        ]
+        return "\n".join(part.strip() for part in parts if part.strip())
+    return None
+
+
+def _join(*parts: str | None) -> str:
+    return "\n".join(p.strip() for p in parts if p and p.strip())
+
+
+@dataclass(frozen=True)
+class SiteExtractor:
+    """Host-specific way to get the vacancy text without page noise.
+
+    ``api_url`` maps a page URL to a public JSON API (``None`` when the
+    URL is not a vacancy page) and ``from_api`` turns its payload into
+    text. ``markers`` identify the element holding the description in
+    the HTML page, used when there is no API or no JSON-LD posting.
+    """
+
+    name: str
+    markers: tuple[tuple[str, str], ...] = ()
+    api_url: Callable[[str], str | None] | None = None
+    from_api: Callable[[Any], str] | None = None
+
+
+def _hh_api_url(url: str) -> str | None:
+    match = re.search(r"/vacancy/(\d+)", urlparse(url).path)
+    return f"https://api.hh.ru/vacancies/{match[1]}" if match else None
+
+
+def _hh_from_api(payload: dict[str, Any]) -> str:
+    skills = ", ".join(s["name"] for s in payload.get("key_skills") or [])
+    return _join(
+        payload.get("name"),
+        (payload.get("employer") or {}).get("name"),
+        html_to_text(payload.get("description") or ""),
+        f"Ключевые навыки: {skills}" if skills else None,
+    )
+
+
+def _greenhouse_api_url(url: str) -> str | None:
+    match = re.match(r"/([^/]+)/jobs/(\d+)", urlparse(url).path)
+    if not match:
+        return None
+    board, job_id = match.groups()
+    return f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job_id}"
+
+
+def _greenhouse_from_api(payload: dict[str, Any]) -> str:
+    return _join(
+        payload.get("title"),
+        payload.get("company_name"),
+        (payload.get("location") or {}).get("name"),
+        html_to_text(payload.get("content") or ""),
+    )
+
+
+def _lever_api_url(url: str) -> str | None:
+    match = re.match(r"/([^/]+)/([0-9a-f-]{36})", urlparse(url).path)
+    if not match:
+        return None
+    company, posting_id = match.groups()
+    return f"https://api.lever.co/v0/postings/{company}/{posting_id}"
+
+
+def _lever_from_api(payload: dict[str, Any]) -> str:
+    sections = [
+        _join(item.get("text"), html_to_text(item.get("content") or ""))
+        for item in payload.get("lists") or []
+    ]
+    categories = payload.get("categories") or {}
+    return _join(
+        payload.get("text"),
+        " / ".join(
+            str(categories[k])
+            for k in ("team", "location", "commitment")
+            if categories.get(k)
+        ),
+        payload.get("descriptionPlain"),
+        *sections,
+        payload.get("additionalPlain"),
+    )
+
+
+_HH = SiteExtractor(
+    name="hh",
+    markers=(("data-qa", "vacancy-description"),),
+    api_url=_hh_api_url,
+    from_api=_hh_from_api,
+)
+
+_EXTRACTORS: dict[str, SiteExtractor] = {
+    "hh.ru": _HH,
+    "hh.kz": _HH,
+    "linkedin.com": SiteExtractor(
+        name="linkedin",
+        markers=(
+            ("class", "show-more-less-html__markup"),
+            ("class", "description__text"),
+        ),
+    ),
+    "greenhouse.io": SiteExtractor(
+        name="greenhouse",
+        markers=(("class", "job__description"), ("id", "content")),
+        api_url=_greenhouse_api_url,
+        from_api=_greenhouse_from_api,
+    ),
+    "lever.co": SiteExtractor(
+        name="lever",
+        markers=(("class", "section-wrapper"),),
+        api_url=_lever_api_url,
+        from_api=_lever_from_api,
+    ),
+}
+
+
+def find_extractor(url: str) -> SiteExtractor | None:
+    host = (urlparse(url).hostname or "").lower()
+    for domain, extractor in _EXTRACTORS.items():
+        if host == domain or host.endswith(f".{domain}"):
+            return extractor
+    return None
+
+
+def pick_text(
+    collector: PageCollector, extractor: SiteExtractor | None
+) -> str:
+    """Choose the best text a closed ``PageCollector`` has seen.
+
+    Preference order: JSON-LD ``JobPosting``, the marked description
+    element, then all visible text (the generic path).
+    """
+    posting = job_posting_text(collector.json_ld)
+    if posting:
+        return posting
+    if extractor is not None and collector.section:
+        return "\n".join(collector.section)
+    return "\n".join(collector.lines)
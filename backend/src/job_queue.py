@@ -0,0 +1,284 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL = frozenset({SUCCEEDED, FAILED})
+
+_WORKER_LOST = "The job worker stopped responding."
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    resume BLOB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    status_code INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+_PUBLIC_COLUMNS = (
+    "id, status, params, filename, attempts, result, error, status_code, "
+    "created_at, updated_at"
+)
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    status: str
+    params: dict[str, Any]
+    filename: str
+    attempts: int
+    result: str | None
+    error: str | None
+    status_code: int | None
+    created_at: float
+    updated_at: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "cover_letter": self.result,
+            "error": self.error,
+            "status_code": self.status_code,
+        }
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    job: Job
+    resume: bytes
+
+
+def _row_to_job(row: sqlite3.Row) -> Job:
+    return Job(
+        id=row["id"],
+        status=row["status"],
+        params=json.loads(row["params"]),
+        filename=row["filename"],
+        attempts=row["attempts"],
+        result=row["result"],
+        error=row["error"],
+        status_code=row["status_code"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+    )
+
+
+class JobStore:
+    """Durable generation queue in a local SQLite file.
+
+    Several processes may share the file: the API process submits jobs
+    and worker processes ``claim`` them under a lease. A job whose lease
+    expires (its worker died or the server restarted) is claimed again,
+    as long as it has attempts left.
+    The uploaded resume is kept only until the job reaches a final state.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(
+                self._db_path,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def submit(
+        self,
+        resume_data: bytes,
+        filename: str,
+        params: dict[str, Any],
+        idempotency_key: str | None = None,
+    ) -> tuple[Job, bool]:
+        """Enqueue a job; return it and whether it was newly created.
+
+        A repeated ``idempotency_key`` returns the job submitted first.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            db = self._conn()
+            cursor = db.execute(
+                "INSERT INTO jobs (id, idempotency_key, status, params, "
+                "filename, resume, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (idempotency_key) DO NOTHING",
+                (
+                    job_id,
+                    idempotency_key,
+                    QUEUED,
+                    json.dumps(params),
+                    filename,
+                    resume_data,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            created = cursor.rowcount == 1
+            row = db.execute(
+                f"SELECT {_PUBLIC_COLUMNS} FROM jobs "
+                "WHERE id = ? OR idempotency_key = ?",
+                (job_id, idempotency_key),
+            ).fetchone()
+        if created:
+            logger.info("Job %s queued", job_id)
+        return _row_to_job(row), created
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = (
+                self._conn()
+                .execute(
+                    f"SELECT {_PUBLIC_COLUMNS} FROM jobs WHERE id = ?",
+                    (job_id,),
+                )
+                .fetchone()
+            )
+        return None if row is None else _row_to_job(row)
+
+    def claim(self, lease: float) -> ClaimedJob | None:
+        """Lease the oldest ready job.
+
+        A job whose lease expired ``job_max_attempts`` times is failed
+        instead of being claimed again: it most likely crashed every
+        worker that picked it up.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            abandoned = db.execute(
+                "UPDATE jobs SET status = ?, error = ?, status_code = ?, "
+                "resume = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ? "
+                "RETURNING id, attempts",
+                (
+                    FAILED,
+                    _WORKER_LOST,
+                    500,
+                    now,
+                    RUNNING,
+                    now,
+                    settings.job_max_attempts,
+                ),
+            ).fetchall()
+            row = db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+                "lease_until = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE "
+                "(status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1) "
+                f"RETURNING {_PUBLIC_COLUMNS}, resume",
+                (RUNNING, now + lease, now, QUEUED, now, RUNNING, now),
+            ).fetchone()
+        for lost in abandoned:
+            logger.warning(
+                "Job %s failed: its worker was lost on all %d attempts",
+                lost["id"],
+                lost["attempts"],
+            )
+        if row is None:
+            return None
+        return ClaimedJob(_row_to_job(row), bytes(row["resume"]))
+
+    def complete(self, job_id: str, cover_letter: str) -> None:
+        self._finish(job_id, SUCCEEDED, result=cover_letter)
+        logger.info("Job %s succeeded", job_id)
+
+    def fail(
+        self,
+        job_id: str,
+        error: str,
+        status_code: int,
+        *,
+        retry: bool,
+    ) -> None:
+        """Record a failed attempt, re-queueing it with backoff if allowed."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        if retry and job.attempts < settings.job_max_attempts:
+            delay = settings.job_retry_backoff * 2 ** (job.attempts - 1)
+            now = time.time()
+            with self._lock:
+                self._conn().execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, "
+                    "lease_until = NULL, error = ?, status_code = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (QUEUED, now + delay, error, status_code, now, job_id),
+                )
+            logger.warning(
+                "Job %s attempt %d failed, retrying in %.0fs: %s",
+                job_id,
+                job.attempts,
+                delay,
+                error,
+            )
+            return
+        self._finish(job_id, FAILED, error=error, status_code=status_code)
+        logger.warning("Job %s failed: %s", job_id, error)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        *,
+        result: str | None = None,
+        error: str | None = None,
+        status_code: int | None = None,
+    ) -> None:
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                "status_code = ?, resume = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (status, result, error, status_code, time.time(), job_id),
+            )
+
+
+job_store = JobStore(settings.job_queue_path)
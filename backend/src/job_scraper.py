@@ -1,11 +1,27 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
+from lxml import etree
+
+from src.config import settings
+from src.job_extractors import (
+    PageCollector,
+    SiteExtractor,
+    find_extractor,
+    pick_text,
+)
+from src.scrape_cache import CachedPage, scrape_cache
 
 logger = logging.getLogger(__name__)
 
-_MAX_CHARS = 6000
+# Only a safety cap on what a page may contribute; the prompt itself is
+# fitted to the model's token budget in ``token_budget``.
+_MAX_CHARS = 20_000
 
 _HEADERS = {
     "User-Agent": (
@@ -15,20 +31,78 @@ _HEADERS = {
     ),
 }
 
-_STRIP_TAGS = frozenset(
-    {
-        "script",
-        "style",
-        "nav",
-        "footer",
-        "header",
-        "noscript",
-        "svg",
-        "img",
-        "iframe",
-        "form",
-    }
-)
+_client: httpx.AsyncClient | None = None
+
+
+@dataclass
+class _HostSlot:
+    """Per-host concurrency limit; dropped once nobody holds or awaits it."""
+
+    semaphore: asyncio.Semaphore
+    users: int = 0
+
+
+_host_slots: dict[str, _HostSlot] = {}
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=_HEADERS,
+        follow_redirects=True,
+        http2=settings.scrape_http2,
+        limits=httpx.Limits(
+            max_connections=settings.scrape_max_connections,
+            max_keepalive_connections=settings.scrape_max_keepalive,
+            keepalive_expiry=settings.scrape_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            settings.scrape_timeout,
+            connect=settings.scrape_connect_timeout,
+        ),
+    )
+
+
+async def start_client() -> None:
+    global _client
+    if _client is None:
+        _client = _new_client()
+        logger.info(
+            "Scraper client started (http2=%s, per_host=%d)",
+            settings.scrape_http2,
+            settings.scrape_per_host_limit,
+        )
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+        _host_slots.clear()
+        logger.info("Scraper client closed")
+
+
+@asynccontextmanager
+async def _acquire_client(url: str) -> AsyncIterator[httpx.AsyncClient]:
+    if _client is None:
+        async with _new_client() as client:
+            yield client
+        return
+
+    host = urlparse(url).hostname or ""
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _HostSlot(asyncio.Semaphore(settings.scrape_per_host_limit))
+        _host_slots[host] = slot
+
+    slot.users += 1
+    try:
+        async with slot.semaphore:
+            yield _client
+    finally:
+        slot.users -= 1
+        if not slot.users and _host_slots.get(host) is slot:
+            del _host_slots[host]
 
 
 def _truncate(text: str, max_chars: int = _MAX_CHARS) -> str:
@@ -43,25 +117,119 @@ def _truncate(text: str, max_chars: int = _MAX_CHARS) -> str:
     return cut
 
 
-async def scrape_job(url: str) -> str:
-    logger.info("Scraping job page: %s", url)
+async def _extract_text(
+    resp: httpx.Response,
+    url: str,
+    extractor: SiteExtractor | None = None,
+) -> str:
+    collector = PageCollector(
+        _MAX_CHARS, extractor.markers if extractor else ()
+    )
+    parser = etree.HTMLParser(target=collector, encoding=resp.charset_encoding)
 
-    async with httpx.AsyncClient(
-        headers=_HEADERS,
-        follow_redirects=True,
-        timeout=30,
-    ) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
+    received = 0
+    async for chunk in resp.aiter_bytes():
+        received += len(chunk)
+        parser.feed(chunk)
+        if collector.full:
+            logger.info(
+                "Collected enough text after %d bytes of %s", received, url
+            )
+            break
+        if received >= settings.scrape_max_bytes:
+            logger.warning(
+                "Job page exceeds %d bytes, stopped reading: %s",
+                settings.scrape_max_bytes,
+                url,
+            )
+            break
+
+    if not received:
+        return ""
+    parser.close()
+    return _truncate(pick_text(collector, extractor))
+
+
+def _conditional_headers(stale: CachedPage | None) -> dict[str, str]:
+    headers = {}
+    if stale is not None:
+        if stale.etag:
+            headers["If-None-Match"] = stale.etag
+        if stale.last_modified:
+            headers["If-Modified-Since"] = stale.last_modified
+    return headers
+
+
+def _to_page(resp: httpx.Response, text: str) -> CachedPage:
+    return CachedPage(
+        text=text,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+    )
+
+
+async def _load_from_api(
+    url: str, extractor: SiteExtractor, stale: CachedPage | None
+) -> CachedPage | None:
+    """Fetch the vacancy through the site's public API.
 
-    soup = BeautifulSoup(resp.text, "lxml")
+    Raises ``LookupError`` when the URL has no API counterpart or the API
+    is unavailable, so the caller can fall back to the HTML page.
+    """
+    api_url = extractor.api_url(url) if extractor.api_url else None
+    if api_url is None or extractor.from_api is None:
+        msg = f"No {extractor.name} API for {url}"
+        raise LookupError(msg)
 
-    for tag in soup.find_all(_STRIP_TAGS):
-        tag.decompose()
+    async with _acquire_client(api_url) as client:
+        try:
+            resp = await client.get(
+                api_url, headers=_conditional_headers(stale)
+            )
+        except httpx.HTTPError as exc:
+            msg = f"{extractor.name} API request failed: {exc}"
+            raise LookupError(msg) from exc
 
-    text = soup.get_text(separator="\n", strip=True)
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    result = _truncate("\n".join(lines))
+    if resp.status_code == httpx.codes.NOT_MODIFIED and stale:
+        return None
+    if resp.status_code != httpx.codes.OK:
+        msg = f"{extractor.name} API returned {resp.status_code}"
+        raise LookupError(msg)
+
+    try:
+        text = _truncate(extractor.from_api(resp.json()))
+    except (ValueError, TypeError) as exc:
+        # A captcha or HTML error page served with 200, or a payload of
+        # an unexpected shape.
+        msg = f"{extractor.name} API returned an unusable body: {exc}"
+        raise LookupError(msg) from exc
+    logger.info(
+        "Got %d chars from %s API for %s", len(text), extractor.name, url
+    )
+    return _to_page(resp, text)
+
+
+async def _load_page(url: str, stale: CachedPage | None) -> CachedPage | None:
+    extractor = find_extractor(url)
+    if extractor is not None and extractor.api_url is not None:
+        try:
+            return await _load_from_api(url, extractor, stale)
+        except LookupError as exc:
+            logger.info("Falling back to HTML page: %s", exc)
+
+    async with (
+        _acquire_client(url) as client,
+        client.stream("GET", url, headers=_conditional_headers(stale)) as resp,
+    ):
+        if resp.status_code == httpx.codes.NOT_MODIFIED and stale:
+            return None
+        resp.raise_for_status()
+        result = await _extract_text(resp, url, extractor)
 
     logger.info("Scraped %d chars from %s", len(result), url)
-    return result
+    return _to_page(resp, result)
+
+
+async def scrape_job(url: str) -> str:
+    logger.info("Scraping job page: %s", url)
+    return await scrape_cache.fetch(url, lambda stale: _load_page(url, stale))
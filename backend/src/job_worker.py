@@ -0,0 +1,160 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import threading
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+from pathlib import Path
+
+from src.config import settings
+from src.job_queue import ClaimedJob, JobStore
+from src.job_scraper import close_client, start_client
+from src.logging_config import setup_logging
+from src.parse_executor import parse_executor
+from src.service import GenerationError, generate_cover_letter
+
+logger = logging.getLogger(__name__)
+
+_SUPERVISE_INTERVAL = 1.0
+
+
+async def process_job(store: JobStore, claimed: ClaimedJob) -> None:
+    """Run one claimed job through the regular generation pipeline.
+
+    Server-side failures (5xx: LLM errors, a full queue) are retried;
+    client errors such as an unsupported file or a bad URL are final.
+    """
+    job = claimed.job
+    logger.info("Job %s started (attempt %d)", job.id, job.attempts)
+    try:
+        letter = await generate_cover_letter(
+            claimed.resume,
+            job.filename,
+            job_url=job.params.get("job_url"),
+            job_text=job.params.get("job_text"),
+            language=job.params.get("language", "ru"),
+            fresh=job.params.get("fresh", False),
+        )
+    except GenerationError as exc:
+        store.fail(
+            job.id,
+            str(exc),
+            exc.status_code,
+            retry=exc.status_code >= 500,
+        )
+    except Exception as exc:
+        logger.exception("Job %s crashed", job.id)
+        store.fail(job.id, str(exc), 500, retry=True)
+    else:
+        store.complete(job.id, letter)
+
+
+async def _work(store: JobStore, stop: Event) -> None:
+    await start_client()
+    # Parsing goes to a child process here too, so a file that crashes
+    # the parser takes down that process rather than the worker.
+    await parse_executor.start(workers=min(1, settings.parse_workers))
+    try:
+        parent = multiprocessing.parent_process()
+        while not stop.is_set():
+            if parent is not None and not parent.is_alive():
+                logger.warning("API process is gone, stopping job worker")
+                break
+            claimed = store.claim(lease=settings.job_lease)
+            if claimed is None:
+                await asyncio.sleep(settings.job_poll_interval)
+                continue
+            await process_job(store, claimed)
+    finally:
+        await parse_executor.shutdown()
+        await close_client()
+        store.close()
+
+
+def run_worker(db_path: Path, stop: Event) -> None:
+    setup_logging(settings.log_level)
+    asyncio.run(_work(JobStore(db_path), stop))
+
+
+class JobWorkers:
+    """Worker processes consuming the job queue.
+
+    Workers are spawned rather than forked so they start with a clean
+    interpreter, just like the parse pool. A supervisor thread replaces
+    workers that exit unexpectedly (a crash, the OOM killer); the job
+    they were running is picked up again once its lease expires.
+    """
+
+    def __init__(self) -> None:
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._processes: list[BaseProcess] = []
+        self._db_path = settings.job_queue_path
+        self._supervisor: threading.Thread | None = None
+        self.restarts = 0
+
+    @property
+    def alive(self) -> int:
+        return sum(p.is_alive() for p in self._processes)
+
+    def start(
+        self,
+        workers: int = settings.job_workers,
+        db_path: Path = settings.job_queue_path,
+    ) -> None:
+        if self._processes or workers <= 0:
+            return
+        self._stop.clear()
+        self._db_path = db_path
+        self._processes = [self._spawn(index) for index in range(workers)]
+        self._supervisor = threading.Thread(
+            target=self._supervise, name="job-supervisor", daemon=True
+        )
+        self._supervisor.start()
+        # Interpreter exit joins non-daemon children; stop them first.
+        atexit.register(self.shutdown)
+        logger.info("Started %d job workers", workers)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        if not self._processes:
+            return
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        atexit.unregister(self.shutdown)
+        logger.info("Job workers stopped")
+
+    def _spawn(self, index: int) -> BaseProcess:
+        process = self._context.Process(
+            target=run_worker,
+            args=(self._db_path, self._stop),
+            name=f"job-worker-{index}",
+            # Not a daemon: workers start their own parse pool. They
+            # stop by themselves if the API process dies.
+            daemon=False,
+        )
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        while not self._stop.wait(_SUPERVISE_INTERVAL):
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                logger.warning(
+                    "Job worker %s exited with code %s, restarting",
+                    process.name,
+                    process.exitcode,
+                )
+                self._processes[index] = self._spawn(index)
+                self.restarts += 1
+
+
+job_workers = JobWorkers()
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from src.config import settings
+from src.metrics import (
+    LLM_INFLIGHT,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_REJECTIONS,
+    LLM_QUEUE_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBusyError(Exception):
+    """Raised when the LLM queue is full or a request waited too long."""
+
+
+class Ticket:
+    """A place in the ``LLMLimiter`` queue, later a running LLM call.
+
+    ``wait`` blocks until the call may start; ``release`` must always be
+    called afterwards (granted or not), typically from ``finally``.
+    """
+
+    def __init__(self, limiter: "LLMLimiter", tokens: int) -> None:
+        self.tokens = tokens
+        # Drawn from the token bucket: capped at its size, 0 until granted.
+        self.charged = 0.0
+        self._limiter = limiter
+        self._enqueued_at = time.monotonic()
+        self._deadline = self._enqueued_at + limiter.max_wait
+        self._granted = asyncio.Event()
+        self._released = False
+
+    @property
+    def granted(self) -> bool:
+        return self._granted.is_set()
+
+    @property
+    def position(self) -> int:
+        """1-based place in the queue, 0 once granted."""
+        return self._limiter.position(self)
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Wait up to ``timeout`` seconds; return whether the call may start.
+
+        Raises ``LLMBusyError`` once the limiter's ``max_wait`` is spent.
+        """
+        if self.granted:
+            return True
+        remaining = self._deadline - time.monotonic()
+        if timeout is not None:
+            remaining = min(remaining, timeout)
+        try:
+            await asyncio.wait_for(self._granted.wait(), max(remaining, 0))
+        except TimeoutError:
+            if time.monotonic() >= self._deadline and not self.granted:
+                self._limiter.reject(self, "timeout")
+                msg = "Too many generation requests, try again later."
+                raise LLMBusyError(msg) from None
+        return self.granted
+
+    def settle(self, used_tokens: int) -> None:
+        """Correct the reserved estimate with the provider-reported usage.
+
+        The refund is relative to what was actually drawn from the bucket,
+        so a prompt larger than the bucket never gets back more than it
+        paid.
+        """
+        used = self._limiter.cost(used_tokens)
+        self._limiter.refund(self.charged - used)
+        self.charged = used
+        self.tokens = used_tokens
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._limiter.done(self)
+
+    def grant(self) -> None:
+        LLM_QUEUE_WAIT.observe(time.monotonic() - self._enqueued_at)
+        self._granted.set()
+
+
+class LLMLimiter:
+    """Admission control for LLM calls.
+
+    At most ``max_inflight`` calls run at once and, when
+    ``tokens_per_minute`` is set, their estimated tokens are drawn from a
+    bucket refilled at that rate. Everything else waits in a FIFO queue of
+    ``queue_size`` tickets: only the head may start, so large prompts are
+    not starved by small ones. Full queue or ``max_wait`` exceeded means
+    ``LLMBusyError``.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        tokens_per_minute: int,
+        queue_size: int,
+        max_wait: float,
+    ) -> None:
+        self.max_inflight = max_inflight
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._inflight = 0
+        self._waiting: deque[Ticket] = deque()
+        self._budget = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def full(self) -> bool:
+        """Whether a new request would be refused right now."""
+        blocked = bool(self._waiting) or self._inflight >= self.max_inflight
+        return blocked and len(self._waiting) >= self.queue_size
+
+    def enqueue(self, tokens: int) -> Ticket:
+        ticket = Ticket(self, tokens)
+        self._waiting.append(ticket)
+        self._dispatch()
+        if not ticket.granted and len(self._waiting) > self.queue_size:
+            self.reject(ticket, "queue_full")
+            msg = "Too many generation requests, try again later."
+            raise LLMBusyError(msg)
+        if not ticket.granted:
+            logger.info(
+                "LLM request queued at position %d (%d in flight)",
+                ticket.position,
+                self._inflight,
+            )
+        self._update_gauges()
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        if ticket.granted:
+            return 0
+        try:
+            return self._waiting.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def reject(self, ticket: Ticket, reason: str) -> None:
+        LLM_QUEUE_REJECTIONS.labels(reason=reason).inc()
+        logger.warning("LLM request rejected (%s)", reason)
+        self._discard(ticket)
+        ticket.release()
+
+    def refund(self, tokens: float) -> None:
+        if not self.tokens_per_minute:
+            return
+        self._refill()
+        self._budget = min(
+            self._budget + tokens, float(self.tokens_per_minute)
+        )
+        self._dispatch()
+
+    def done(self, ticket: Ticket) -> None:
+        if ticket.granted:
+            self._inflight -= 1
+        else:
+            self._discard(ticket)
+        self._dispatch()
+        self._update_gauges()
+
+    def _discard(self, ticket: Ticket) -> None:
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60
+        self._budget = min(
+            self._budget + (now - self._refilled_at) * rate,
+            float(self.tokens_per_minute),
+        )
+        self._refilled_at = now
+
+    def cost(self, tokens: int) -> float:
+        """What ``tokens`` draw from the bucket.
+
+        Capped at the bucket size: a prompt larger than the whole bucket
+        would otherwise never fit.
+        """
+        return float(min(tokens, self.tokens_per_minute))
+
+    def _dispatch(self) -> None:
+        if self.tokens_per_minute:
+            self._refill()
+        while self._waiting and self._inflight < self.max_inflight:
+            head = self._waiting[0]
+            if self.tokens_per_minute:
+                cost = self.cost(head.tokens)
+                if self._budget < cost:
+                    self._schedule(cost - self._budget)
+                    break
+                self._budget -= cost
+                head.charged = cost
+            self._waiting.popleft()
+            self._inflight += 1
+            head.grant()
+        self._update_gauges()
+
+    def _schedule(self, deficit: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = deficit / (self.tokens_per_minute / 60)
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _update_gauges(self) -> None:
+        LLM_QUEUE_DEPTH.set(len(self._waiting))
+        LLM_INFLIGHT.set(self._inflight)
+
+
+llm_limiter = LLMLimiter(
+    max_inflight=settings.llm_max_inflight,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    queue_size=settings.llm_queue_size,
+    max_wait=settings.llm_queue_timeout,
+)
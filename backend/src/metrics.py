@@ -0,0 +1,131 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+RESUME_CACHE_HITS = Counter(
+    "resume_cache_hits",
+    "Parsed resume lookups served from cache",
+    ["tier"],
+)
+RESUME_CACHE_MISSES = Counter(
+    "resume_cache_misses",
+    "Parsed resume lookups that required parsing",
+)
+SCRAPE_CACHE_REQUESTS = Counter(
+    "scrape_cache_requests",
+    "Job page lookups by cache status",
+    ["status"],
+)
+GENERATION_CACHE_REQUESTS = Counter(
+    "generation_cache_requests",
+    "Generated letter lookups in the exact-match cache",
+    ["result"],
+)
+LLM_INPUT_TOKENS = Counter(
+    "llm_input_tokens",
+    "Prompt tokens sent to the LLM",
+)
+LLM_CACHED_INPUT_TOKENS = Counter(
+    "llm_cached_input_tokens",
+    "Prompt tokens served from the provider prompt cache",
+)
+LLM_OUTPUT_TOKENS = Counter(
+    "llm_output_tokens",
+    "Completion tokens generated by the LLM",
+)
+LLM_CANCELLED_REQUESTS = Counter(
+    "llm_cancelled_requests",
+    "Streaming LLM calls stopped because the client went away",
+)
+LLM_CANCELLED_TOKENS = Counter(
+    "llm_cancelled_tokens",
+    "Estimated tokens spent on LLM calls that were cancelled",
+    ["kind"],
+)
+PROMPT_CACHE_HIT_RATIO = Gauge(
+    "llm_prompt_cache_hit_ratio",
+    "Share of all prompt tokens so far that were cache reads",
+)
+LLM_INFLIGHT = Gauge(
+    "llm_inflight_requests",
+    "LLM calls currently running",
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth",
+    "LLM calls waiting for admission",
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time an LLM call waited for admission",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_QUEUE_REJECTIONS = Counter(
+    "llm_queue_rejections",
+    "LLM calls refused by the admission controller",
+    ["reason"],
+)
+LLM_ENDPOINT_REQUESTS = Counter(
+    "llm_endpoint_requests",
+    "LLM calls per endpoint by outcome",
+    ["endpoint", "outcome"],
+)
+LLM_BREAKER_STATE = Gauge(
+    "llm_breaker_state",
+    "Circuit breaker state per LLM endpoint: 0 closed, 1 half-open, 2 open",
+    ["endpoint"],
+)
+LLM_BREAKER_TRANSITIONS = Counter(
+    "llm_breaker_transitions",
+    "Circuit breaker state changes per LLM endpoint",
+    ["endpoint", "state"],
+)
+LLM_HEDGES = Counter(
+    "llm_hedges",
+    "Duplicate LLM streams launched for a late first token, by outcome",
+    ["outcome"],
+)
+LLM_HEDGE_RATE = Gauge(
+    "llm_hedge_rate",
+    "Share of streamed LLM calls that were hedged",
+)
+LLM_HEDGE_DELAY = Gauge(
+    "llm_hedge_delay_seconds",
+    "Current first-token delay after which a stream is hedged",
+)
+GENERATION_STAGE_SECONDS = Histogram(
+    "generation_stage_seconds",
+    "Duration of each cover letter pipeline stage",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from request start to the first streamed token",
+    buckets=(0.25, 0.5, 1, 1.5, 2, 3, 5, 10, 30),
+)
+LLM_OUTPUT_TOKENS_PER_SECOND = Histogram(
+    "llm_output_tokens_per_second",
+    "Streaming generation speed after the first token",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+
+_prompt_totals = {"input": 0, "cached": 0}
+
+
+def record_cancelled_usage(input_tokens: int, output_tokens: int) -> None:
+    LLM_CANCELLED_REQUESTS.inc()
+    LLM_CANCELLED_TOKENS.labels(kind="input").inc(input_tokens)
+    LLM_CANCELLED_TOKENS.labels(kind="output").inc(output_tokens)
+
+
+def record_token_usage(
+    input_tokens: int, cached_tokens: int, output_tokens: int
+) -> None:
+    LLM_INPUT_TOKENS.inc(input_tokens)
+    LLM_CACHED_INPUT_TOKENS.inc(cached_tokens)
+    LLM_OUTPUT_TOKENS.inc(output_tokens)
+
+    _prompt_totals["input"] += input_tokens
+    _prompt_totals["cached"] += cached_tokens
+    if _prompt_totals["input"]:
+        PROMPT_CACHE_HIT_RATIO.set(
+            _prompt_totals["cached"] / _prompt_totals["input"]
+        )
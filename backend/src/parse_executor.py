@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, ParamSpec, TypeVar
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+class ParserBusyError(Exception):
+    """Raised when the parse pool has no free worker or queue slot."""
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a single parse exceeds the configured timeout."""
+
+
+class ParseCrashedError(Exception):
+    """Raised when the worker process died while parsing (e.g. a segfault)."""
+
+
+def _warmup() -> None:
+    import src.resume_parser  # noqa: F401
+
+
+class ParseExecutor:
+    """Bounded process pool for CPU-heavy resume parsing.
+
+    A task is handed to the pool only when a worker is free, so the
+    timeout covers the parse itself, not the wait in the queue. A task
+    that timed out may never finish (a pathological PDF), so its worker
+    is killed: the pool is swapped for a fresh one, and the other tasks
+    that were running in the old one fail as busy (503).
+
+    Until ``start`` is called (e.g. in tests that never run the app
+    lifespan) work is delegated to a thread so the event loop is still
+    never blocked.
+    """
+
+    def __init__(self) -> None:
+        self._pool: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._workers = 0
+        self._pending = 0
+        self._running: dict[Future[Any], ProcessPoolExecutor] = {}
+        self._capacity = 0
+        self._killed: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+
+    @property
+    def pending(self) -> int:
+        """Tasks queued or still running in a worker."""
+        return self._pending
+
+    @property
+    def idle(self) -> int:
+        """Pool workers not busy with a task right now."""
+        if self._pool is None:
+            return 0
+        return max(0, self._workers - len(self._running))
+
+    @property
+    def saturated(self) -> bool:
+        return self._pool is not None and self._pending >= self._capacity
+
+    async def start(
+        self,
+        workers: int = settings.parse_workers,
+        queue_size: int = settings.parse_queue_size,
+    ) -> None:
+        if self._pool is not None or workers <= 0:
+            return
+
+        self._workers = workers
+        self._capacity = workers + queue_size
+        self._slots = asyncio.Semaphore(workers)
+        self._loop = asyncio.get_running_loop()
+        self._pool = self._new_pool()
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._pool, _warmup)
+                for _ in range(workers)
+            )
+        )
+        logger.info(
+            "Parse pool started (workers=%d, queue=%d)",
+            workers,
+            queue_size,
+        )
+
+    async def shutdown(self) -> None:
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        self._killed.add(pool)
+        # Running parses are not waited for: one may never finish.
+        await asyncio.to_thread(self._kill, pool)
+        logger.info("Parse pool stopped")
+
+    async def run(
+        self,
+        fn: Callable[_P, _T],
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> _T:
+        if self._pool is None:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+        if self.saturated:
+            logger.warning("Parse pool saturated (%d pending)", self._pending)
+            msg = "Resume parser is busy, try again later."
+            raise ParserBusyError(msg)
+
+        assert self._slots is not None
+        self._pending += 1
+        submitted = False
+        try:
+            try:
+                await asyncio.wait_for(
+                    self._slots.acquire(), timeout=settings.parse_timeout
+                )
+            except TimeoutError as exc:
+                logger.warning(
+                    "No parse worker freed up in %gs", settings.parse_timeout
+                )
+                msg = "Resume parser is busy, try again later."
+                raise ParserBusyError(msg) from exc
+
+            try:
+                pool, future = self._submit(
+                    functools.partial(fn, *args, **kwargs)
+                )
+            except BaseException:
+                self._slots.release()
+                raise
+            submitted = True
+            self._running[future] = pool
+            future.add_done_callback(self._finished)
+
+            try:
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(future), timeout=settings.parse_timeout
+                )
+            except TimeoutError as exc:
+                self._recycle(pool)
+                msg = (
+                    "Resume parsing timed out after "
+                    f"{settings.parse_timeout:g}s."
+                )
+                raise ParseTimeoutError(msg) from exc
+            except BrokenProcessPool as exc:
+                if pool in self._killed:
+                    msg = "Resume parser is busy, try again later."
+                    raise ParserBusyError(msg) from exc
+                self._replace_broken(pool)
+                msg = "Resume parser crashed on this file."
+                raise ParseCrashedError(msg) from exc
+        finally:
+            if not submitted:
+                self._pending -= 1
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _submit(
+        self, task: Callable[[], _T]
+    ) -> tuple[ProcessPoolExecutor, Future[_T]]:
+        assert self._pool is not None
+        pool = self._pool
+        try:
+            return pool, pool.submit(task)
+        except BrokenProcessPool:
+            self._replace_broken(pool)
+            assert self._pool is not None
+            return self._pool, self._pool.submit(task)
+
+    def _replace_broken(self, pool: ProcessPoolExecutor) -> None:
+        """Swap in a fresh pool after a worker process died.
+
+        A dead worker breaks the whole ``ProcessPoolExecutor``; the other
+        tasks running in it fail too, and the next ones get a new pool.
+        """
+        if self._pool is not pool:
+            return
+        logger.error("Parse worker died, restarting the parse pool")
+        self._pool = self._new_pool()
+        pool.shutdown(wait=False)
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """Kill the workers of ``pool`` after a parse timed out in it.
+
+        ``ProcessPoolExecutor`` cannot stop a single task, so the whole
+        pool is replaced and the slots of the tasks running in it are
+        freed at once.
+        """
+        if self._pool is not pool:
+            return
+        logger.error("Parse timed out, restarting the parse pool")
+        self._pool = self._new_pool()
+        self._killed.add(pool)
+        self._kill(pool)
+        for future, owner in list(self._running.items()):
+            if owner is pool:
+                self._release(future)
+
+    @staticmethod
+    def _kill(pool: ProcessPoolExecutor) -> None:
+        processes = list((pool._processes or {}).values())  # noqa: SLF001
+        for process in processes:
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.join()
+
+    def _finished(self, future: Future[Any]) -> None:
+        # Called from the pool's thread once the worker is really free.
+        assert self._loop is not None
+        try:
+            self._loop.call_soon_threadsafe(self._release, future)
+        except RuntimeError:
+            pass  # the loop is already closed
+
+    def _release(self, future: Future[Any]) -> None:
+        # A killed pool's slots are released at once; its futures still
+        # complete later and must not release them twice.
+        if self._running.pop(future, None) is None:
+            return
+        assert self._slots is not None
+        self._pending -= 1
+        self._slots.release()
+
+
+parse_executor = ParseExecutor()
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path, PurePath
+
+from src.config import settings
+from src.metrics import RESUME_CACHE_HITS, RESUME_CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+
+def resume_key(data: bytes, filename: str) -> str:
+    return digest_key(hashlib.sha256(data).hexdigest(), filename)
+
+
+def digest_key(sha256: str, filename: str) -> str:
+    """``resume_key`` for content whose SHA-256 is already known."""
+    ext = PurePath(filename).suffix.lower()
+    return f"{sha256}{ext}"
+
+
+class ResumeCache:
+    """Two-tier cache of parsed resume text keyed by content hash.
+
+    The memory tier is an LRU bounded by the UTF-8 size of the cached
+    text. The optional SQLite tier is unbounded and survives restarts;
+    disk hits are promoted back into memory.
+    """
+
+    def __init__(self, max_bytes: int, db_path: Path | None = None) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS resumes "
+                "(key TEXT PRIMARY KEY, text TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self._load(key) is not None
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                RESUME_CACHE_HITS.labels(tier="memory").inc()
+                return text
+
+        text = self._load(key)
+        if text is None:
+            RESUME_CACHE_MISSES.inc()
+            return None
+
+        RESUME_CACHE_HITS.labels(tier="disk").inc()
+        self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._remember(key, text)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO resumes (key, text) VALUES (?, ?)",
+                    (key, text),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM resumes")
+                self._db.commit()
+
+    def _load(self, key: str) -> str | None:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text FROM resumes WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def _remember(self, key: str, text: str) -> None:
+        cost = len(text.encode())
+        if cost > self._max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.encode())
+
+            self._entries[key] = text
+            self._size += cost
+
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode())
+
+
+resume_cache = ResumeCache(
+    settings.resume_cache_max_bytes, settings.resume_cache_path
+)
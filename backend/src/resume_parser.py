@@ -1,39 +1,213 @@
+import contextlib
 import io
 import logging
-from collections.abc import Callable
-from pathlib import PurePath
+import mmap
+import zipfile
+from collections.abc import Callable, Iterator
+from pathlib import Path, PurePath
+from typing import Any
 
-import docx
 import pymupdf
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
 
-def _parse_pdf(data: bytes) -> str:
-    with pymupdf.open(stream=data, filetype="pdf") as doc:  # type: ignore[no-untyped-call]
-        pages: list[str] = [page.get_text() for page in doc]
-        return "\n".join(pages).strip()
+@contextlib.contextmanager
+def _open_pdf(data: bytes | Path) -> Iterator[Any]:
+    """Open a PDF from bytes or from a memory-mapped file.
 
+    A path is mapped rather than read, so MuPDF works on the page cache
+    directly and no ``bytes`` copy of the document is made.
+    """
+    if not isinstance(data, Path):
+        with pymupdf.open(stream=data, filetype="pdf") as doc:  # type: ignore[no-untyped-call]
+            yield doc
+        return
 
-def _parse_docx(data: bytes) -> str:
-    doc = docx.Document(io.BytesIO(data))
-    return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+    with (
+        data.open("rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        view = memoryview(mapped)
+        try:
+            with pymupdf.open(stream=view, filetype="pdf") as doc:  # type: ignore[no-untyped-call]
+                yield doc
+        finally:
+            view.release()
 
 
-_PARSERS: dict[str, Callable[[bytes], str]] = {
+def pdf_stats(data: bytes | Path) -> tuple[int, int]:
+    """Page count and the text length of the first page."""
+    with _open_pdf(data) as doc:
+        if not doc.page_count:
+            return 0, 0
+        return int(doc.page_count), len(doc[0].get_text())
+
+
+def extract_pdf_pages(
+    data: bytes | Path,
+    start: int = 0,
+    stop: int | None = None,
+    max_chars: int = 0,
+) -> str:
+    """Text of pages ``[start, stop)``, joined with newlines.
+
+    With ``max_chars`` set, pages stop being read once that much text has
+    been collected; the page that crosses the limit is kept whole.
+    """
+    parts: list[str] = []
+    size = 0
+    with _open_pdf(data) as doc:
+        end = doc.page_count if stop is None else min(stop, doc.page_count)
+        for number in range(start, end):
+            text = doc[number].get_text()
+            parts.append(text)
+            size += len(text) + 1
+            if max_chars and size >= max_chars:
+                break
+    return "\n".join(parts)
+
+
+def _parse_pdf(data: bytes | Path, max_chars: int) -> str:
+    return extract_pdf_pages(data, max_chars=max_chars).strip()
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_BODY = "word/document.xml"
+_DOCX_CHUNK_BYTES = 64 * 1024
+# Run-level elements python-docx renders as text, besides ``w:t``.
+_RUN_TEXT = {
+    f"{_W}tab": "\t",
+    f"{_W}ptab": "\t",
+    f"{_W}cr": "\n",
+    f"{_W}noBreakHyphen": "-",
+}
+
+
+class DocxCollector:
+    """lxml parser target that collects the text of ``word/document.xml``.
+
+    Paragraphs become one line each, like python-docx's
+    ``Paragraph.text`` with empty paragraphs skipped. A table row becomes
+    one line with its cells joined by `` | ``; nested tables are folded
+    into the cell that holds them. Once ``max_chars`` of text has been
+    collected, later lines are dropped and ``full`` tells the caller it
+    can stop feeding the parser.
+    """
+
+    def __init__(self, max_chars: int = 0) -> None:
+        self.lines: list[str] = []
+        self.chars = 0
+        self._max_chars = max_chars
+        self._paragraphs: list[list[str]] = []
+        self._runs = 0
+        self._in_text = False
+        self._tables = 0
+        self._row: list[str] = []
+        self._cell: list[str] = []
+
+    @property
+    def full(self) -> bool:
+        return bool(self._max_chars) and self.chars >= self._max_chars
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        if tag == f"{_W}p":
+            self._paragraphs.append([])
+        elif tag == f"{_W}r":
+            self._runs += 1
+        elif tag == f"{_W}t":
+            self._in_text = True
+        elif tag == f"{_W}tbl":
+            self._tables += 1
+        elif self._tables == 1 and tag == f"{_W}tr":
+            self._row = []
+        elif self._tables == 1 and tag == f"{_W}tc":
+            self._cell = []
+        elif self._runs and self._paragraphs:
+            self._run_element(tag, attrib)
+
+    def end(self, tag: str) -> None:
+        if tag == f"{_W}p":
+            text = "".join(self._paragraphs.pop())
+            if not text.strip():
+                return
+            if self._tables:
+                self._cell.append(text.strip())
+            else:
+                self._add_line(text)
+        elif tag == f"{_W}r":
+            self._runs -= 1
+        elif tag == f"{_W}t":
+            self._in_text = False
+        elif tag == f"{_W}tbl":
+            self._tables -= 1
+        elif self._tables == 1 and tag == f"{_W}tc":
+            self._row.append(" ".join(self._cell))
+        elif self._tables == 1 and tag == f"{_W}tr":
+            line = " | ".join(cell for cell in self._row if cell)
+            if line:
+                self._add_line(line)
+
+    def data(self, text: str) -> None:
+        if self._in_text and self._paragraphs:
+            self._paragraphs[-1].append(text)
+
+    def close(self) -> str:
+        return "\n".join(self.lines)
+
+    def _run_element(self, tag: str, attrib: dict[str, str]) -> None:
+        if tag == f"{_W}br":
+            # Page and column breaks carry no text, as in python-docx.
+            if attrib.get(f"{_W}type", "textWrapping") == "textWrapping":
+                self._paragraphs[-1].append("\n")
+        elif tag in _RUN_TEXT:
+            self._paragraphs[-1].append(_RUN_TEXT[tag])
+
+    def _add_line(self, line: str) -> None:
+        if self.full:
+            return
+        self.lines.append(line)
+        self.chars += len(line) + 1
+
+
+def _parse_docx(data: bytes | Path, max_chars: int) -> str:
+    """Stream ``word/document.xml`` out of the archive into a collector.
+
+    Unlike ``docx.Document`` this never builds an object model, and it
+    keeps the text of tables, where resumes often list their skills.
+    """
+    collector = DocxCollector(max_chars)
+    parser = etree.XMLParser(
+        target=collector, resolve_entities=False, no_network=True
+    )
+    source = data if isinstance(data, Path) else io.BytesIO(data)
+    with zipfile.ZipFile(source) as archive, archive.open(_DOCX_BODY) as xml:
+        while chunk := xml.read(_DOCX_CHUNK_BYTES):
+            parser.feed(chunk)
+            if collector.full:
+                break
+    return collector.close()
+
+
+_PARSERS: dict[str, Callable[[bytes | Path, int], str]] = {
     ".pdf": _parse_pdf,
     ".docx": _parse_docx,
 }
 
 
-def parse_resume(data: bytes, filename: str) -> str:
-    ext = PurePath(filename).suffix.lower()
-
-    parser = _PARSERS.get(ext)
-    if parser is None:
+def check_format(filename: str) -> None:
+    """Raise ``ValueError`` if there is no parser for ``filename``."""
+    if PurePath(filename).suffix.lower() not in _PARSERS:
         supported = ", ".join(_PARSERS)
         msg = f"Unsupported file format: {filename}. Use {supported}."
         raise ValueError(msg)
 
+
+def parse_resume(data: bytes | Path, filename: str, max_chars: int = 0) -> str:
+    check_format(filename)
+    ext = PurePath(filename).suffix.lower()
+    parser = _PARSERS[ext]
+
     logger.info("Parsing resume '%s' (%s)", filename, ext)
-    return parser(data)
+    return parser(data, max_chars)
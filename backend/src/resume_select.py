@@ -0,0 +1,288 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from src.config import settings
+from src.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_HEADING_MAX_CHARS = 60
+_SECTION_HEADING = re.compile(
+    r"^(опыт( работы)?|профессиональный опыт|навыки|ключевые навыки|"
+    r"образование|проекты|достижения|сертификаты|курсы|языки|о себе|"
+    r"контакты|experience|work experience|employment|skills|"
+    r"technical skills|education|projects|achievements|certifications|"
+    r"languages|summary|profile|contacts?)\s*:?$",
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r"^\s*(?:[-•*▪●◦–—]|\d{1,2}[.)])\s+")
+# A phone starts with "+" or has at least 10 digits; "2018 - 2021" and
+# other runs of years are date ranges, not phones.
+_CONTACT = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+|"
+    r"\+\d[\d\s()-]{8,}\d|"
+    r"(?<![\w+])(?!(?:19|20)\d\d\b[\s()-]*(?:19|20)\d\d\b)"
+    r"\d(?:[\s()-]*\d){9,}|"
+    r"t\.me/|telegram|телеграм|"
+    r"linkedin\.com|github\.com|"
+    r"(?:^|\s)@\w{4,}",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"\w+")
+# Crude stemming: Russian inflects heavily ("разработка", "разработки",
+# "разработал"), so words are compared by their first letters.
+_STEM_CHARS = 6
+
+
+def terms(text: str) -> list[str]:
+    """Lower-cased, prefix-stemmed word tokens for BM25."""
+    return [
+        word[:_STEM_CHARS]
+        for word in _WORD.findall(text.lower())
+        if len(word) > 1 or word.isdigit()
+    ]
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A bullet or paragraph of one resume section.
+
+    ``parent`` is the index of the entry line (company, role, dates) a
+    bullet belongs to, so a selected bullet keeps its context.
+    """
+
+    section: int
+    lines: tuple[str, ...]
+    bullet: bool
+    parent: int | None = None
+
+
+@dataclass(frozen=True)
+class ResumeDocument:
+    header: tuple[str, ...]
+    headings: tuple[str, ...]
+    segments: tuple[Segment, ...]
+    contacts: tuple[str, ...]
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > _HEADING_MAX_CHARS or _BULLET.match(line):
+        return False
+    return line.endswith(":") or bool(_SECTION_HEADING.match(line))
+
+
+def segment(text: str) -> ResumeDocument:
+    """Split resume text into a header, sections and their segments.
+
+    Everything before the first section heading is the header (name,
+    title, contacts). Inside a section a segment starts at every bullet,
+    after a blank line, and at a capitalised line following a bullet;
+    lower-case lines continue the bullet they were wrapped from.
+    """
+    header: list[str] = []
+    headings: list[str] = []
+    segments: list[Segment] = []
+    contacts: list[str] = []
+    current: list[str] = []
+    bullet = False
+    parent: int | None = None
+
+    def flush() -> None:
+        nonlocal current, parent
+        if not current:
+            return
+        segments.append(
+            Segment(
+                len(headings) - 1,
+                tuple(current),
+                bullet,
+                parent if bullet else None,
+            )
+        )
+        if not bullet:
+            parent = len(segments) - 1
+        current = []
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            flush()
+            continue
+        if _is_heading(line):
+            flush()
+            headings.append(line)
+            parent = None
+            continue
+        if not headings:
+            header.append(line)
+            continue
+        if _CONTACT.search(line):
+            contacts.append(line)
+        starts_bullet = bool(_BULLET.match(line))
+        if current and (starts_bullet or (bullet and not line[0].islower())):
+            flush()
+        if not current:
+            bullet = starts_bullet
+        current.append(line)
+    flush()
+
+    return ResumeDocument(
+        tuple(header), tuple(headings), tuple(segments), tuple(contacts)
+    )
+
+
+class Bm25Index:
+    """Okapi BM25 over pre-tokenised documents."""
+
+    def __init__(
+        self, documents: Iterable[list[str]], k1: float = 1.5, b: float = 0.75
+    ) -> None:
+        self._k1 = k1
+        self._b = b
+        self._frequencies = [Counter(document) for document in documents]
+        self._lengths = [sum(tf.values()) for tf in self._frequencies]
+        count = len(self._frequencies)
+        self._average = sum(self._lengths) / count if count else 0.0
+        self._average = self._average or 1.0
+        document_frequency = Counter(
+            term for tf in self._frequencies for term in tf
+        )
+        self._idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._frequencies)
+
+    def scores(self, query: Iterable[str]) -> list[float]:
+        query_terms = {term for term in query if term in self._idf}
+        result = []
+        for tf, length in zip(self._frequencies, self._lengths, strict=True):
+            norm = self._k1 * (1 - self._b + self._b * length / self._average)
+            result.append(
+                sum(
+                    self._idf[term]
+                    * tf[term]
+                    * (self._k1 + 1)
+                    / (tf[term] + norm)
+                    for term in query_terms
+                    if term in tf
+                )
+            )
+        return result
+
+
+@dataclass(frozen=True)
+class ResumeIndex:
+    document: ResumeDocument
+    index: Bm25Index
+
+
+def build_index(text: str) -> ResumeIndex:
+    document = segment(text)
+    index = Bm25Index(terms(" ".join(s.lines)) for s in document.segments)
+    return ResumeIndex(document, index)
+
+
+class ResumeIndexCache:
+    """LRU of built indexes keyed by the SHA-256 of the resume text.
+
+    A candidate applying to many vacancies segments and indexes the
+    resume once; every vacancy only scores against it.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, ResumeIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, text: str) -> ResumeIndex:
+        key = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        built = build_index(text)
+        with self._lock:
+            self._entries[key] = built
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return built
+
+
+resume_indexes = ResumeIndexCache(settings.resume_select_cache_entries)
+
+
+def _render(index: ResumeIndex, chosen: set[int]) -> str:
+    document = index.document
+    lines = list(document.header)
+    contacts = [line for line in document.contacts if line not in lines]
+    lines += contacts
+    section = -1
+    for number, item in enumerate(document.segments):
+        if number not in chosen:
+            continue
+        if item.section != section:
+            section = item.section
+            if section >= 0:
+                lines += ["", document.headings[section]]
+        lines += [line for line in item.lines if line not in contacts]
+    return "\n".join(lines)
+
+
+def select_resume(
+    resume_text: str, job_description: str, top_k: int | None = None
+) -> str:
+    """Keep the header, contacts and the segments most relevant to the job.
+
+    Segments are ranked by BM25 against the job description and the
+    ``top_k`` best are kept in their original order, with their section
+    headings and the entry lines their bullets belong to. Short resumes
+    (under ``resume_select_min_tokens``), and resumes with nothing in
+    common with the vacancy, are returned unchanged.
+    """
+    top_k = settings.resume_select_top_k if top_k is None else top_k
+    if top_k <= 0:
+        return resume_text
+    if count_tokens(resume_text) < settings.resume_select_min_tokens:
+        return resume_text
+
+    index = resume_indexes.get(resume_text)
+    if len(index.index) <= top_k:
+        return resume_text
+    scores = index.index.scores(terms(job_description))
+    ranked = sorted(
+        (number for number, score in enumerate(scores) if score > 0),
+        key=lambda number: -scores[number],
+    )[:top_k]
+    if not ranked:
+        return resume_text
+
+    chosen = set(ranked)
+    segments = index.document.segments
+    chosen |= {
+        parent
+        for number in ranked
+        if (parent := segments[number].parent) is not None
+    }
+    selected = _render(index, chosen)
+    logger.info(
+        "Selected %d of %d resume segments", len(ranked), len(segments)
+    )
+    return selected
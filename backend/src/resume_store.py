@@ -0,0 +1,68 @@
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.config import settings
+
+
+@dataclass(frozen=True)
+class StoredResume:
+    """A parsed resume uploaded once through ``POST /api/resumes``."""
+
+    id: str
+    filename: str
+    text: str
+
+
+class ResumeStore:
+    """Parsed resumes by ``resume_id`` with a sliding TTL and LRU bound.
+
+    Every ``get`` renews the entry, so a resume stays available while
+    the user keeps generating letters with it.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, StoredResume]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def add(self, filename: str, text: str) -> StoredResume:
+        self._purge()
+        resume = StoredResume(secrets.token_urlsafe(16), filename, text)
+        self._entries[resume.id] = (time.monotonic(), resume)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return resume
+
+    def get(self, resume_id: str) -> StoredResume | None:
+        entry = self._entries.get(resume_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._entries[resume_id]
+            return None
+        self._entries[resume_id] = (time.monotonic(), entry[1])
+        self._entries.move_to_end(resume_id)
+        return entry[1]
+
+    def _purge(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        while self._entries:
+            stored_at, _ = next(iter(self._entries.values()))
+            if stored_at > deadline:
+                break
+            self._entries.popitem(last=False)
+
+
+resume_store = ResumeStore(
+    settings.resume_store_ttl, settings.resume_store_max_entries
+)
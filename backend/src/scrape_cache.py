@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field, replace
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config import settings
+from src.metrics import SCRAPE_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_TRACKING_PREFIXES = ("utm_", "yclid", "gclid", "fbclid", "_openstat")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    text: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode())
+
+
+PageLoader = Callable[[CachedPage | None], Awaitable[CachedPage | None]]
+
+
+class ScrapeCache:
+    """TTL cache of scraped job text with single-flight loading.
+
+    Expired entries are kept (subject to the LRU byte bound) so they can
+    be revalidated with ``If-None-Match`` / ``If-Modified-Since``: the
+    loader receives the stale page and returns ``None`` on 304.
+    Concurrent lookups of the same URL share one in-flight load.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int) -> None:
+        self.ttl = ttl
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, CachedPage] = OrderedDict()
+        self._size = 0
+        self._inflight: dict[str, asyncio.Task[CachedPage]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    async def fetch(self, url: str, load: PageLoader) -> str:
+        key = normalize_url(url)
+
+        entry = self._entries.get(key)
+        if entry is not None and not self._expired(entry):
+            self._entries.move_to_end(key)
+            self._record("hit", url)
+            return entry.text
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._record("coalesced", url)
+        else:
+            task = asyncio.create_task(self._load(key, url, entry, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        page = await asyncio.shield(task)
+        return page.text
+
+    async def _load(
+        self,
+        key: str,
+        url: str,
+        stale: CachedPage | None,
+        load: PageLoader,
+    ) -> CachedPage:
+        page = await load(stale)
+        if page is None:
+            if stale is None:
+                msg = f"Loader returned no page for uncached URL: {url}"
+                raise RuntimeError(msg)
+            page = replace(stale, fetched_at=time.monotonic())
+            self._record("revalidated", url)
+        else:
+            self._record("miss", url)
+
+        self._store(key, page)
+        return page
+
+    def _expired(self, entry: CachedPage) -> bool:
+        return time.monotonic() - entry.fetched_at >= self.ttl
+
+    def _store(self, key: str, page: CachedPage) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous.size
+
+        if page.size > self._max_bytes:
+            return
+
+        self._entries[key] = page
+        self._size += page.size
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    @staticmethod
+    def _record(status: str, url: str) -> None:
+        SCRAPE_CACHE_REQUESTS.labels(status=status).inc()
+        logger.info("Scrape cache %s: %s", status, url)
+
+
+scrape_cache = ScrapeCache(
+    settings.scrape_cache_ttl, settings.scrape_cache_max_bytes
+)
@@ -1,23 +1,103 @@
+import asyncio
 import logging
+import math
 from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path, PurePath
 from typing import Any
 from urllib.parse import urlparse
 
 from langchain_core.messages import BaseMessage
-
-from src.chain import get_chain
+from langchain_core.runnables import Runnable
+
+from src.chain import (
+    NoEndpointAvailableError,
+    get_chain,
+    prompt_cache_key,
+    served_by_fallback,
+)
+from src.config import settings
+from src.generation_cache import (
+    generation_cache,
+    generation_key,
+    replay_chunks,
+)
+from src.hedging import hedger
 from src.job_scraper import scrape_job
-from src.resume_parser import parse_resume
+from src.llm_limiter import LLMBusyError, Ticket, llm_limiter
+from src.metrics import record_cancelled_usage, record_token_usage
+from src.parse_executor import (
+    ParseCrashedError,
+    ParserBusyError,
+    ParseTimeoutError,
+    parse_executor,
+)
+from src.resume_cache import digest_key, resume_cache, resume_key
+from src.resume_parser import (
+    check_format,
+    extract_pdf_pages,
+    parse_resume,
+    pdf_stats,
+)
+from src.resume_select import select_resume
+from src.streams import aclose
+from src.timing import StageTimer
+from src.token_budget import count_tokens, fit_prompt
+from src.uploads import ResumeUpload
 
 logger = logging.getLogger(__name__)
 
+# Reserved against the tokens-per-minute budget until the provider
+# reports the real completion size.
+_EXPECTED_OUTPUT_TOKENS = 800
+
 
 class GenerationError(Exception):
     """Raised when cover letter generation fails."""
 
-    def __init__(self, message: str, status_code: int = 500) -> None:
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 500,
+        *,
+        retry_after: int | None = None,
+    ) -> None:
         super().__init__(message)
         self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class QueuedEvent:
+    """Yielded by ``stream_cover_letter`` while the LLM call is queued."""
+
+    position: int
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Yielded by ``stream_cover_letter`` when a pipeline stage starts."""
+
+    stage: str
+
+
+StreamItem = str | QueuedEvent | ProgressEvent
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    url: str | None = None
+    text: str | None = None
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome for ``jobs[index]`` of a ``generate_batch`` call."""
+
+    index: int
+    cover_letter: str | None = None
+    error: str | None = None
+    status_code: int = 200
 
 
 def _validate_url(url: str) -> None:
@@ -34,6 +114,7 @@ def _log_token_usage(usage: dict[str, Any]) -> None:
     cache_read = details.get("cache_read", 0)
     cache_creation = details.get("cache_creation", 0)
     uncached = input_tokens - cache_read
+    record_token_usage(input_tokens, cache_read, output_tokens)
 
     logger.info(
         "Token usage: input=%d (cached=%d, new=%d, "
@@ -47,132 +128,583 @@ def _log_token_usage(usage: dict[str, Any]) -> None:
     )
 
 
-async def _resolve_job_description(
-    job_url: str | None,
-    job_text: str | None,
-) -> str:
-    if job_text and job_text.strip():
-        logger.info("Using provided job text (%d chars)", len(job_text))
-        return job_text.strip()
+def _resume_cache_key(resume_data: bytes | ResumeUpload, filename: str) -> str:
+    if isinstance(resume_data, ResumeUpload):
+        return digest_key(resume_data.sha256, filename)
+    return resume_key(resume_data, filename)
 
-    if not job_url:
-        msg = "Provide either a job URL or job description text."
-        raise GenerationError(msg, status_code=400)
 
-    _validate_url(job_url)
+def check_parse_capacity(
+    resume_data: bytes | ResumeUpload, filename: str
+) -> None:
+    if not parse_executor.saturated:
+        return
+    if _resume_cache_key(resume_data, filename) not in resume_cache:
+        msg = "Resume parser is busy, try again later."
+        raise GenerationError(
+            msg,
+            status_code=503,
+            retry_after=settings.parse_retry_after,
+        )
+
 
+def check_llm_capacity() -> None:
+    if llm_limiter.full:
+        msg = "Too many generation requests, try again later."
+        raise GenerationError(
+            msg,
+            status_code=503,
+            retry_after=settings.llm_retry_after,
+        )
+
+
+def _enqueue_llm_call(chain_input: dict[str, str]) -> Ticket:
+    tokens = (
+        count_tokens(chain_input["resume_text"])
+        + count_tokens(chain_input["job_description"])
+        + _EXPECTED_OUTPUT_TOKENS
+    )
     try:
-        return await scrape_job(job_url)
-    except Exception as exc:
-        logger.exception("Failed to scrape job URL: %s", job_url)
-        msg = f"Could not fetch job page: {exc}"
-        raise GenerationError(msg, status_code=422) from exc
+        return llm_limiter.enqueue(tokens)
+    except LLMBusyError as exc:
+        raise GenerationError(
+            str(exc),
+            status_code=503,
+            retry_after=settings.llm_retry_after,
+        ) from exc
 
 
-async def generate_cover_letter(
-    resume_data: bytes,
-    filename: str,
-    *,
-    job_url: str | None = None,
-    job_text: str | None = None,
-    language: str = "ru",
+async def _wait_for_slot(ticket: Ticket, timeout: float | None = None) -> None:
+    try:
+        await ticket.wait(timeout)
+    except LLMBusyError as exc:
+        raise GenerationError(
+            str(exc),
+            status_code=503,
+            retry_after=settings.llm_retry_after,
+        ) from exc
+
+
+def _unavailable(exc: NoEndpointAvailableError) -> GenerationError:
+    return GenerationError(
+        str(exc), status_code=503, retry_after=settings.llm_retry_after
+    )
+
+
+def _settle_usage(ticket: Ticket, usage: dict[str, Any]) -> None:
+    _log_token_usage(usage)
+    ticket.settle(usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+
+
+def _settle_cancelled(
+    ticket: Ticket, chain_input: dict[str, str], tokens: list[str]
+) -> None:
+    """Account for a stream the client abandoned midway.
+
+    The provider reports usage only in the final chunk, so both sides
+    are estimated: the prompt we sent and the text received so far.
+    """
+    input_tokens = count_tokens(chain_input["resume_text"]) + count_tokens(
+        chain_input["job_description"]
+    )
+    output_tokens = count_tokens("".join(tokens))
+    record_cancelled_usage(input_tokens, output_tokens)
+    ticket.settle(input_tokens + output_tokens)
+    logger.info(
+        "LLM stream cancelled by client: input~%d, output~%d tokens",
+        input_tokens,
+        output_tokens,
+    )
+
+
+async def _parse_resume(
+    resume_data: bytes | ResumeUpload, filename: str
 ) -> str:
+    key = _resume_cache_key(resume_data, filename)
+    cached = resume_cache.get(key)
+    if cached is not None:
+        logger.info("Resume cache hit for '%s'", filename)
+        return cached
+
+    source = (
+        resume_data.source
+        if isinstance(resume_data, ResumeUpload)
+        else resume_data
+    )
     try:
-        resume_text = parse_resume(resume_data, filename)
+        resume_text = await _extract_text(source, filename)
     except ValueError as exc:
         raise GenerationError(str(exc), status_code=400) from exc
+    except ParserBusyError as exc:
+        raise GenerationError(
+            str(exc),
+            status_code=503,
+            retry_after=settings.parse_retry_after,
+        ) from exc
+    except (ParseTimeoutError, ParseCrashedError) as exc:
+        raise GenerationError(str(exc), status_code=422) from exc
 
     if not resume_text.strip():
         msg = "Could not extract text from the resume."
         raise GenerationError(msg, status_code=400)
 
-    job_description = await _resolve_job_description(job_url, job_text)
+    resume_cache.put(key, resume_text)
+    return resume_text
+
+
+async def _extract_text(source: bytes | Path, filename: str) -> str:
+    """Run the parser in the pool, splitting long PDFs across workers.
+
+    A PDF goes parallel only when the pages likely needed to fill
+    ``parse_max_chars`` (estimated from the first page) exceed one
+    chunk; otherwise a single worker reading up to the budget is faster.
+    """
+    chunk = settings.parse_pdf_chunk_pages
+    max_chars = settings.parse_max_chars
+    if (
+        PurePath(filename).suffix.lower() == ".pdf"
+        and chunk > 0
+        and parse_executor.idle > 1
+    ):
+        pages, first_chars = await parse_executor.run(pdf_stats, source)
+        needed = pages
+        if max_chars and first_chars:
+            needed = min(pages, math.ceil(max_chars / first_chars))
+        if needed > chunk:
+            return await _extract_pdf_parallel(source, pages)
+    return await parse_executor.run(parse_resume, source, filename, max_chars)
+
+
+async def _extract_pdf_parallel(source: bytes | Path, pages: int) -> str:
+    """Extract page ranges on idle workers, in order, until the budget.
+
+    At most one range per idle worker is in flight. Ranges are collected
+    in page order and, once ``parse_max_chars`` is reached, the ones not
+    needed any more are cancelled.
+    """
+    chunk = settings.parse_pdf_chunk_pages
+    max_chars = settings.parse_max_chars
+    ranges = iter(range(0, pages, chunk))
+    window = max(1, parse_executor.idle)
+    running: list[asyncio.Task[str]] = []
+
+    def schedule() -> None:
+        start = next(ranges, None)
+        if start is not None:
+            running.append(
+                asyncio.create_task(
+                    parse_executor.run(
+                        extract_pdf_pages,
+                        source,
+                        start,
+                        start + chunk,
+                        max_chars,
+                    )
+                )
+            )
+
+    for _ in range(window):
+        schedule()
+
+    parts: list[str] = []
+    size = 0
+    try:
+        while running:
+            text = await running.pop(0)
+            parts.append(text)
+            size += len(text) + 1
+            if max_chars and size >= max_chars:
+                break
+            schedule()
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
 
-    chain = get_chain()
     logger.info(
-        "Generating cover letter (lang=%s, resume=%d chars, job=%d chars)",
-        language,
-        len(resume_text),
-        len(job_description),
+        "Parsed %d-page PDF on %d workers (%d chars)", pages, window, size
     )
+    return "\n".join(parts).strip()
 
-    try:
-        message: BaseMessage = await chain.ainvoke(
-            {
-                "resume_text": resume_text,
-                "job_description": job_description,
-                "language": language,
-            }
-        )
-    except Exception as exc:
-        logger.exception("LLM call failed")
-        msg = f"LLM generation failed: {exc}"
-        raise GenerationError(msg, status_code=502) from exc
 
-    usage = getattr(message, "usage_metadata", None)
-    if usage:
-        _log_token_usage(usage)
+async def prepare_resume(
+    resume_data: bytes | ResumeUpload, filename: str
+) -> str:
+    return await _parse_resume(resume_data, filename)
 
-    return str(message.content)
 
+def _check_job_input(job_url: str | None, job_text: str | None) -> None:
+    if job_text and job_text.strip():
+        return
+    if not job_url:
+        msg = "Provide either a job URL or job description text."
+        raise GenerationError(msg, status_code=400)
+    _validate_url(job_url)
 
-async def _prepare_chain_input(
-    resume_data: bytes,
-    filename: str,
-    *,
-    job_url: str | None = None,
-    job_text: str | None = None,
-    language: str = "ru",
-) -> dict[str, str]:
+
+def check_request(
+    filename: str | None, job_url: str | None, job_text: str | None
+) -> None:
+    """Reject a request that can never succeed before any work starts.
+
+    ``filename`` is ``None`` when the resume text is already known.
+    """
+    if filename is not None:
+        try:
+            check_format(filename)
+        except ValueError as exc:
+            raise GenerationError(str(exc), status_code=400) from exc
+    _check_job_input(job_url, job_text)
+
+
+async def _resolve_job_description(
+    job_url: str | None,
+    job_text: str | None,
+) -> str:
+    _check_job_input(job_url, job_text)
+    if job_text and job_text.strip():
+        logger.info("Using provided job text (%d chars)", len(job_text))
+        return job_text.strip()
+
+    assert job_url is not None
     try:
-        resume_text = parse_resume(resume_data, filename)
-    except ValueError as exc:
-        raise GenerationError(str(exc), status_code=400) from exc
+        return await scrape_job(job_url)
+    except Exception as exc:
+        logger.exception("Failed to scrape job URL: %s", job_url)
+        msg = f"Could not fetch job page: {exc}"
+        raise GenerationError(msg, status_code=422) from exc
 
-    if not resume_text.strip():
-        msg = "Could not extract text from the resume."
-        raise GenerationError(msg, status_code=400)
 
-    job_description = await _resolve_job_description(job_url, job_text)
+def _generation_cache_key(chain_input: dict[str, str]) -> str | None:
+    if not settings.generation_cache_enabled:
+        return None
+    return generation_key(chain_input)
 
+
+def _build_chain_input(
+    resume_text: str, job_description: str, language: str
+) -> dict[str, str]:
+    resume_text = select_resume(resume_text, job_description)
+    budget = fit_prompt(resume_text, job_description)
     logger.info(
-        "Generating cover letter (lang=%s, resume=%d chars, job=%d chars)",
+        "Generating cover letter (lang=%s, resume=%d/%d tokens, "
+        "job=%d/%d tokens)",
         language,
-        len(resume_text),
-        len(job_description),
+        budget.resume_tokens,
+        budget.original_resume_tokens,
+        budget.job_tokens,
+        budget.original_job_tokens,
     )
 
     return {
-        "resume_text": resume_text,
-        "job_description": job_description,
+        "resume_text": budget.resume_text,
+        "job_description": budget.job_description,
         "language": language,
     }
 
 
-async def stream_cover_letter(
-    resume_data: bytes,
+class GenerationPipeline:
+    """One cover letter request: parse, job, budget, queue, llm.
+
+    ``parse`` and ``job`` run concurrently in ``prepare``; the rest are
+    sequential. Every stage is timed by the pipeline's ``StageTimer``,
+    which also feeds the per-stage Prometheus histograms. Pass
+    ``resume_text`` to skip parsing when the resume is already known.
+    """
+
+    def __init__(
+        self,
+        resume_data: bytes | ResumeUpload = b"",
+        filename: str = "",
+        *,
+        job_url: str | None = None,
+        job_text: str | None = None,
+        language: str = "ru",
+        fresh: bool = False,
+        resume_text: str | None = None,
+    ) -> None:
+        self.resume_data = resume_data
+        self.filename = filename
+        self.job_url = job_url
+        self.job_text = job_text
+        self.language = language
+        self.fresh = fresh
+        self.timer = StageTimer()
+        self._resume_text = resume_text
+        self._chain_input: dict[str, str] | None = None
+
+    async def prepare(self) -> dict[str, str]:
+        """Parse the resume and resolve the job description concurrently.
+
+        Request errors (an unsupported file format, no job input, a bad
+        URL) are checked first, resume before job, so they never depend
+        on timing. After that the first stage to fail cancels the other:
+        a failing scrape is reported even if the resume, still being
+        parsed, would have turned out to be unreadable.
+        """
+        if self._chain_input is not None:
+            return self._chain_input
+
+        check_request(
+            self.filename if self._resume_text is None else None,
+            self.job_url,
+            self.job_text,
+        )
+
+        tasks = [
+            asyncio.create_task(self._parse()),
+            asyncio.create_task(self._resolve_job()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in tasks:
+            error = None if task.cancelled() else task.exception()
+            if error is not None:
+                raise error
+        resume_text, job_description = (task.result() for task in tasks)
+
+        with self.timer.span("budget"):
+            self._chain_input = _build_chain_input(
+                resume_text, job_description, self.language
+            )
+        return self._chain_input
+
+    async def _parse(self) -> str:
+        if self._resume_text is not None:
+            return self._resume_text
+        with self.timer.span("parse"):
+            return await _parse_resume(self.resume_data, self.filename)
+
+    async def _resolve_job(self) -> str:
+        with self.timer.span("job"):
+            return await _resolve_job_description(self.job_url, self.job_text)
+
+    def _cached_letter(self, chain_input: dict[str, str]) -> str | None:
+        cache_key = _generation_cache_key(chain_input)
+        if cache_key is None or self.fresh:
+            return None
+        return generation_cache.get(cache_key)
+
+    def _remember_letter(
+        self, chain_input: dict[str, str], letter: str, *, fallback: bool
+    ) -> None:
+        cache_key = _generation_cache_key(chain_input)
+        if cache_key is None:
+            return
+        if fallback:
+            # The key names the primary model; a fallback's letter must
+            # not be served later as if the primary had written it.
+            logger.info("Not caching a letter from a fallback endpoint")
+            return
+        generation_cache.put(cache_key, letter)
+
+    async def generate(self) -> str:
+        chain_input = await self.prepare()
+        cached = self._cached_letter(chain_input)
+        if cached is not None:
+            return cached
+
+        chain = get_chain(prompt_cache_key(chain_input["resume_text"]))
+
+        ticket = _enqueue_llm_call(chain_input)
+        try:
+            with self.timer.span("queue"):
+                await _wait_for_slot(ticket)
+            try:
+                with self.timer.span("llm"):
+                    message: BaseMessage = await chain.ainvoke(chain_input)
+            except NoEndpointAvailableError as exc:
+                raise _unavailable(exc) from exc
+            except Exception as exc:
+                logger.exception("LLM call failed")
+                msg = f"LLM generation failed: {exc}"
+                raise GenerationError(msg, status_code=502) from exc
+
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                _settle_usage(ticket, usage)
+        finally:
+            ticket.release()
+
+        letter = str(message.content)
+        self._remember_letter(
+            chain_input, letter, fallback=served_by_fallback(message)
+        )
+        logger.info("Stage timings: %s", self.timer.summary())
+        return letter
+
+    def _llm_stream(
+        self,
+        chain: Runnable[dict[str, str], BaseMessage],
+        chain_input: dict[str, str],
+    ) -> AsyncIterator[Any]:
+        if not settings.llm_hedge_enabled:
+            return chain.astream(chain_input)
+        cache_key = prompt_cache_key(chain_input["resume_text"])
+        return hedger.stream(
+            lambda hedge: (
+                get_chain(cache_key, hedge=True) if hedge else chain
+            ).astream(chain_input)
+        )
+
+    async def stream(self) -> AsyncIterator[StreamItem]:
+        if self._resume_text is None:
+            yield ProgressEvent("parsing")
+        if self.job_url and not (self.job_text and self.job_text.strip()):
+            yield ProgressEvent("scraping")
+        chain_input = await self.prepare()
+        cached = self._cached_letter(chain_input)
+        if cached is not None:
+            for token in replay_chunks(cached):
+                yield token
+            return
+
+        chain = get_chain(prompt_cache_key(chain_input["resume_text"]))
+        tokens: list[str] = []
+        output_tokens: int | None = None
+        fallback = False
+
+        ticket = _enqueue_llm_call(chain_input)
+        try:
+            with self.timer.span("queue"):
+                while not ticket.granted:
+                    yield QueuedEvent(ticket.position)
+                    await _wait_for_slot(ticket, settings.llm_queue_heartbeat)
+            yield ProgressEvent("generating")
+
+            # Closed explicitly so that an abandoned stream also closes
+            # the upstream HTTP response instead of waiting for the GC.
+            chunks = self._llm_stream(chain, chain_input)
+            try:
+                with self.timer.span("llm"):
+                    async for chunk in chunks:
+                        fallback = fallback or served_by_fallback(chunk)
+                        usage = getattr(chunk, "usage_metadata", None)
+                        if usage:
+                            _settle_usage(ticket, usage)
+                            output_tokens = usage.get("output_tokens")
+                        content = getattr(chunk, "content", None)
+                        token = (
+                            str(content) if content is not None else str(chunk)
+                        )
+                        if token:
+                            if not tokens:
+                                self.timer.first_token()
+                            tokens.append(token)
+                            yield str(token)
+            except (asyncio.CancelledError, GeneratorExit):
+                if output_tokens is None:
+                    _settle_cancelled(ticket, chain_input, tokens)
+                raise
+            except NoEndpointAvailableError as exc:
+                raise _unavailable(exc) from exc
+            except Exception as exc:
+                logger.exception("LLM streaming failed")
+                msg = f"LLM generation failed: {exc}"
+                raise GenerationError(msg, status_code=502) from exc
+            finally:
+                await aclose(chunks)
+        finally:
+            ticket.release()
+
+        self.timer.output_rate(output_tokens or len(tokens))
+        self._remember_letter(chain_input, "".join(tokens), fallback=fallback)
+        logger.info("Stage timings: %s", self.timer.summary())
+
+
+async def generate_cover_letter(
+    resume_data: bytes | ResumeUpload,
     filename: str,
     *,
     job_url: str | None = None,
     job_text: str | None = None,
     language: str = "ru",
-) -> AsyncIterator[str]:
-    chain_input = await _prepare_chain_input(
+    fresh: bool = False,
+    resume_text: str | None = None,
+) -> str:
+    pipeline = GenerationPipeline(
         resume_data,
         filename,
         job_url=job_url,
         job_text=job_text,
         language=language,
+        fresh=fresh,
+        resume_text=resume_text,
     )
-    chain = get_chain()
+    return await pipeline.generate()
+
 
+def stream_cover_letter(
+    resume_data: bytes | ResumeUpload,
+    filename: str,
+    *,
+    job_url: str | None = None,
+    job_text: str | None = None,
+    language: str = "ru",
+    fresh: bool = False,
+    resume_text: str | None = None,
+) -> AsyncIterator[StreamItem]:
+    pipeline = GenerationPipeline(
+        resume_data,
+        filename,
+        job_url=job_url,
+        job_text=job_text,
+        language=language,
+        fresh=fresh,
+        resume_text=resume_text,
+    )
+    return pipeline.stream()
+
+
+async def generate_batch(
+    resume_text: str,
+    jobs: list[BatchJob],
+    *,
+    language: str = "ru",
+    fresh: bool = False,
+) -> AsyncIterator[BatchResult]:
+    """Generate a letter per job, yielding results as they complete.
+
+    Vacancies are scraped up to ``batch_scrape_concurrency`` at a time
+    and at most ``batch_llm_concurrency`` of this batch's generations
+    hold an LLM slot at once, so one large batch cannot take over the
+    shared admission queue. A failing job becomes an error result and
+    does not affect the others.
+    """
+    scrape_slots = asyncio.Semaphore(settings.batch_scrape_concurrency)
+    llm_slots = asyncio.Semaphore(settings.batch_llm_concurrency)
+
+    async def run(index: int, job: BatchJob) -> BatchResult:
+        pipeline = GenerationPipeline(
+            job_url=job.url,
+            job_text=job.text,
+            language=language,
+            fresh=fresh,
+            resume_text=resume_text,
+        )
+        try:
+            async with scrape_slots:
+                await pipeline.prepare()
+            async with llm_slots:
+                letter = await pipeline.generate()
+        except GenerationError as exc:
+            return BatchResult(
+                index, error=str(exc), status_code=exc.status_code
+            )
+        return BatchResult(index, cover_letter=letter)
+
+    logger.info("Generating batch of %d cover letters", len(jobs))
+    tasks = [
+        asyncio.create_task(run(index, job)) for index, job in enumerate(jobs)
+    ]
     try:
-        async for chunk in chain.astream(chain_input):
-            content = getattr(chunk, "content", None)
-            token = str(content) if content is not None else str(chunk)
-            if token:
-                yield str(token)
-    except Exception as exc:
-        logger.exception("LLM streaming failed")
-        msg = f"LLM generation failed: {exc}"
-        raise GenerationError(msg, status_code=502) from exc
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Generic, TypeVar
+
+from src.config import settings
+from src.streams import aclose
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+KEEPALIVE = ": keep-alive\n\n"
+
+
+def encode_event(
+    data: str,
+    *,
+    event: str | None = None,
+    event_id: str | None = None,
+) -> str:
+    """Frame one server-sent event.
+
+    Every line of ``data`` becomes its own ``data:`` field, so chunks
+    containing line breaks survive the round trip: clients join the
+    fields back with ``\\n``.
+    """
+    fields = []
+    if event_id is not None:
+        fields.append(f"id: {event_id}")
+    if event is not None:
+        fields.append(f"event: {event}")
+    fields.extend(f"data: {line}" for line in _LINE_BREAK.split(data))
+    return "\n".join(fields) + "\n\n"
+
+
+class _Prefetch(Generic[_T]):
+    """Reads an async iterator with timeouts without dropping items.
+
+    ``next`` raises ``TimeoutError`` when nothing arrived in time (the
+    pending read is kept for the next call) and ``StopAsyncIteration``
+    at the end.
+    """
+
+    def __init__(self, items: AsyncIterator[_T]) -> None:
+        self._items = items
+        self._pending: asyncio.Future[_T] | None = None
+
+    async def next(self, timeout: float | None) -> _T:
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._items.__anext__())
+        done, _ = await asyncio.wait({self._pending}, timeout=timeout)
+        if not done:
+            raise TimeoutError
+        finished, self._pending = self._pending, None
+        return finished.result()
+
+    async def aclose(self) -> None:
+        if self._pending is not None:
+            self._pending.cancel()
+            await asyncio.gather(self._pending, return_exceptions=True)
+            self._pending = None
+        await aclose(self._items)
+
+
+async def with_keepalive(
+    frames: AsyncIterator[str], interval: float
+) -> AsyncIterator[str]:
+    """Interleave SSE comment lines into ``frames`` while it is idle.
+
+    Proxies (nginx defaults to 60 s) close connections that stay silent,
+    which long scrapes and queue waits would otherwise trigger.
+    """
+    reader = _Prefetch(frames)
+    try:
+        while True:
+            try:
+                yield await reader.next(interval)
+            except TimeoutError:
+                yield KEEPALIVE
+            except StopAsyncIteration:
+                return
+    finally:
+        await reader.aclose()
+
+
+async def coalesce(
+    items: AsyncIterator[str | _T],
+    *,
+    window: float,
+    max_bytes: int,
+) -> AsyncIterator[str | _T]:
+    """Merge consecutive text chunks into fewer, larger ones.
+
+    Buffered text is flushed ``window`` seconds after its first chunk
+    arrived, once it reaches ``max_bytes``, before any non-text item, and
+    at the end, even if ``items`` fails. ``window=0`` turns coalescing
+    off.
+    """
+    if window <= 0:
+        async for item in items:
+            yield item
+        return
+
+    loop = asyncio.get_running_loop()
+    reader = _Prefetch(items)
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    try:
+        while True:
+            timeout = max(deadline - loop.time(), 0) if buffer else None
+            try:
+                item = await reader.next(timeout)
+            except TimeoutError:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+                continue
+            except StopAsyncIteration:
+                break
+            except Exception:
+                if buffer:
+                    yield "".join(buffer)
+                raise
+
+            if not isinstance(item, str):
+                if buffer:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+                yield item
+                continue
+
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(item)
+            size += len(item.encode())
+            if size >= max_bytes:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        await reader.aclose()
+
+
+class StreamSession:
+    """Frames of one event stream, kept so a client can resume it.
+
+    A producer task feeds ``(event, data)`` messages; each becomes a
+    frame whose id is its sequence number. Any number of consumers can
+    ``follow`` the frames after a given sequence number, which is how a
+    reconnect with ``Last-Event-ID`` picks up where it left off.
+
+    Once the last consumer goes away and nobody re-attaches within
+    ``detach_grace`` seconds, the producer is cancelled so an abandoned
+    generation stops instead of running (and being paid for) to the end.
+    """
+
+    def __init__(self, detach_grace: float = 0.0) -> None:
+        self.id = uuid.uuid4().hex
+        self.frames: list[str] = []
+        self.done = False
+        self.finished_at: float | None = None
+        self.detach_grace = detach_grace
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._followers = 0
+        self._detach_timer: asyncio.TimerHandle | None = None
+
+    def start(self, messages: AsyncIterator[tuple[str | None, str]]) -> None:
+        self._task = asyncio.create_task(self._produce(messages))
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _produce(
+        self, messages: AsyncIterator[tuple[str | None, str]]
+    ) -> None:
+        try:
+            async for event, data in messages:
+                self._publish(event, data)
+        except asyncio.CancelledError:
+            logger.info("Stream %s cancelled: no client attached", self.id)
+        except Exception:
+            logger.exception("Stream %s producer failed", self.id)
+            self._publish("error", "Internal error")
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._wake()
+
+    def _publish(self, event: str | None, data: str) -> None:
+        event_id = str(len(self.frames) + 1)
+        self.frames.append(encode_event(data, event=event, event_id=event_id))
+        self._wake()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, after: int = 0) -> AsyncGenerator[str]:
+        self._attach()
+        try:
+            seq = after
+            while True:
+                changed = self._changed
+                while seq < len(self.frames):
+                    yield self.frames[seq]
+                    seq += 1
+                if self.done:
+                    return
+                await changed.wait()
+        finally:
+            self._detach()
+
+    def _attach(self) -> None:
+        self._followers += 1
+        if self._detach_timer is not None:
+            self._detach_timer.cancel()
+            self._detach_timer = None
+
+    def _detach(self) -> None:
+        self._followers -= 1
+        if self._followers or self.done:
+            return
+        if self.detach_grace <= 0:
+            self.cancel()
+        else:
+            loop = asyncio.get_running_loop()
+            self._detach_timer = loop.call_later(
+                self.detach_grace, self.cancel
+            )
+
+
+class StreamSessions:
+    """Live and recently finished ``StreamSession``s by id."""
+
+    def __init__(self, ttl: float, detach_grace: float = 0.0) -> None:
+        self.ttl = ttl
+        self.detach_grace = detach_grace
+        self._sessions: dict[str, StreamSession] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> StreamSession:
+        self._purge()
+        session = StreamSession(self.detach_grace)
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> StreamSession | None:
+        return self._sessions.get(session_id)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key
+            for key, session in self._sessions.items()
+            if session.finished_at is not None
+            and now - session.finished_at > self.ttl
+        ]
+        for key in expired:
+            del self._sessions[key]
+
+
+stream_sessions = StreamSessions(
+    settings.sse_resume_ttl, settings.sse_detach_grace
+)
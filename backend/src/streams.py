@@ -0,0 +1,9 @@
+from collections.abc import AsyncIterator
+from typing import Any
+
+
+async def aclose(stream: AsyncIterator[Any]) -> None:
+    """Close ``stream`` if it can be closed (async generators can)."""
+    close = getattr(stream, "aclose", None)
+    if close is not None:
+        await close()
@@ -0,0 +1,62 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from src.metrics import (
+    GENERATION_STAGE_SECONDS,
+    LLM_OUTPUT_TOKENS_PER_SECOND,
+    LLM_TIME_TO_FIRST_TOKEN,
+)
+
+
+class StageTimer:
+    """Wall-clock spans of the stages of one request.
+
+    Spans may overlap (parsing and scraping run concurrently), so the
+    request latency is driven by the longest chain, not by the sum.
+    ``perf_counter`` is monotonic, so clock adjustments do not skew the
+    exported histograms.
+    """
+
+    def __init__(self) -> None:
+        self.spans: dict[str, float] = {}
+        self.time_to_first_token: float | None = None
+        self._started = time.perf_counter()
+        self._first_token_at: float | None = None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.spans[name] = duration
+            GENERATION_STAGE_SECONDS.labels(stage=name).observe(duration)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def first_token(self) -> None:
+        self._first_token_at = time.perf_counter()
+        self.time_to_first_token = self._first_token_at - self._started
+        LLM_TIME_TO_FIRST_TOKEN.observe(self.time_to_first_token)
+
+    def output_rate(self, tokens: int) -> float | None:
+        """Record generation speed after the first token, in tokens/s."""
+        if self._first_token_at is None:
+            return None
+        duration = time.perf_counter() - self._first_token_at
+        if duration <= 0:
+            return None
+        rate = tokens / duration
+        LLM_OUTPUT_TOKENS_PER_SECOND.observe(rate)
+        return rate
+
+    def summary(self) -> str:
+        parts = [f"{name}={s * 1000:.0f}ms" for name, s in self.spans.items()]
+        if self.time_to_first_token is not None:
+            parts.append(f"ttft={self.time_to_first_token * 1000:.0f}ms")
+        parts.append(f"total={self.elapsed * 1000:.0f}ms")
+        return " ".join(parts)
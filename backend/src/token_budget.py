@@ -0,0 +1,217 @@
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import tiktoken
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_HEADING_MAX_CHARS = 60
+
+# Low-value headings are matched against the whole line, so a bullet
+# that merely mentions "условия" does not start a droppable section.
+_JOB_LOW_VALUE = re.compile(
+    r"^((что )?мы предлагаем|условия( работы)?|бонусы( и льготы)?|плюшки|"
+    r"льготы|о компании|о нас|соцпакет|дмс|"
+    r"(what )?we offer|benefits|perks|about us|about the company|"
+    r"equal opportunit(y|ies)( employer)?|diversity( and inclusion)?|"
+    r"privacy( policy| notice)?)\s*:?$",
+    re.IGNORECASE,
+)
+_RESUME_LOW_VALUE = re.compile(
+    r"^(хобби|увлечения|интересы|рекомендации|личные качества|о себе|"
+    r"hobbies( and interests)?|interests|references|"
+    r"personal( information| qualities)?)\s*:?$",
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r"^\s*(?:[-•*▪●◦–—]|\d{1,2}[.)])\s+")
+
+
+class _Tokenizer:
+    """The model's tiktoken encoder, loaded in a background thread.
+
+    tiktoken downloads the encoding on first use unless it is already in
+    ``TIKTOKEN_CACHE_DIR`` (the Docker image bakes it in), so the load
+    never runs on a request. Until it succeeds tokens are estimated from
+    characters; a failed load is retried after
+    ``tokenizer_retry_interval`` seconds.
+    """
+
+    def __init__(self) -> None:
+        self._encode: Callable[[str], int] | None = None
+        self._loader: threading.Thread | None = None
+        self._failed_at: float | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Callable[[str], int] | None:
+        if self._encode is None:
+            self._start()
+        return self._encode
+
+    def warm(self, timeout: float) -> bool:
+        """Load the encoder, waiting at most ``timeout`` seconds."""
+        loader = self._start()
+        if loader is not None:
+            loader.join(timeout)
+        return self._encode is not None
+
+    def _start(self) -> threading.Thread | None:
+        with self._lock:
+            if self._encode is not None or self._loader is not None:
+                return self._loader
+            if (
+                self._failed_at is not None
+                and time.monotonic() - self._failed_at
+                < settings.tokenizer_retry_interval
+            ):
+                return None
+            self._loader = threading.Thread(
+                target=self._load, name="tokenizer-load", daemon=True
+            )
+            self._loader.start()
+            return self._loader
+
+    def _load(self) -> None:
+        try:
+            encoding = tiktoken.encoding_for_model(settings.openai_model)
+        except Exception:
+            logger.warning(
+                "No local tokenizer for %s, estimating tokens from characters",
+                settings.openai_model,
+            )
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._loader = None
+            return
+        with self._lock:
+            self._encode = lambda text: len(
+                encoding.encode(text, disallowed_special=())
+            )
+            self._loader = None
+
+
+_tokenizer = _Tokenizer()
+
+
+def _estimate(text: str) -> int:
+    # BPE vocabularies of OpenAI models pack about 4 Latin characters per
+    # token but noticeably fewer Cyrillic ones.
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return round(ascii_chars / 4 + (len(text) - ascii_chars) / 2.5)
+
+
+def warm_tokenizer() -> bool:
+    return _tokenizer.warm(settings.tokenizer_warmup_timeout)
+
+
+def count_tokens(text: str) -> int:
+    encode = _tokenizer.get()
+    return encode(text) if encode is not None else _estimate(text)
+
+
+@dataclass(frozen=True)
+class _Section:
+    lines: list[str]
+    low_value: bool
+
+
+def _is_heading(line: str, low_value: re.Pattern[str]) -> bool:
+    line = line.strip()
+    if len(line) > _HEADING_MAX_CHARS or _BULLET.match(line):
+        return False
+    return line.endswith(":") or bool(low_value.match(line))
+
+
+def _split_sections(text: str, low_value: re.Pattern[str]) -> list[_Section]:
+    sections: list[_Section] = []
+    current: list[str] = []
+    current_low = False
+    for line in text.splitlines():
+        heading = _is_heading(line, low_value)
+        if heading and current:
+            sections.append(_Section(current, current_low))
+            current = []
+        if not current:
+            current_low = heading and bool(low_value.match(line.strip()))
+        current.append(line)
+    if current:
+        sections.append(_Section(current, current_low))
+    return sections
+
+
+def _cut_tail(lines: list[str], budget: int) -> list[str]:
+    kept: list[str] = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def compress(text: str, budget: int, low_value: re.Pattern[str]) -> str:
+    """Fit ``text`` into ``budget`` tokens.
+
+    Low-value sections (benefits, hobbies, ...) are dropped first, last
+    one first; whatever is still over budget is cut line by line from
+    the end.
+    """
+    if count_tokens(text) <= budget:
+        return text
+
+    sections = _split_sections(text, low_value)
+    for index in range(len(sections) - 1, -1, -1):
+        if not sections[index].low_value:
+            continue
+        dropped = sections.pop(index)
+        logger.info("Dropped low-value section %r", dropped.lines[0][:40])
+        joined = "\n".join(line for s in sections for line in s.lines)
+        if count_tokens(joined) <= budget:
+            return joined
+
+    lines = [line for s in sections for line in s.lines]
+    return "\n".join(_cut_tail(lines, budget))
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    resume_text: str
+    job_description: str
+    resume_tokens: int
+    job_tokens: int
+    original_resume_tokens: int
+    original_job_tokens: int
+
+
+def fit_prompt(resume_text: str, job_description: str) -> PromptBudget:
+    """Fit the resume and the vacancy into ``prompt_token_budget``.
+
+    The resume is cut to its own cap (``prompt_resume_share`` of the
+    budget) whatever the vacancy is, so a candidate's resume message,
+    and with it the provider's cached prompt prefix, is the same for
+    every vacancy. The vacancy gets the rest of the budget.
+    """
+    total = settings.prompt_token_budget
+    resume_tokens = count_tokens(resume_text)
+    job_tokens = count_tokens(job_description)
+
+    resume_budget = round(total * settings.prompt_resume_share)
+    resume = compress(resume_text, resume_budget, _RESUME_LOW_VALUE)
+    job = compress(
+        job_description, total - count_tokens(resume), _JOB_LOW_VALUE
+    )
+    return PromptBudget(
+        resume_text=resume,
+        job_description=job,
+        resume_tokens=count_tokens(resume),
+        job_tokens=count_tokens(job),
+        original_resume_tokens=resume_tokens,
+        original_job_tokens=job_tokens,
+    )
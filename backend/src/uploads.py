@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path, PurePath
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_BYTES = 256 * 1024
+# Room for the multipart boundaries and the small form fields sent
+# alongside the file.
+_FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an uploaded file exceeds ``upload_max_bytes``."""
+
+
+def _too_large_message(max_bytes: int) -> str:
+    return f"File is too large, the limit is {max_bytes // 1024} KiB."
+
+
+@dataclass(frozen=True)
+class ResumeUpload:
+    """An uploaded resume with its size and SHA-256 digest.
+
+    Small files stay in memory as ``data``; larger ones are spooled to a
+    temporary file at ``path`` so that neither the API process nor the
+    parse workers hold a full copy. ``close`` removes the file.
+    """
+
+    filename: str
+    size: int
+    sha256: str
+    data: bytes = b""
+    path: Path | None = None
+
+    @property
+    def source(self) -> bytes | Path:
+        return self.data if self.path is None else self.path
+
+    def read_bytes(self) -> bytes:
+        return self.data if self.path is None else self.path.read_bytes()
+
+    def close(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+def _spool(
+    file: BinaryIO,
+    filename: str,
+    max_bytes: int,
+    spool_threshold: int,
+    spool_dir: Path | None,
+) -> ResumeUpload:
+    digest = hashlib.sha256()
+    size = 0
+    head = bytearray()
+    spool = None
+    try:
+        while chunk := file.read(_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(_too_large_message(max_bytes))
+            digest.update(chunk)
+            if spool is None and size <= spool_threshold:
+                head += chunk
+                continue
+            if spool is None:
+                spool = tempfile.NamedTemporaryFile(
+                    prefix="resume-",
+                    suffix=PurePath(filename).suffix.lower(),
+                    dir=spool_dir,
+                    delete=False,
+                )
+                spool.write(head)
+                head.clear()
+            spool.write(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            Path(spool.name).unlink(missing_ok=True)
+        raise
+
+    if spool is None:
+        return ResumeUpload(filename, size, digest.hexdigest(), bytes(head))
+    spool.close()
+    return ResumeUpload(
+        filename, size, digest.hexdigest(), path=Path(spool.name)
+    )
+
+
+async def read_upload(upload: UploadFile) -> ResumeUpload:
+    """Copy an upload in chunks, hashing it and enforcing the size cap.
+
+    Raises ``UploadTooLargeError`` past ``upload_max_bytes``.
+    """
+    return await asyncio.to_thread(
+        _spool,
+        upload.file,
+        upload.filename or "file.pdf",
+        settings.upload_max_bytes,
+        settings.upload_spool_threshold,
+        settings.upload_spool_dir,
+    )
+
+
+class UploadLimitMiddleware:
+    """Reject request bodies larger than an upload may be with 413.
+
+    A declared ``Content-Length`` over the limit is refused before the
+    body is read; otherwise the body is counted as it streams in and the
+    request is cut off as soon as it crosses the limit, so an oversized
+    upload is never written out in full.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.upload_max_bytes
+        max_body = max_bytes + _FORM_OVERHEAD
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and int(declared) > max_body:
+            await self._reject(send, max_bytes)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    exceeded = True
+                    raise UploadTooLargeError(_too_large_message(max_bytes))
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # Whatever the app made of the aborted body (FastAPI turns it
+            # into a 400), the client gets a 413.
+            if exceeded:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            logger.warning("Rejected upload over %d bytes", max_bytes)
+            await self._reject(send, max_bytes)
+
+    async def _reject(self, send: Send, max_bytes: int) -> None:
+        body = json.dumps({"detail": _too_large_message(max_bytes)}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -7,6 +7,23 @@ import pytest
 
 os.environ.setdefault("OPENAI_API_KEY", "sk-test-fake-key")
 
+from src.generation_cache import generation_cache
+from src.resume_cache import resume_cache
+from src.resume_select import resume_indexes
+from src.resume_store import resume_store
+from src.scrape_cache import scrape_cache
+from src.sse import stream_sessions
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches() -> None:
+    resume_cache.clear()
+    resume_store.clear()
+    resume_indexes.clear()
+    scrape_cache.clear()
+    generation_cache.clear()
+    stream_sessions.clear()
+
 
 @pytest.fixture
 def sample_pdf_bytes() -> bytes:
@@ -0,0 +1,244 @@
+"""OpenAI-compatible chat completions server for tests and benchmarks.
+
+Serves ``POST /v1/chat/completions`` (plain and streaming) from a
+background uvicorn thread, records every request body and simulates
+provider-side prefix caching: prompts of at least ``cache_min_tokens``
+report ``cached_tokens`` for the longest prefix shared with an earlier
+prompt, rounded down to ``cache_block`` tokens. Streams the client
+hung up on are counted in ``aborted_streams``. Setting ``error_status``
+makes every request fail with that HTTP status; ``error_rate`` fails
+that share of them (with ``error_status`` or 500). ``first_token_delay``
+simulates a slow provider, ``first_token_jitter`` adds an exponentially
+distributed delay with that mean, and ``slow_fraction`` of requests
+wait ``slow_delay`` more, for a heavy latency tail. Random choices come
+from an RNG seeded with ``seed``.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Self
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_CHARS_PER_TOKEN = 4
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def _common_prefix(a: str, b: str) -> int:
+    size = min(len(a), len(b))
+    for i in range(size):
+        if a[i] != b[i]:
+            return i
+    return size
+
+
+@dataclass
+class RecordedRequest:
+    body: dict[str, Any]
+    prompt: str
+    prompt_tokens: int
+    cached_tokens: int
+
+
+@dataclass
+class FakeOpenAI:
+    reply: str = "Здравствуйте! Меня зовут Иван, я Python-разработчик."
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+    cache_min_tokens: int = 1024
+    cache_block: int = 128
+    error_status: int = 0
+    error_rate: float = 0.0
+    first_token_jitter: float = 0.0
+    slow_fraction: float = 0.0
+    slow_delay: float = 0.0
+    seed: int = 0
+    requests: list[RecordedRequest] = field(default_factory=list)
+    completed_streams: int = 0
+    aborted_streams: int = 0
+
+    def __post_init__(self) -> None:
+        self._server: uvicorn.Server | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._random = random.Random(self.seed)
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self._completions)
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> None:
+        config = uvicorn.Config(
+            self.app, host="127.0.0.1", port=0, log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        if self._server is not None and self._thread is not None:
+            self._server.should_exit = True
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        total = sum(r.prompt_tokens for r in self.requests)
+        cached = sum(r.cached_tokens for r in self.requests)
+        return cached / total if total else 0.0
+
+    def _record(self, body: dict[str, Any]) -> RecordedRequest:
+        prompt = "".join(
+            f"<{m['role']}>{m['content']}" for m in body["messages"]
+        )
+        prompt_tokens = _estimate_tokens(prompt)
+
+        with self._lock:
+            cached = 0
+            if prompt_tokens >= self.cache_min_tokens:
+                shared = max(
+                    (_common_prefix(prompt, r.prompt) for r in self.requests),
+                    default=0,
+                )
+                shared_tokens = shared // _CHARS_PER_TOKEN
+                cached = shared_tokens // self.cache_block * self.cache_block
+            recorded = RecordedRequest(body, prompt, prompt_tokens, cached)
+            self.requests.append(recorded)
+        return recorded
+
+    def _usage(self, recorded: RecordedRequest) -> dict[str, Any]:
+        completion = _estimate_tokens(self.reply)
+        return {
+            "prompt_tokens": recorded.prompt_tokens,
+            "completion_tokens": completion,
+            "total_tokens": recorded.prompt_tokens + completion,
+            "prompt_tokens_details": {"cached_tokens": recorded.cached_tokens},
+        }
+
+    async def _completions(self, request: Request) -> Any:
+        body = await request.json()
+        recorded = self._record(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        delay = self.first_token_delay
+        if self.first_token_jitter:
+            delay += self._random.expovariate(1 / self.first_token_jitter)
+        if self._random.random() < self.slow_fraction:
+            delay += self.slow_delay
+        await asyncio.sleep(delay)
+        if self.error_status or self._random.random() < self.error_rate:
+            return JSONResponse(
+                {
+                    "error": {
+                        "message": "Injected failure",
+                        "type": "server_error",
+                    }
+                },
+                status_code=self.error_status or 500,
+            )
+
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": self.reply,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": self._usage(recorded),
+                }
+            )
+
+        include_usage = (body.get("stream_options") or {}).get(
+            "include_usage", False
+        )
+        return StreamingResponse(
+            self._stream(
+                completion_id, body["model"], recorded, include_usage
+            ),
+            media_type="text/event-stream",
+        )
+
+    async def _stream(
+        self,
+        completion_id: str,
+        model: str,
+        recorded: RecordedRequest,
+        include_usage: bool,
+    ) -> AsyncIterator[str]:
+        def event(choices: list[Any], **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        def delta(content: str, finish: str | None = None) -> str:
+            return event(
+                [
+                    {
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": content},
+                        "finish_reason": finish,
+                    }
+                ]
+            )
+
+        finished = False
+        try:
+            words = self.reply.split(" ")
+            for i, word in enumerate(words):
+                yield delta(word if i == len(words) - 1 else f"{word} ")
+                await asyncio.sleep(self.token_delay)
+            yield delta("", finish="stop")
+            if include_usage:
+                yield event([], usage=self._usage(recorded))
+            yield "data: [DONE]\n\n"
+            finished = True
+        finally:
+            with self._lock:
+                if finished:
+                    self.completed_streams += 1
+                else:
+                    self.aborted_streams += 1
@@ -1,15 +1,42 @@
-from collections.abc import AsyncIterator
+import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
 
 from src.app import app
-from src.service import GenerationError
+from src.config import settings
+from src.job_queue import JobStore
+from src.service import (
+    BatchResult,
+    GenerationError,
+    ProgressEvent,
+    QueuedEvent,
+)
 
 pytestmark = pytest.mark.asyncio
 
 
+def _events(body: str) -> list[tuple[str | None, str]]:
+    """Parse an SSE body into ``(event, data)`` pairs, skipping comments."""
+    events = []
+    for block in body.split("\n\n"):
+        event = None
+        data = []
+        for line in block.splitlines():
+            field, _, value = line.partition(": ")
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+        if data:
+            events.append((event, "\n".join(data)))
+    return events
+
+
 @pytest.fixture
 def client() -> AsyncClient:
     return AsyncClient(
@@ -25,6 +52,13 @@ class TestHealth:
         assert resp.json() == {"status": "ok"}
 
 
+class TestMetrics:
+    async def test_exposes_prometheus_text(self, client: AsyncClient) -> None:
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200
+        assert "resume_cache_misses_total" in resp.text
+
+
 class TestGenerate:
     async def test_success_with_url(
         self, client: AsyncClient, sample_pdf_bytes: bytes
@@ -103,6 +137,25 @@ class TestGenerate:
 
         assert resp.status_code == 502
 
+    async def test_parser_busy_503(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        with patch(
+            "src.app.generate_cover_letter",
+            new_callable=AsyncMock,
+            side_effect=GenerationError(
+                "Resume parser is busy", status_code=503, retry_after=5
+            ),
+        ):
+            resp = await client.post(
+                "/api/generate",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_url": "https://example.com/job"},
+            )
+
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "5"
+
     async def test_missing_resume(self, client: AsyncClient) -> None:
         resp = await client.post(
             "/api/generate",
@@ -129,6 +182,72 @@ class TestGenerate:
         assert resp.status_code == 400
 
 
+class TestResumes:
+    async def test_upload_once_then_generate(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        resp = await client.post(
+            "/api/resumes", files={"resume": ("cv.pdf", sample_pdf_bytes)}
+        )
+        assert resp.status_code == 201
+        body = resp.json()
+        assert body["filename"] == "cv.pdf"
+        assert body["chars"] > 0
+
+        with (
+            patch("src.service.parse_executor.run") as mock_parse,
+            patch(
+                "src.app.generate_cover_letter",
+                new_callable=AsyncMock,
+                return_value="Letter",
+            ) as mock_generate,
+        ):
+            resp = await client.post(
+                "/api/generate",
+                data={"resume_id": body["resume_id"], "job_text": "Dev"},
+            )
+
+        assert resp.status_code == 200
+        mock_parse.assert_not_called()
+        kwargs = mock_generate.await_args.kwargs
+        assert kwargs["filename"] == "cv.pdf"
+        assert "John Doe" in kwargs["resume_text"]
+
+    async def test_stream_with_resume_id(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        resp = await client.post(
+            "/api/resumes", files={"resume": ("cv.pdf", sample_pdf_bytes)}
+        )
+        resume_id = resp.json()["resume_id"]
+
+        async def fake_stream(*_a: object, **kw: object) -> AsyncIterator[str]:
+            assert "John Doe" in str(kw["resume_text"])
+            yield "Dear"
+
+        with patch("src.app.stream_cover_letter", side_effect=fake_stream):
+            resp = await client.post(
+                "/api/generate/stream",
+                data={"resume_id": resume_id, "job_text": "Dev"},
+            )
+
+        assert resp.status_code == 200
+        assert _events(resp.text) == [(None, "Dear"), ("done", "[DONE]")]
+
+    async def test_unknown_resume_id(self, client: AsyncClient) -> None:
+        resp = await client.post(
+            "/api/generate",
+            data={"resume_id": "expired", "job_text": "Dev"},
+        )
+        assert resp.status_code == 404
+
+    async def test_unsupported_file(self, client: AsyncClient) -> None:
+        resp = await client.post(
+            "/api/resumes", files={"resume": ("cv.txt", b"plain text")}
+        )
+        assert resp.status_code == 400
+
+
 class TestGenerateStream:
     async def test_stream_success(
         self, client: AsyncClient, sample_pdf_bytes: bytes
@@ -152,7 +271,325 @@ class TestGenerateStream:
 
         assert resp.status_code == 200
         assert "text/event-stream" in resp.headers["content-type"]
-        body = resp.text
-        assert "data: Hello" in body
-        assert "data: world" in body
-        assert "data: [DONE]" in body
+        assert _events(resp.text) == [
+            (None, "Hello world"),
+            ("done", "[DONE]"),
+        ]
+        assert "id: " in resp.text
+
+    async def test_stream_reports_queue_position(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        async def fake_stream(**_kw: object) -> AsyncIterator[object]:
+            yield QueuedEvent(position=2)
+            yield "Hello"
+
+        with patch(
+            "src.app.stream_cover_letter",
+            side_effect=fake_stream,
+        ):
+            resp = await client.post(
+                "/api/generate/stream",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+            )
+
+        assert _events(resp.text)[:2] == [("queued", "2"), (None, "Hello")]
+
+    async def test_stream_sends_progress_and_keepalive(
+        self,
+        client: AsyncClient,
+        sample_pdf_bytes: bytes,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(settings, "sse_keepalive_interval", 0.01)
+
+        async def fake_stream(**_kw: object) -> AsyncIterator[object]:
+            yield ProgressEvent("parsing")
+            await asyncio.sleep(0.05)
+            yield "Hello"
+
+        with patch(
+            "src.app.stream_cover_letter",
+            side_effect=fake_stream,
+        ):
+            resp = await client.post(
+                "/api/generate/stream",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+            )
+
+        assert ": keep-alive\n\n" in resp.text
+        assert _events(resp.text) == [
+            ("progress", "parsing"),
+            (None, "Hello"),
+            ("done", "[DONE]"),
+        ]
+
+    async def test_stream_keeps_line_breaks(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        async def fake_stream(**_kw: object) -> AsyncIterator[str]:
+            yield "Dear team,\n\nI am"
+
+        with patch(
+            "src.app.stream_cover_letter",
+            side_effect=fake_stream,
+        ):
+            resp = await client.post(
+                "/api/generate/stream",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+            )
+
+        assert "data: Dear team,\ndata: \ndata: I am\n" in resp.text
+        assert _events(resp.text)[0] == (None, "Dear team,\n\nI am")
+
+    async def test_stream_error_event(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        async def fake_stream(**_kw: object) -> AsyncIterator[str]:
+            yield "Hello"
+            msg = "LLM unavailable"
+            raise GenerationError(msg, status_code=502)
+
+        with patch(
+            "src.app.stream_cover_letter",
+            side_effect=fake_stream,
+        ):
+            resp = await client.post(
+                "/api/generate/stream",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+            )
+
+        assert _events(resp.text) == [
+            (None, "Hello"),
+            ("error", "LLM unavailable"),
+        ]
+
+    async def test_resume_after_last_event_id(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        async def fake_stream(**_kw: object) -> AsyncIterator[object]:
+            yield ProgressEvent("parsing")
+            yield ProgressEvent("generating")
+            yield "Hello"
+
+        with patch(
+            "src.app.stream_cover_letter",
+            side_effect=fake_stream,
+        ):
+            resp = await client.post(
+                "/api/generate/stream",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+            )
+        stream_id = resp.headers["X-Stream-Id"]
+        first_id = resp.text.split("\n", 1)[0].removeprefix("id: ")
+
+        resumed = await client.get(
+            f"/api/generate/stream/{stream_id}",
+            headers={"Last-Event-ID": first_id},
+        )
+
+        assert _events(resumed.text) == [
+            ("progress", "generating"),
+            (None, "Hello"),
+            ("done", "[DONE]"),
+        ]
+
+    async def test_resume_unknown_stream(self, client: AsyncClient) -> None:
+        resp = await client.get("/api/generate/stream/missing")
+        assert resp.status_code == 404
+
+
+class TestGenerateBatch:
+    async def _fake_batch(
+        self, *_args: object, **_kw: object
+    ) -> AsyncIterator[BatchResult]:
+        yield BatchResult(index=1, cover_letter="Second")
+        yield BatchResult(index=0, error="Could not fetch", status_code=422)
+
+    async def test_streams_ndjson(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        with (
+            patch(
+                "src.app.prepare_resume",
+                new_callable=AsyncMock,
+                return_value="resume",
+            ) as mock_prepare,
+            patch("src.app.generate_batch", side_effect=self._fake_batch),
+        ):
+            resp = await client.post(
+                "/api/generate/batch",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={
+                    "jobs": json.dumps(
+                        [{"url": "https://example.com/1"}, {"text": "Dev"}]
+                    )
+                },
+            )
+
+        assert resp.status_code == 200
+        assert "application/x-ndjson" in resp.headers["content-type"]
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert lines[0] == {
+            "index": 1,
+            "cover_letter": "Second",
+            "error": None,
+            "status_code": 200,
+        }
+        assert lines[1]["status_code"] == 422
+        mock_prepare.assert_awaited_once()
+
+    async def test_streams_sse_when_accepted(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        with (
+            patch(
+                "src.app.prepare_resume",
+                new_callable=AsyncMock,
+                return_value="resume",
+            ),
+            patch("src.app.generate_batch", side_effect=self._fake_batch),
+        ):
+            resp = await client.post(
+                "/api/generate/batch",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"jobs": json.dumps([{"text": "a"}, {"text": "b"}])},
+                headers={"Accept": "text/event-stream"},
+            )
+
+        assert "text/event-stream" in resp.headers["content-type"]
+        assert resp.text.startswith('event: result\ndata: {"index": 1')
+        assert resp.text.endswith("event: done\ndata: [DONE]\n\n")
+
+    @pytest.mark.parametrize("jobs", ["not json", "[]", '{"url": "x"}'])
+    async def test_rejects_bad_jobs(
+        self, client: AsyncClient, sample_pdf_bytes: bytes, jobs: str
+    ) -> None:
+        resp = await client.post(
+            "/api/generate/batch",
+            files={"resume": ("cv.pdf", sample_pdf_bytes)},
+            data={"jobs": jobs},
+        )
+
+        assert resp.status_code == 400
+
+    async def test_resume_error_before_streaming(
+        self, client: AsyncClient, sample_pdf_bytes: bytes
+    ) -> None:
+        with patch(
+            "src.app.prepare_resume",
+            new_callable=AsyncMock,
+            side_effect=GenerationError("Unsupported", status_code=400),
+        ):
+            resp = await client.post(
+                "/api/generate/batch",
+                files={"resume": ("cv.txt", sample_pdf_bytes)},
+                data={"jobs": json.dumps([{"text": "Dev"}])},
+            )
+
+        assert resp.status_code == 400
+
+
+class TestJobs:
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> Iterator[JobStore]:
+        store = JobStore(tmp_path / "jobs.sqlite3")
+        with patch("src.app.job_store", store):
+            yield store
+        store.close()
+
+    async def test_submit_and_poll(
+        self,
+        client: AsyncClient,
+        sample_pdf_bytes: bytes,
+        store: JobStore,
+    ) -> None:
+        resp = await client.post(
+            "/api/jobs",
+            files={"resume": ("cv.pdf", sample_pdf_bytes)},
+            data={"job_text": "Python developer"},
+        )
+
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+        assert resp.headers["location"] == f"/api/jobs/{job_id}"
+        assert resp.json()["status"] == "queued"
+
+        claimed = store.claim(lease=60)
+        assert claimed is not None
+        assert claimed.job.params["job_text"] == "Python developer"
+        store.complete(job_id, "Letter")
+
+        resp = await client.get(f"/api/jobs/{job_id}")
+        assert resp.json()["status"] == "succeeded"
+        assert resp.json()["cover_letter"] == "Letter"
+
+    async def test_idempotency_key(
+        self,
+        client: AsyncClient,
+        sample_pdf_bytes: bytes,
+        store: JobStore,
+    ) -> None:
+        ids = []
+        for expected in (202, 200):
+            resp = await client.post(
+                "/api/jobs",
+                files={"resume": ("cv.pdf", sample_pdf_bytes)},
+                data={"job_text": "Python developer"},
+                headers={"Idempotency-Key": "abc"},
+            )
+            assert resp.status_code == expected
+            ids.append(resp.json()["id"])
+
+        assert ids[0] == ids[1]
+
+    @pytest.mark.parametrize(
+        ("filename", "data"),
+        [
+            ("cv.txt", {"job_text": "Python developer"}),
+            ("cv.pdf", {}),
+            ("cv.pdf", {"job_url": "ftp://example.com/job"}),
+        ],
+    )
+    async def test_rejects_invalid_request(
+        self,
+        client: AsyncClient,
+        sample_pdf_bytes: bytes,
+        store: JobStore,
+        filename: str,
+        data: dict[str, str],
+    ) -> None:
+        resp = await client.post(
+            "/api/jobs",
+            files={"resume": (filename, sample_pdf_bytes)},
+            data=data,
+        )
+
+        assert resp.status_code == 400
+        assert store.claim(lease=60) is None
+
+    async def test_unknown_job(
+        self, client: AsyncClient, store: JobStore
+    ) -> None:
+        resp = await client.get("/api/jobs/missing")
+        assert resp.status_code == 404
+
+    async def test_events_end_with_final_state(
+        self,
+        client: AsyncClient,
+        sample_pdf_bytes: bytes,
+        store: JobStore,
+    ) -> None:
+        job, _ = store.submit(sample_pdf_bytes, "cv.pdf", {})
+        store.claim(lease=60)
+        store.fail(job.id, "Bad URL", 400, retry=False)
+
+        resp = await client.get(f"/api/jobs/{job.id}/events")
+
+        assert resp.text.startswith("event: failed\ndata: ")
+        assert '"status_code": 400' in resp.text
@@ -0,0 +1,318 @@
+import asyncio
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.app import _stream_messages
+from src.chain import _get_routes, get_chain, prompt_cache_key
+from src.config import LLMEndpoint, settings
+from src.generation_cache import generation_cache
+from src.hedging import Hedger
+from src.llm_limiter import llm_limiter
+from src.service import (
+    GenerationError,
+    generate_cover_letter,
+    stream_cover_letter,
+)
+from src.sse import StreamSessions
+from tests.fake_openai import FakeOpenAI
+
+_RESUME = "Иван Петров, Python-разработчик. " * 200
+
+
+def _cached_tokens_total() -> float:
+    value = REGISTRY.get_sample_value("llm_cached_input_tokens_total")
+    return value or 0.0
+
+
+@pytest.fixture
+def fake_openai(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeOpenAI]:
+    with FakeOpenAI(reply="Здравствуйте! Меня зовут Иван.") as server:
+        monkeypatch.setattr(settings, "openai_base_url", server.base_url)
+        _get_routes.cache_clear()
+        yield server
+    _get_routes.cache_clear()
+
+
+@pytest.fixture
+def failover(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[tuple[FakeOpenAI, FakeOpenAI]]:
+    with (
+        FakeOpenAI(reply="Primary letter") as primary,
+        FakeOpenAI(reply="Fallback letter") as fallback,
+        patch("src.service.parse_resume", return_value=_RESUME),
+    ):
+        monkeypatch.setattr(settings, "openai_base_url", primary.base_url)
+        monkeypatch.setattr(settings, "openai_max_retries", 0)
+        monkeypatch.setattr(
+            settings,
+            "llm_fallbacks",
+            [
+                LLMEndpoint(
+                    name="fallback",
+                    model="gpt-4o-mini",
+                    base_url=fallback.base_url,
+                    max_retries=0,
+                )
+            ],
+        )
+        monkeypatch.setattr(settings, "llm_breaker_min_calls", 2)
+        monkeypatch.setattr(settings, "llm_breaker_cooldown", 60.0)
+        _get_routes.cache_clear()
+        yield primary, fallback
+    _get_routes.cache_clear()
+
+
+def _requests(endpoint: str, outcome: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "llm_endpoint_requests_total",
+        {"endpoint": endpoint, "outcome": outcome},
+    )
+    return value or 0.0
+
+
+class TestPromptLayout:
+    def test_stable_parts_come_first(self) -> None:
+        messages = get_chain().first.format_messages(  # type: ignore[attr-defined]
+            resume_text="RESUME", job_description="JOB", language="en"
+        )
+
+        assert [m.type for m in messages] == ["system", "human", "human"]
+        assert "RESUME" in messages[1].content
+        assert "JOB" not in messages[1].content
+        assert "JOB" in messages[2].content
+        assert "en" in messages[2].content
+
+    def test_cache_key_depends_on_resume_only(self) -> None:
+        assert prompt_cache_key("a") == prompt_cache_key("a")
+        assert prompt_cache_key("a") != prompt_cache_key("b")
+
+
+class TestPromptCaching:
+    async def test_same_candidate_shares_prefix(
+        self, fake_openai: FakeOpenAI
+    ) -> None:
+        cached_before = _cached_tokens_total()
+
+        with patch("src.service.parse_resume", return_value=_RESUME):
+            for job in ("Python developer at Acme", "Backend engineer"):
+                await generate_cover_letter(b"cv", "cv.pdf", job_text=job)
+
+        first, second = fake_openai.requests
+        assert (
+            first.body["prompt_cache_key"] == second.body["prompt_cache_key"]
+        )
+        assert first.cached_tokens == 0
+        assert second.cached_tokens >= 1024
+        assert _cached_tokens_total() - cached_before == second.cached_tokens
+
+    async def test_stream_reports_usage(self, fake_openai: FakeOpenAI) -> None:
+        with patch("src.service.parse_resume", return_value=_RESUME):
+            tokens = [
+                token
+                async for token in stream_cover_letter(
+                    b"cv", "cv.pdf", job_text="Python developer"
+                )
+                if isinstance(token, str)
+            ]
+
+        assert "".join(tokens) == "Здравствуйте! Меня зовут Иван."
+        assert fake_openai.requests[0].body["stream_options"] == {
+            "include_usage": True
+        }
+
+
+class TestCancellation:
+    async def test_detached_stream_closes_upstream(
+        self, fake_openai: FakeOpenAI
+    ) -> None:
+        fake_openai.reply = " ".join(["слово"] * 500)
+        fake_openai.token_delay = 0.01
+        cancelled_before = (
+            REGISTRY.get_sample_value("llm_cancelled_requests_total") or 0
+        )
+        session = StreamSessions(ttl=60).create()
+
+        with patch("src.service.parse_resume", return_value=_RESUME):
+            session.start(
+                _stream_messages(
+                    stream_cover_letter(
+                        b"cv", "cv.pdf", job_text="Python developer"
+                    )
+                )
+            )
+            frames = session.follow()
+            async for frame in frames:
+                if "event:" not in frame:
+                    break
+            await frames.aclose()
+
+            for _ in range(200):
+                if fake_openai.aborted_streams:
+                    break
+                await asyncio.sleep(0.01)
+
+        assert fake_openai.aborted_streams == 1
+        assert fake_openai.completed_streams == 0
+        assert session.done
+        assert llm_limiter.inflight == 0
+        assert (
+            REGISTRY.get_sample_value("llm_cancelled_requests_total")
+            == cancelled_before + 1
+        )
+
+
+class TestFailover:
+    async def test_errors_fail_over_and_open_breaker(
+        self, failover: tuple[FakeOpenAI, FakeOpenAI]
+    ) -> None:
+        primary, fallback = failover
+        primary.error_status = 500
+        skipped_before = _requests("primary", "skipped")
+
+        letters = [
+            await generate_cover_letter(
+                b"cv", "cv.pdf", job_text=f"Python developer {i}"
+            )
+            for i in range(4)
+        ]
+
+        assert letters == ["Fallback letter"] * 4
+        # Two failures open the breaker; later calls skip the primary.
+        assert len(primary.requests) == 2
+        assert len(fallback.requests) == 4
+        assert fallback.requests[0].body["model"] == "gpt-4o-mini"
+        assert _requests("primary", "skipped") - skipped_before == 2
+        assert (
+            REGISTRY.get_sample_value(
+                "llm_breaker_state", {"endpoint": "primary"}
+            )
+            == 2
+        )
+
+    async def test_slow_endpoint_times_out(
+        self,
+        failover: tuple[FakeOpenAI, FakeOpenAI],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        primary, fallback = failover
+        primary.first_token_delay = 1.0
+        monkeypatch.setattr(settings, "openai_timeout", 0.2)
+        _get_routes.cache_clear()
+
+        letter = await generate_cover_letter(
+            b"cv", "cv.pdf", job_text="Python developer"
+        )
+
+        assert letter == "Fallback letter"
+        assert len(fallback.requests) == 1
+
+    async def test_stream_fails_over_before_first_token(
+        self, failover: tuple[FakeOpenAI, FakeOpenAI]
+    ) -> None:
+        primary, _ = failover
+        primary.error_status = 503
+
+        tokens = [
+            token
+            async for token in stream_cover_letter(
+                b"cv", "cv.pdf", job_text="Python developer"
+            )
+            if isinstance(token, str)
+        ]
+
+        assert "".join(tokens) == "Fallback letter"
+
+    @pytest.mark.parametrize("stream", [False, True])
+    async def test_fallback_letters_are_not_cached(
+        self,
+        failover: tuple[FakeOpenAI, FakeOpenAI],
+        monkeypatch: pytest.MonkeyPatch,
+        stream: bool,
+    ) -> None:
+        primary, fallback = failover
+        primary.error_status = 500
+        monkeypatch.setattr(settings, "generation_cache_enabled", True)
+        # Keep the primary's breaker closed for the last call.
+        monkeypatch.setattr(settings, "llm_breaker_min_calls", 10)
+        _get_routes.cache_clear()
+
+        for _ in range(2):
+            if stream:
+                letter = "".join(
+                    [
+                        token
+                        async for token in stream_cover_letter(
+                            b"cv", "cv.pdf", job_text="Python developer"
+                        )
+                        if isinstance(token, str)
+                    ]
+                )
+            else:
+                letter = await generate_cover_letter(
+                    b"cv", "cv.pdf", job_text="Python developer"
+                )
+            assert letter == "Fallback letter"
+
+        assert len(generation_cache) == 0
+        assert len(fallback.requests) == 2
+
+        primary.error_status = 0
+        await generate_cover_letter(
+            b"cv", "cv.pdf", job_text="Python developer"
+        )
+        assert len(generation_cache) == 1
+
+    async def test_all_endpoints_open(
+        self, failover: tuple[FakeOpenAI, FakeOpenAI]
+    ) -> None:
+        for server in failover:
+            server.error_status = 500
+        for _ in range(2):
+            with pytest.raises(GenerationError) as failed:
+                await generate_cover_letter(
+                    b"cv", "cv.pdf", job_text="Python developer"
+                )
+            assert failed.value.status_code == 502
+
+        with pytest.raises(GenerationError) as unavailable:
+            await generate_cover_letter(
+                b"cv", "cv.pdf", job_text="Python developer"
+            )
+
+        assert unavailable.value.status_code == 503
+        assert unavailable.value.retry_after == settings.llm_retry_after
+
+
+async def test_hedged_stream_goes_to_fallback(
+    failover: tuple[FakeOpenAI, FakeOpenAI],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    primary, fallback = failover
+    primary.first_token_delay = 2.0
+    monkeypatch.setattr(settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(settings, "llm_hedge_fallback_first", True)
+    hedger = Hedger(
+        percentile=0.9, min_delay=0.1, min_samples=1, window=10, max_rate=1
+    )
+    hedger.observe(0.05)
+    errors_before = _requests("primary", "error")
+
+    with patch("src.service.hedger", hedger):
+        tokens = [
+            token
+            async for token in stream_cover_letter(
+                b"cv", "cv.pdf", job_text="Python developer"
+            )
+            if isinstance(token, str)
+        ]
+
+    assert "".join(tokens) == "Fallback letter"
+    assert len(primary.requests) == 1
+    assert len(fallback.requests) == 1
+    assert hedger.hedges == 1
+    # The cancelled primary is not held against its breaker.
+    assert _requests("primary", "error") == errors_before
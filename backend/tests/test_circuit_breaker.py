@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from src.circuit_breaker import BreakerState, CircuitBreaker
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        window=4,
+        min_calls=2,
+        error_rate=0.5,
+        slow_call=1.0,
+        cooldown=10.0,
+    )
+
+
+def _state(name: str) -> float | None:
+    return REGISTRY.get_sample_value("llm_breaker_state", {"endpoint": name})
+
+
+class TestCircuitBreaker:
+    def test_trips_on_error_rate(self) -> None:
+        breaker = _breaker("errors")
+        breaker.record(ok=True)
+        breaker.record(ok=True)
+        breaker.record(ok=False)
+        assert breaker.allow()
+
+        breaker.record(ok=False)
+
+        assert breaker.state is BreakerState.OPEN
+        assert not breaker.allow()
+        assert _state("errors") == BreakerState.OPEN
+
+    def test_trips_on_slow_calls(self) -> None:
+        breaker = _breaker("slow")
+        breaker.record(ok=True, duration=2.0)
+        breaker.record(ok=True, duration=3.0)
+        assert breaker.state is BreakerState.OPEN
+
+    def test_needs_min_calls(self) -> None:
+        breaker = _breaker("few")
+        breaker.record(ok=False)
+        assert breaker.state is BreakerState.CLOSED
+
+    def test_half_open_trial(self) -> None:
+        breaker = _breaker("trial")
+        with patch("src.circuit_breaker.time.monotonic", return_value=0.0):
+            breaker.record(ok=False)
+            breaker.record(ok=False)
+        with patch("src.circuit_breaker.time.monotonic", return_value=11.0):
+            assert breaker.allow()
+            assert breaker.state is BreakerState.HALF_OPEN
+            assert not breaker.allow()
+
+            breaker.record(ok=False)
+            assert breaker.state is BreakerState.OPEN
+        with patch("src.circuit_breaker.time.monotonic", return_value=22.0):
+            assert breaker.allow()
+            breaker.record(ok=True, duration=0.1)
+
+        assert breaker.state is BreakerState.CLOSED
+        assert _state("trial") == BreakerState.CLOSED
+        assert (
+            REGISTRY.get_sample_value(
+                "llm_breaker_transitions_total",
+                {"endpoint": "trial", "state": "open"},
+            )
+            == 2
+        )
+
+    def test_released_trial_allows_another(self) -> None:
+        breaker = _breaker("released")
+        with patch("src.circuit_breaker.time.monotonic", return_value=0.0):
+            breaker.record(ok=False)
+            breaker.record(ok=False)
+        with patch("src.circuit_breaker.time.monotonic", return_value=11.0):
+            assert breaker.allow()
+            breaker.release()
+            assert breaker.allow()
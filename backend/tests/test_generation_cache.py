@@ -0,0 +1,58 @@
+import pytest
+
+from src.config import settings
+from src.generation_cache import (
+    GenerationCache,
+    generation_key,
+    replay_chunks,
+)
+
+_INPUT = {
+    "resume_text": "John Doe, engineer",
+    "job_description": "Python developer",
+    "language": "ru",
+}
+
+
+class TestGenerationKey:
+    def test_stable_for_same_input(self) -> None:
+        assert generation_key(dict(_INPUT)) == generation_key(dict(_INPUT))
+
+    @pytest.mark.parametrize(
+        "field", ["resume_text", "job_description", "language"]
+    )
+    def test_changes_with_input(self, field: str) -> None:
+        changed = {**_INPUT, field: "other"}
+        assert generation_key(changed) != generation_key(_INPUT)
+
+    def test_changes_with_model(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        before = generation_key(_INPUT)
+        monkeypatch.setattr(settings, "openai_model", "gpt-4o-mini")
+        assert generation_key(_INPUT) != before
+
+
+class TestGenerationCache:
+    def test_hit_and_lru_bound(self) -> None:
+        cache = GenerationCache(ttl=60, max_entries=2)
+        cache.put("a", "letter a")
+        cache.put("b", "letter b")
+        assert cache.get("a") == "letter a"
+
+        cache.put("c", "letter c")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "letter a"
+        assert cache.get("c") == "letter c"
+
+    def test_expires_after_ttl(self) -> None:
+        cache = GenerationCache(ttl=0, max_entries=2)
+        cache.put("a", "letter a")
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_replay_chunks_round_trip() -> None:
+    letter = "Здравствуйте!\n\nМеня зовут  Иван. "
+    chunks = replay_chunks(letter)
+    assert "".join(chunks) == letter
+    assert len(chunks) > 1
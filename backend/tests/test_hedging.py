@@ -0,0 +1,143 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.hedging import Hedger
+
+
+class _Upstream:
+    """Streams whose first chunk arrives after a per-attempt delay."""
+
+    def __init__(self, delays: dict[bool, float | Exception]) -> None:
+        self.delays = delays
+        self.started: list[bool] = []
+        self.closed: list[bool] = []
+
+    def __call__(self, hedge: bool) -> AsyncIterator[str]:
+        self.started.append(hedge)
+        return self._stream(hedge)
+
+    async def _stream(self, hedge: bool) -> AsyncIterator[str]:
+        name = "hedge" if hedge else "primary"
+        try:
+            delay = self.delays[hedge]
+            if isinstance(delay, Exception):
+                raise delay
+            await asyncio.sleep(delay)
+            yield f"{name}-1"
+            yield f"{name}-2"
+        finally:
+            self.closed.append(hedge)
+
+
+def _hedger(max_rate: float = 1.0, samples: int = 20) -> Hedger:
+    hedger = Hedger(
+        percentile=0.9,
+        min_delay=0.05,
+        min_samples=samples,
+        window=100,
+        max_rate=max_rate,
+    )
+    for _ in range(samples):
+        hedger.observe(0.01)
+    return hedger
+
+
+async def _collect(
+    hedger: Hedger, start: Callable[[bool], AsyncIterator[str]]
+) -> list[str]:
+    return [chunk async for chunk in hedger.stream(start)]
+
+
+def _hedges(outcome: str) -> float:
+    value = REGISTRY.get_sample_value("llm_hedges_total", {"outcome": outcome})
+    return value or 0.0
+
+
+class TestHedger:
+    def test_delay_is_percentile_with_floor(self) -> None:
+        hedger = _hedger(samples=0)
+        assert hedger.delay is None
+        for value in range(1, 11):
+            hedger.observe(value / 10)
+        assert hedger.delay == 1.0
+        hedger.percentile = 0.5
+        assert hedger.delay == 0.6
+
+    async def test_fast_primary_is_not_hedged(self) -> None:
+        upstream = _Upstream({False: 0.0, True: 0.0})
+
+        chunks = await _collect(_hedger(), upstream)
+
+        assert chunks == ["primary-1", "primary-2"]
+        assert upstream.started == [False]
+
+    async def test_no_hedge_without_samples(self) -> None:
+        upstream = _Upstream({False: 0.1, True: 0.0})
+
+        chunks = await _collect(_hedger(samples=0), upstream)
+
+        assert chunks == ["primary-1", "primary-2"]
+        assert upstream.started == [False]
+
+    async def test_late_primary_loses_to_hedge(self) -> None:
+        upstream = _Upstream({False: 5.0, True: 0.0})
+        won_before = _hedges("won")
+        hedger = _hedger()
+
+        chunks = await asyncio.wait_for(_collect(hedger, upstream), 1.0)
+
+        assert chunks == ["hedge-1", "hedge-2"]
+        assert upstream.started == [False, True]
+        assert sorted(upstream.closed) == [False, True]
+        assert _hedges("won") == won_before + 1
+        assert hedger.hedges == 1
+
+    async def test_primary_can_still_win(self) -> None:
+        upstream = _Upstream({False: 0.1, True: 5.0})
+        lost_before = _hedges("lost")
+
+        chunks = await asyncio.wait_for(_collect(_hedger(), upstream), 1.0)
+
+        assert chunks == ["primary-1", "primary-2"]
+        assert upstream.closed[0] is True
+        assert _hedges("lost") == lost_before + 1
+
+    async def test_failed_attempt_loses(self) -> None:
+        upstream = _Upstream({False: 5.0, True: RuntimeError("down")})
+
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(_collect(_hedger(), upstream), 0.3)
+
+        upstream = _Upstream({False: 0.1, True: RuntimeError("down")})
+        chunks = await _collect(_hedger(), upstream)
+        assert chunks == ["primary-1", "primary-2"]
+
+    async def test_both_failing_raises_primary_error(self) -> None:
+        upstream = _Upstream(
+            {False: ValueError("primary"), True: RuntimeError("hedge")}
+        )
+        with pytest.raises(ValueError, match="primary"):
+            await _collect(_hedger(), upstream)
+
+    async def test_hedge_rate_is_capped(self) -> None:
+        hedger = _hedger(max_rate=0.25, samples=100)
+
+        for _ in range(8):
+            await _collect(hedger, _Upstream({False: 0.1, True: 0.0}))
+
+        assert hedger.hedges == 2
+        assert (
+            REGISTRY.get_sample_value("llm_hedge_rate") == 2 / hedger.requests
+        )
+
+    async def test_closing_early_cancels_both(self) -> None:
+        upstream = _Upstream({False: 5.0, True: 0.0})
+        stream = _hedger().stream(upstream)
+
+        assert await stream.__anext__() == "hedge-1"
+        await stream.aclose()
+
+        assert sorted(upstream.closed) == [False, True]
@@ -0,0 +1,195 @@
+from pathlib import Path
+
+import httpx
+import pytest
+import respx
+from lxml import etree
+
+from src.job_extractors import (
+    PageCollector,
+    find_extractor,
+    html_to_text,
+    job_posting_text,
+)
+from src.job_scraper import scrape_job
+
+_FIXTURES = Path(__file__).parent / "fixtures" / "job_pages"
+
+
+def _fixture(name: str) -> str:
+    return (_FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _page(name: str) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=_fixture(name).encode(),
+        headers={"Content-Type": "text/html; charset=utf-8"},
+    )
+
+
+def _api(name: str) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=_fixture(name).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+class TestFindExtractor:
+    @pytest.mark.parametrize(
+        ("url", "name"),
+        [
+            ("https://hh.ru/vacancy/1", "hh"),
+            ("https://spb.hh.ru/vacancy/1", "hh"),
+            ("https://www.linkedin.com/jobs/view/1", "linkedin"),
+            ("https://job-boards.greenhouse.io/initech/jobs/1", "greenhouse"),
+            ("https://jobs.lever.co/globex/abc", "lever"),
+        ],
+    )
+    def test_matches_host_and_subdomains(self, url: str, name: str) -> None:
+        extractor = find_extractor(url)
+        assert extractor is not None
+        assert extractor.name == name
+
+    def test_unknown_host(self) -> None:
+        assert find_extractor("https://example.com/job") is None
+        assert find_extractor("https://nothh.ru/vacancy/1") is None
+
+
+class TestHelpers:
+    def test_html_to_text_unescapes(self) -> None:
+        assert (
+            html_to_text("&lt;p&gt;A&lt;/p&gt;&lt;p&gt;B&lt;/p&gt;") == "A\nB"
+        )
+
+    def test_job_posting_in_graph(self) -> None:
+        block = (
+            '{"@graph": [{"@type": "WebPage"}, {"@type": "JobPosting",'
+            ' "title": "Dev", "description": "<p>Write code</p>"}]}'
+        )
+        assert job_posting_text(["not json", block]) == "Dev\nWrite code"
+
+
+def test_page_without_marker_stops_early() -> None:
+    collector = PageCollector(1000, markers=(("class", "description"),))
+    parser = etree.HTMLParser(target=collector)
+    for i in range(1000):
+        parser.feed(f"<p>Listing line {i}: Python developer</p>")
+        if collector.full:
+            break
+
+    assert collector.full
+    assert collector.chars < 4000
+    assert not collector.section
+
+
+class TestHh:
+    url = "https://hh.ru/vacancy/123456"
+    api = "https://api.hh.ru/vacancies/123456"
+
+    @respx.mock
+    async def test_uses_public_api(self) -> None:
+        api = respx.get(self.api).mock(return_value=_api("hh_api.json"))
+        page = respx.get(self.url).mock(return_value=_page("hh_vacancy.html"))
+
+        result = await scrape_job(self.url)
+
+        assert api.called
+        assert not page.called
+        assert result.startswith("Python-разработчик (Backend)\nООО Ромашка")
+        assert "FastAPI и asyncio" in result
+        assert "Ключевые навыки: Python, FastAPI, PostgreSQL" in result
+
+    @respx.mock
+    async def test_falls_back_to_description_block(self) -> None:
+        respx.get(self.api).mock(return_value=httpx.Response(403))
+        respx.get(self.url).mock(return_value=_page("hh_vacancy.html"))
+
+        result = await scrape_job(self.url)
+
+        assert result.startswith("Чем предстоит заниматься:")
+        assert "Kafka" in result
+        assert "Похожие вакансии" not in result
+        assert "Рейтинг работодателя" not in result
+
+    @respx.mock
+    async def test_falls_back_when_api_returns_html(self) -> None:
+        respx.get(self.api).mock(
+            return_value=httpx.Response(200, text="<html>captcha</html>")
+        )
+        respx.get(self.url).mock(return_value=_page("hh_vacancy.html"))
+
+        result = await scrape_job(self.url)
+
+        assert result.startswith("Чем предстоит заниматься:")
+
+
+class TestLinkedIn:
+    @respx.mock
+    async def test_prefers_json_ld(self) -> None:
+        url = "https://www.linkedin.com/jobs/view/4000000001"
+        respx.get(url).mock(return_value=_page("linkedin_job.html"))
+
+        result = await scrape_job(url)
+
+        assert result.startswith("Senior Backend Engineer\nAcme Corp\n")
+        assert "Own the ledger API end to end" in result
+        assert "Similar jobs" not in result
+        assert "Over 200 applicants" not in result
+
+
+class TestGreenhouse:
+    url = "https://job-boards.greenhouse.io/initech/jobs/4567890"
+    api = "https://boards-api.greenhouse.io/v1/boards/initech/jobs/4567890"
+
+    @respx.mock
+    async def test_uses_public_api(self) -> None:
+        respx.get(self.api).mock(return_value=_api("greenhouse_api.json"))
+
+        result = await scrape_job(self.url)
+
+        assert result.startswith("Data Engineer\nInitech\nRemote — Europe")
+        assert "Maintain our dbt models and Airflow DAGs" in result
+
+    @respx.mock
+    async def test_falls_back_to_description_block(self) -> None:
+        respx.get(self.api).mock(side_effect=httpx.ConnectError("down"))
+        respx.get(self.url).mock(return_value=_page("greenhouse_job.html"))
+
+        result = await scrape_job(self.url)
+
+        assert "Hands-on Spark or Flink experience" in result
+        assert "Apply for this job" not in result
+        assert "Self-Identification" not in result
+
+
+class TestLever:
+    url = "https://jobs.lever.co/globex/0d5a3f7e-1b2c-4d3e-8f9a-0b1c2d3e4f5a"
+    api = (
+        "https://api.lever.co/v0/postings/globex/"
+        "0d5a3f7e-1b2c-4d3e-8f9a-0b1c2d3e4f5a"
+    )
+
+    @respx.mock
+    async def test_uses_public_api(self) -> None:
+        respx.get(self.api).mock(return_value=_api("lever_api.json"))
+
+        result = await scrape_job(self.url)
+
+        assert result.startswith(
+            "Machine Learning Engineer\nResearch / Amsterdam / Full-time"
+        )
+        assert "What you bring\nStrong Python and PyTorch" in result
+
+    @respx.mock
+    async def test_falls_back_to_posting_sections(self) -> None:
+        respx.get(self.api).mock(return_value=httpx.Response(404))
+        respx.get(self.url).mock(return_value=_page("lever_job.html"))
+
+        result = await scrape_job(self.url)
+
+        assert "ranking models with PyTorch" in result
+        assert "Experience serving models in production" in result
+        assert "Apply for this job" not in result
+        assert "Jobs powered by Lever" not in result
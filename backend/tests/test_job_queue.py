@@ -0,0 +1,198 @@
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.config import settings
+from src.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from src.job_worker import JobWorkers, process_job
+from src.service import GenerationError
+from tests.fake_openai import FakeOpenAI
+
+_PARAMS = {"job_text": "Python developer", "language": "ru"}
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[JobStore]:
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    def test_submit_and_claim(self, store: JobStore) -> None:
+        job, created = store.submit(b"pdf", "cv.pdf", _PARAMS)
+
+        assert created
+        assert job.status == QUEUED
+        claimed = store.claim(lease=60)
+        assert claimed is not None
+        assert claimed.job.id == job.id
+        assert claimed.job.status == RUNNING
+        assert claimed.resume == b"pdf"
+        assert store.claim(lease=60) is None
+
+    def test_idempotency_key_returns_first_job(self, store: JobStore) -> None:
+        first, _ = store.submit(b"pdf", "cv.pdf", _PARAMS, "key-1")
+        again, created = store.submit(b"other", "cv.pdf", _PARAMS, "key-1")
+
+        assert not created
+        assert again.id == first.id
+
+    def test_complete_drops_resume(self, store: JobStore) -> None:
+        job, _ = store.submit(b"pdf", "cv.pdf", _PARAMS)
+        store.claim(lease=60)
+        store.complete(job.id, "Letter")
+
+        done = store.get(job.id)
+        assert done is not None
+        assert done.status == SUCCEEDED
+        assert done.to_dict()["cover_letter"] == "Letter"
+
+    def test_retries_until_attempts_run_out(
+        self, store: JobStore, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "job_max_attempts", 2)
+        monkeypatch.setattr(settings, "job_retry_backoff", 0)
+        job, _ = store.submit(b"pdf", "cv.pdf", _PARAMS)
+
+        store.claim(lease=60)
+        store.fail(job.id, "LLM down", 502, retry=True)
+        retried = store.claim(lease=60)
+        assert retried is not None
+        assert retried.job.attempts == 2
+
+        store.fail(job.id, "LLM down", 502, retry=True)
+        failed = store.get(job.id)
+        assert failed is not None
+        assert failed.status == FAILED
+        assert failed.status_code == 502
+
+    def test_expired_lease_is_reclaimed(self, store: JobStore) -> None:
+        job, _ = store.submit(b"pdf", "cv.pdf", _PARAMS)
+        store.claim(lease=0)
+        time.sleep(0.01)
+
+        reclaimed = store.claim(lease=60)
+        assert reclaimed is not None
+        assert reclaimed.job.id == job.id
+
+    def test_lost_job_fails_after_max_attempts(
+        self, store: JobStore, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "job_max_attempts", 2)
+        job, _ = store.submit(b"pdf", "cv.pdf", _PARAMS)
+        for _ in range(2):
+            assert store.claim(lease=0) is not None
+            time.sleep(0.01)
+
+        assert store.claim(lease=60) is None
+        failed = store.get(job.id)
+        assert failed is not None
+        assert failed.status == FAILED
+        assert failed.status_code == 500
+        assert failed.attempts == 2
+
+    def test_shared_between_connections(self, tmp_path: Path) -> None:
+        path = tmp_path / "jobs.sqlite3"
+        api, worker = JobStore(path), JobStore(path)
+        job, _ = api.submit(b"pdf", "cv.pdf", _PARAMS)
+
+        claimed = worker.claim(lease=60)
+        assert claimed is not None
+        worker.complete(claimed.job.id, "Letter")
+
+        done = api.get(job.id)
+        assert done is not None
+        assert done.status == SUCCEEDED
+        api.close()
+        worker.close()
+
+
+class TestProcessJob:
+    async def test_client_error_is_final(self, store: JobStore) -> None:
+        job, _ = store.submit(b"pdf", "cv.txt", _PARAMS)
+        claimed = store.claim(lease=60)
+        assert claimed is not None
+
+        with patch(
+            "src.job_worker.generate_cover_letter",
+            new_callable=AsyncMock,
+            side_effect=GenerationError("Unsupported", status_code=400),
+        ):
+            await process_job(store, claimed)
+
+        failed = store.get(job.id)
+        assert failed is not None
+        assert failed.status == FAILED
+        assert failed.status_code == 400
+
+    async def test_server_error_is_retried(self, store: JobStore) -> None:
+        job, _ = store.submit(b"pdf", "cv.pdf", _PARAMS)
+        claimed = store.claim(lease=60)
+        assert claimed is not None
+
+        with patch(
+            "src.job_worker.generate_cover_letter",
+            new_callable=AsyncMock,
+            side_effect=GenerationError("LLM down", status_code=502),
+        ):
+            await process_job(store, claimed)
+
+        retried = store.get(job.id)
+        assert retried is not None
+        assert retried.status == QUEUED
+
+
+def test_worker_process_generates_letter(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    sample_pdf_bytes: bytes,
+) -> None:
+    # Worker processes log to ./logs; keep that out of the source tree.
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "jobs.sqlite3"
+    store = JobStore(path)
+    workers = JobWorkers()
+
+    with FakeOpenAI(reply="Здравствуйте!") as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("JOB_POLL_INTERVAL", "0.05")
+        job, _ = store.submit(sample_pdf_bytes, "cv.pdf", _PARAMS)
+        workers.start(workers=1, db_path=path)
+        try:
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline:
+                current = store.get(job.id)
+                assert current is not None
+                if current.status == SUCCEEDED:
+                    break
+                time.sleep(0.05)
+        finally:
+            workers.shutdown()
+
+    assert current.result == "Здравствуйте!"
+    assert len(server.requests) == 1
+    store.close()
+
+
+def test_dead_worker_is_replaced(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    workers = JobWorkers()
+    workers.start(workers=1, db_path=tmp_path / "jobs.sqlite3")
+    try:
+        first = workers._processes[0]  # noqa: SLF001
+        first.kill()
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and not workers.restarts:
+            time.sleep(0.05)
+
+        assert workers.restarts == 1
+        assert workers.alive == 1
+        assert workers._processes[0] is not first  # noqa: SLF001
+    finally:
+        workers.shutdown()
@@ -1,8 +1,14 @@
+import asyncio
+from collections.abc import AsyncIterator
+from unittest.mock import patch
+
 import httpx
 import pytest
 import respx
 
-from src.job_scraper import scrape_job
+from src import job_scraper
+from src.config import settings
+from src.job_scraper import close_client, scrape_job, start_client
 
 pytestmark = pytest.mark.asyncio
 
@@ -76,10 +82,117 @@ class TestScrapeJob:
 
     @respx.mock
     async def test_truncates_long_text(self) -> None:
-        long_body = "\n".join(f"<p>Line {i}</p>" for i in range(2000))
+        long_body = "\n".join(f"<p>Line {i}</p>" for i in range(5000))
         html = f"<html><body>{long_body}</body></html>"
         url = "https://example.com/job/long"
         respx.get(url).mock(return_value=httpx.Response(200, text=html))
 
         result = await scrape_job(url)
-        assert len(result) <= 6000
+        assert len(result) <= 20_000
+
+    @respx.mock
+    async def test_decodes_meta_charset(self) -> None:
+        html = (
+            '<html><head><meta charset="windows-1251"></head>'
+            "<body><p>Разработчик Python</p></body></html>"
+        )
+        url = "https://example.com/job/cp1251"
+        respx.get(url).mock(
+            return_value=httpx.Response(200, content=html.encode("cp1251"))
+        )
+
+        assert await scrape_job(url) == "Разработчик Python"
+
+    @respx.mock
+    async def test_stops_reading_at_max_bytes(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "scrape_max_bytes", 64)
+        html = "<html><body><p>Python Developer</p>" + (
+            "<p>Tail</p>" * 100 + "<p>Unreachable</p></body></html>"
+        )
+        url = "https://example.com/job/huge"
+
+        async def chunks() -> AsyncIterator[bytes]:
+            data = html.encode()
+            for start in range(0, len(data), 32):
+                yield data[start : start + 32]
+
+        respx.get(url).mock(return_value=httpx.Response(200, content=chunks()))
+
+        result = await scrape_job(url)
+        assert result.startswith("Python Developer")
+        assert "Unreachable" not in result
+
+
+@pytest.fixture
+async def shared_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncIterator[None]:
+    monkeypatch.setattr(settings, "scrape_per_host_limit", 2)
+    await start_client()
+    yield
+    await close_client()
+
+
+class TestSharedClient:
+    @respx.mock
+    async def test_reuses_one_client(self) -> None:
+        route = respx.get(url__startswith="https://example.com/").mock(
+            return_value=httpx.Response(200, text=_SAMPLE_HTML)
+        )
+
+        with patch(
+            "src.job_scraper.httpx.AsyncClient", wraps=httpx.AsyncClient
+        ) as client_cls:
+            await start_client()
+            try:
+                await scrape_job("https://example.com/a")
+                await scrape_job("https://example.com/b")
+            finally:
+                await close_client()
+
+        assert route.call_count == 2
+        client_cls.assert_called_once()
+
+    @respx.mock
+    async def test_limits_concurrency_per_host(
+        self, shared_client: None
+    ) -> None:
+        active: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        async def slow_page(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(0.02)
+            active[host] -= 1
+            return httpx.Response(200, text=_SAMPLE_HTML)
+
+        respx.get(url__regex=r"https://(a|b)\.example\.com/").mock(
+            side_effect=slow_page
+        )
+
+        await asyncio.gather(
+            *(
+                scrape_job(f"https://{host}.example.com/{i}")
+                for host in ("a", "b")
+                for i in range(6)
+            )
+        )
+
+        assert peak == {"a.example.com": 2, "b.example.com": 2}
+        # Idle hosts do not keep their limiter around.
+        assert not job_scraper._host_slots  # noqa: SLF001
+
+    @respx.mock
+    async def test_falls_back_after_close(self, shared_client: None) -> None:
+        url = "https://example.com/job/1"
+        respx.get(url).mock(
+            return_value=httpx.Response(200, text=_SAMPLE_HTML)
+        )
+        await close_client()
+        await close_client()
+
+        assert "Python Developer" in await scrape_job(url)
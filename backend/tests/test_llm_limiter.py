@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.llm_limiter import LLMBusyError, LLMLimiter
+
+pytestmark = pytest.mark.asyncio
+
+
+def _limiter(**overrides: float) -> LLMLimiter:
+    options: dict[str, float] = {
+        "max_inflight": 1,
+        "tokens_per_minute": 0,
+        "queue_size": 4,
+        "max_wait": 5.0,
+        **overrides,
+    }
+    return LLMLimiter(
+        max_inflight=int(options["max_inflight"]),
+        tokens_per_minute=int(options["tokens_per_minute"]),
+        queue_size=int(options["queue_size"]),
+        max_wait=options["max_wait"],
+    )
+
+
+async def test_caps_inflight_and_grants_in_order() -> None:
+    limiter = _limiter()
+    first = limiter.enqueue(100)
+    second = limiter.enqueue(100)
+    third = limiter.enqueue(100)
+
+    assert first.granted
+    assert (second.position, third.position) == (1, 2)
+
+    first.release()
+    assert second.granted
+    assert not third.granted
+    assert third.position == 1
+
+    second.release()
+    assert await third.wait()
+    third.release()
+    assert limiter.inflight == 0
+
+
+async def test_rejects_when_queue_is_full() -> None:
+    limiter = _limiter(queue_size=1)
+    before = (
+        REGISTRY.get_sample_value(
+            "llm_queue_rejections_total", {"reason": "queue_full"}
+        )
+        or 0
+    )
+    limiter.enqueue(100)
+    limiter.enqueue(100)
+    assert limiter.full
+
+    with pytest.raises(LLMBusyError):
+        limiter.enqueue(100)
+
+    after = REGISTRY.get_sample_value(
+        "llm_queue_rejections_total", {"reason": "queue_full"}
+    )
+    assert after == before + 1
+    assert limiter.queued == 1
+
+
+async def test_wait_is_bounded() -> None:
+    limiter = _limiter(max_wait=0.05)
+    limiter.enqueue(100)
+    waiting = limiter.enqueue(100)
+
+    assert not await waiting.wait(timeout=0.01)
+    with pytest.raises(LLMBusyError):
+        await waiting.wait()
+    assert limiter.queued == 0
+
+
+async def test_token_budget_delays_start() -> None:
+    # 6000 tokens/min refills 100 tokens per second.
+    limiter = _limiter(max_inflight=10, tokens_per_minute=6000)
+    first = limiter.enqueue(5990)
+    second = limiter.enqueue(20)
+
+    assert first.granted
+    assert not second.granted
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await second.wait()
+    assert 0.05 < loop.time() - started < 1
+
+
+async def test_settle_refunds_unused_tokens() -> None:
+    limiter = _limiter(max_inflight=10, tokens_per_minute=6000)
+    first = limiter.enqueue(6000)
+    second = limiter.enqueue(3000)
+    assert not second.granted
+
+    first.settle(2000)
+    assert second.granted
+
+
+async def test_oversized_prompt_refund_stays_within_bucket() -> None:
+    limiter = _limiter(max_inflight=10, tokens_per_minute=6000)
+    first = limiter.enqueue(20_000)
+    assert first.granted
+
+    # 6000 were drawn, so using 4000 of them refunds only 2000.
+    first.settle(4000)
+    second = limiter.enqueue(2000)
+    third = limiter.enqueue(100)
+
+    assert second.granted
+    assert not third.granted
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+
+from src.config import settings
+from src.parse_executor import (
+    ParseCrashedError,
+    ParseExecutor,
+    ParserBusyError,
+    ParseTimeoutError,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def _slow_upper(text: str, delay: float) -> str:
+    time.sleep(delay)
+    return text.upper()
+
+
+def _crash() -> None:
+    os._exit(1)
+
+
+@pytest.fixture
+async def pool() -> AsyncIterator[ParseExecutor]:
+    executor = ParseExecutor()
+    await executor.start(workers=1, queue_size=0)
+    yield executor
+    await executor.shutdown()
+
+
+class TestParseExecutor:
+    async def test_runs_in_thread_when_not_started(self) -> None:
+        executor = ParseExecutor()
+        assert await executor.run(_slow_upper, "cv", 0) == "CV"
+        assert not executor.saturated
+
+    async def test_runs_in_pool(self, pool: ParseExecutor) -> None:
+        assert await pool.run(_slow_upper, "cv", 0) == "CV"
+        assert pool.pending == 0
+
+    async def test_rejects_when_saturated(self, pool: ParseExecutor) -> None:
+        first = asyncio.create_task(pool.run(_slow_upper, "a", 0.5))
+        await asyncio.sleep(0)
+        assert pool.saturated
+
+        with pytest.raises(ParserBusyError):
+            await pool.run(_slow_upper, "b", 0)
+
+        assert await first == "A"
+        assert not pool.saturated
+
+    async def test_timeout(
+        self, pool: ParseExecutor, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "parse_timeout", 0.05)
+
+        with pytest.raises(ParseTimeoutError, match="timed out"):
+            await pool.run(_slow_upper, "a", 0.3)
+
+        # The worker is killed rather than left counted as busy.
+        assert pool.pending == 0
+        assert pool.idle == 1
+
+    async def test_recovers_after_hung_parse(
+        self, pool: ParseExecutor, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "parse_timeout", 0.2)
+
+        with pytest.raises(ParseTimeoutError):
+            await pool.run(_slow_upper, "a", 3600)
+
+        # The hung worker is killed, not waited for.
+        monkeypatch.setattr(settings, "parse_timeout", 10)
+        assert await pool.run(_slow_upper, "cv", 0) == "CV"
+        assert pool.pending == 0
+        start = time.monotonic()
+        await pool.shutdown()
+        assert time.monotonic() - start < 5
+
+    async def test_shutdown_does_not_wait_for_running_parse(
+        self, pool: ParseExecutor
+    ) -> None:
+        task = asyncio.create_task(pool.run(_slow_upper, "a", 3600))
+        await asyncio.sleep(0.2)
+
+        start = time.monotonic()
+        await pool.shutdown()
+
+        assert time.monotonic() - start < 5
+        with pytest.raises(ParserBusyError):
+            await task
+
+    async def test_timeout_excludes_queue_wait(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        executor = ParseExecutor()
+        await executor.start(workers=1, queue_size=1)
+        try:
+            await executor.run(_slow_upper, "warm", 0)
+            monkeypatch.setattr(settings, "parse_timeout", 1.0)
+            first = asyncio.create_task(executor.run(_slow_upper, "a", 0.6))
+            await asyncio.sleep(0)
+            # Queued behind a 0.6s parse, then parsed within its own 1s.
+            assert await executor.run(_slow_upper, "b", 0.5) == "B"
+            assert await first == "A"
+        finally:
+            await executor.shutdown()
+
+    async def test_long_queue_wait_is_busy(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "parse_timeout", 0.1)
+        executor = ParseExecutor()
+        await executor.start(workers=1, queue_size=1)
+        try:
+            first = asyncio.create_task(executor.run(_slow_upper, "a", 0.3))
+            await asyncio.sleep(0)
+
+            with pytest.raises(ParserBusyError):
+                await executor.run(_slow_upper, "b", 0)
+
+            with pytest.raises(ParseTimeoutError):
+                await first
+        finally:
+            await executor.shutdown()
+
+    async def test_recovers_after_worker_crash(
+        self, pool: ParseExecutor
+    ) -> None:
+        with pytest.raises(ParseCrashedError):
+            await pool.run(_crash)
+
+        assert await pool.run(_slow_upper, "cv", 0) == "CV"
+        assert pool.pending == 0
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from src.resume_cache import ResumeCache, resume_key
+
+
+class TestResumeKey:
+    def test_depends_on_content_and_extension(self) -> None:
+        assert resume_key(b"a", "cv.pdf") == resume_key(b"a", "other.PDF")
+        assert resume_key(b"a", "cv.pdf") != resume_key(b"b", "cv.pdf")
+        assert resume_key(b"a", "cv.pdf") != resume_key(b"a", "cv.docx")
+
+
+class TestResumeCache:
+    def test_miss_then_hit(self) -> None:
+        cache = ResumeCache(max_bytes=1024)
+        assert cache.get("k") is None
+
+        cache.put("k", "John Doe")
+        assert cache.get("k") == "John Doe"
+        assert "k" in cache
+
+    def test_evicts_least_recently_used_by_size(self) -> None:
+        cache = ResumeCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.size == 8
+
+    def test_counts_utf8_bytes(self) -> None:
+        cache = ResumeCache(max_bytes=10)
+        cache.put("ru", "Иван")
+        assert cache.size == 8
+
+    def test_skips_entries_larger_than_limit(self) -> None:
+        cache = ResumeCache(max_bytes=3)
+        cache.put("k", "too long")
+        assert len(cache) == 0
+
+    def test_disk_tier_survives_restart(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache" / "resumes.sqlite3"
+        ResumeCache(max_bytes=1024, db_path=db_path).put("k", "Jane Smith")
+
+        restarted = ResumeCache(max_bytes=1024, db_path=db_path)
+        assert len(restarted) == 0
+        assert restarted.get("k") == "Jane Smith"
+        assert len(restarted) == 1
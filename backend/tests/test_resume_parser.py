@@ -1,6 +1,74 @@
+import io
+from collections.abc import Callable
+from pathlib import Path
+
+import docx
+import pymupdf
 import pytest
+from docx.document import Document
+from docx.enum.text import WD_BREAK
+from docx.table import Table
+
+from src.resume_parser import extract_pdf_pages, parse_resume
+
+
+def _reference_text(data: bytes) -> str:
+    """What python-docx's object model gives for the same document."""
+    lines = []
+    for block in docx.Document(io.BytesIO(data)).iter_inner_content():
+        if not isinstance(block, Table):
+            if block.text.strip():
+                lines.append(block.text)
+            continue
+        for row in block.rows:
+            cells = (
+                " ".join(
+                    p.text.strip() for p in cell.paragraphs if p.text.strip()
+                )
+                for cell in row.cells
+            )
+            line = " | ".join(cell for cell in cells if cell)
+            if line:
+                lines.append(line)
+    return "\n".join(lines)
+
+
+def _plain(doc: Document) -> None:
+    doc.add_heading("Jane Smith", level=1)
+    doc.add_paragraph("Product Manager")
+    doc.add_paragraph("")
+    doc.add_paragraph("Led a team of 8 engineers.", style="List Bullet")
+
+
+def _skills_table(doc: Document) -> None:
+    doc.add_paragraph("Skills")
+    table = doc.add_table(rows=3, cols=2)
+    for row, (area, tools) in zip(
+        table.rows,
+        [("Languages", "Python, SQL"), ("Cloud", "AWS"), ("", "")],
+        strict=True,
+    ):
+        row.cells[0].text = area
+        row.cells[1].text = tools
+    table.rows[1].cells[1].add_paragraph("Terraform")
+    doc.add_paragraph("Education")
+
+
+def _runs(doc: Document) -> None:
+    paragraph = doc.add_paragraph("Contacts:")
+    paragraph.add_run().add_tab()
+    paragraph.add_run("jane@example.com")
+    paragraph.add_run().add_break()
+    paragraph.add_run("Berlin & remote <ok>")
+    paragraph.add_run().add_break(WD_BREAK.PAGE)
+    doc.add_paragraph("   indented   ")
+
 
-from src.resume_parser import parse_resume
+_CORPUS: dict[str, Callable[[Document], None]] = {
+    "plain": _plain,
+    "skills_table": _skills_table,
+    "runs": _runs,
+}
 
 
 class TestParseResume:
@@ -22,6 +90,49 @@ class TestParseResume:
         text = parse_resume(sample_docx_bytes, "resume.DOCX")
         assert "Jane Smith" in text
 
+    def test_from_path(
+        self,
+        sample_pdf_bytes: bytes,
+        sample_docx_bytes: bytes,
+        tmp_path: Path,
+    ) -> None:
+        pdf = tmp_path / "cv.pdf"
+        pdf.write_bytes(sample_pdf_bytes)
+        docx_file = tmp_path / "cv.docx"
+        docx_file.write_bytes(sample_docx_bytes)
+
+        assert "John Doe" in parse_resume(pdf, "resume.pdf")
+        assert "Jane Smith" in parse_resume(docx_file, "resume.docx")
+
+    def test_stops_at_char_budget(self) -> None:
+        with pymupdf.open() as doc:  # type: ignore[no-untyped-call]
+            for number in range(5):
+                doc.new_page().insert_text((72, 72), f"Page {number}")
+            pdf = doc.tobytes()
+
+        assert "Page 4" in parse_resume(pdf, "cv.pdf")
+        text = parse_resume(pdf, "cv.pdf", max_chars=5)
+        assert "Page 0" in text
+        assert "Page 1" not in text
+        assert extract_pdf_pages(pdf, 2, 4).split() == [
+            "Page",
+            "2",
+            "Page",
+            "3",
+        ]
+
+    def test_docx_stops_at_char_budget(self) -> None:
+        doc = docx.Document()
+        for number in range(500):
+            doc.add_paragraph(f"Paragraph {number}")
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        text = parse_resume(buffer.getvalue(), "cv.docx", max_chars=100)
+
+        assert text.startswith("Paragraph 0\n")
+        assert "Paragraph 499" not in text
+
     def test_unsupported_format_raises(self) -> None:
         with pytest.raises(ValueError, match="Unsupported file format"):
             parse_resume(b"data", "resume.txt")
@@ -29,3 +140,14 @@ class TestParseResume:
     def test_unsupported_format_no_ext(self) -> None:
         with pytest.raises(ValueError, match="Unsupported file format"):
             parse_resume(b"data", "resume")
+
+
+@pytest.mark.parametrize("build", _CORPUS.values(), ids=_CORPUS.keys())
+def test_docx_matches_python_docx(build: Callable[[Document], None]) -> None:
+    doc = docx.Document()
+    build(doc)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    data = buffer.getvalue()
+
+    assert parse_resume(data, "cv.docx") == _reference_text(data)
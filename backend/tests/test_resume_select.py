@@ -0,0 +1,149 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.config import settings
+from src.resume_select import (
+    Bm25Index,
+    resume_indexes,
+    segment,
+    select_resume,
+    terms,
+)
+from src.service import _build_chain_input
+from src.token_budget import count_tokens
+
+_FIXTURES = Path(__file__).parent / "fixtures" / "resumes"
+_CASES = json.loads((_FIXTURES / "cases.json").read_text())
+
+_RESUME = """\
+Jane Smith
+jane@example.com
+
+Experience
+Acme — Backend Engineer, 2020–2024
+- Built Kafka consumers in Python
+  and tuned their throughput.
+- Organised the office book club.
+Globex — Intern, 2019
+
+Skills
+Python, Kafka, Docker
+"""
+
+
+def _case(name: str) -> tuple[str, str]:
+    return (
+        (_FIXTURES / f"{name}.resume.txt").read_text(),
+        (_FIXTURES / f"{name}.job.txt").read_text(),
+    )
+
+
+class TestSegment:
+    def test_sections_and_bullets(self) -> None:
+        document = segment(_RESUME)
+
+        assert document.header == ("Jane Smith", "jane@example.com")
+        assert document.headings == ("Experience", "Skills")
+        assert [s.lines for s in document.segments] == [
+            ("Acme — Backend Engineer, 2020–2024",),
+            (
+                "- Built Kafka consumers in Python",
+                "and tuned their throughput.",
+            ),
+            ("- Organised the office book club.",),
+            ("Globex — Intern, 2019",),
+            ("Python, Kafka, Docker",),
+        ]
+        assert document.segments[2].parent == 0
+
+    @pytest.mark.parametrize(
+        ("line", "contact"),
+        [
+            ("Acme Corp, Senior Engineer, 2018 - 2021", False),
+            ("Acme Corp, 2015 - 2018 2018 - 2021", False),
+            ("Phone: +7 916 123-45-67", True),
+            ("Phone: 8 (916) 123-45-67", True),
+        ],
+    )
+    def test_contact_lines(self, line: str, *, contact: bool) -> None:
+        document = segment(f"Experience\n{line}")
+
+        assert (line in document.contacts) is contact
+
+    def test_terms_are_stemmed(self) -> None:
+        assert terms("Разработка, разработал") == ["разраб", "разраб"]
+
+
+def test_bm25_prefers_rare_matching_terms() -> None:
+    index = Bm25Index([["python", "kafka"], ["python"], ["books"]])
+    scores = index.scores(["kafka", "python"])
+    assert scores[0] > scores[1] > scores[2] == 0
+
+
+class TestSelectResume:
+    def test_disabled_by_default(self) -> None:
+        resume, job = _case("backend_en")
+        assert settings.resume_select_top_k == 0
+        assert select_resume(resume, job) == resume
+
+    def test_short_resume_is_sent_whole(self) -> None:
+        assert select_resume(_RESUME, "Kafka developer", top_k=1) == _RESUME
+
+    def test_keeps_bullet_context(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "resume_select_min_tokens", 0)
+
+        selected = select_resume(_RESUME, "Kafka throughput", top_k=1)
+
+        assert selected.splitlines() == [
+            "Jane Smith",
+            "jane@example.com",
+            "",
+            "Experience",
+            "Acme — Backend Engineer, 2020–2024",
+            "- Built Kafka consumers in Python",
+            "and tuned their throughput.",
+        ]
+
+    @pytest.mark.parametrize("name", _CASES)
+    def test_fixture_keeps_facts_and_contacts(self, name: str) -> None:
+        resume, job = _case(name)
+
+        selected = select_resume(resume, job, top_k=8)
+
+        for needle in _CASES[name]["expect"] + _CASES[name]["contacts"]:
+            assert needle in selected
+        assert count_tokens(selected) < 0.7 * count_tokens(resume)
+
+    def test_date_range_entry_stays_in_its_section(self) -> None:
+        resume, job = _case("backend_en")
+        entry = "Globex Logistics — Backend Engineer, 2018 - 2021"
+
+        lines = select_resume(resume, job, top_k=8).splitlines()
+
+        assert entry in lines
+        assert lines.index(entry) > lines.index("Experience")
+
+    def test_index_is_cached_per_resume(self) -> None:
+        resume, job = _case("ml_en")
+        select_resume(resume, job, top_k=8)
+        index = resume_indexes.get(resume)
+
+        select_resume(resume, "Kubernetes", top_k=8)
+
+        assert resume_indexes.get(resume) is index
+        assert len(resume_indexes) == 1
+
+    def test_used_in_chain_input(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "resume_select_top_k", 8)
+        resume, job = _case("frontend_ru")
+
+        chain_input = _build_chain_input(resume, job, "ru")
+
+        assert "Хобби" not in chain_input["resume_text"]
+        assert "Storybook" in chain_input["resume_text"]
@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+from src.resume_store import ResumeStore
+
+
+class TestResumeStore:
+    def test_add_and_get(self) -> None:
+        store = ResumeStore(ttl=60, max_entries=2)
+        stored = store.add("cv.pdf", "John Doe")
+
+        assert store.get(stored.id) == stored
+        assert stored.filename == "cv.pdf"
+        assert store.get("unknown") is None
+
+    def test_lru_bound(self) -> None:
+        store = ResumeStore(ttl=60, max_entries=2)
+        first = store.add("a.pdf", "a")
+        second = store.add("b.pdf", "b")
+        assert store.get(first.id) is not None
+
+        third = store.add("c.pdf", "c")
+
+        assert store.get(second.id) is None
+        assert store.get(first.id) is not None
+        assert store.get(third.id) is not None
+
+    def test_expires_unless_used(self) -> None:
+        store = ResumeStore(ttl=10, max_entries=10)
+        with patch("src.resume_store.time.monotonic", return_value=0.0):
+            used = store.add("a.pdf", "a")
+            idle = store.add("b.pdf", "b")
+        with patch("src.resume_store.time.monotonic", return_value=8.0):
+            assert store.get(used.id) is not None
+        with patch("src.resume_store.time.monotonic", return_value=12.0):
+            store.add("c.pdf", "c")
+            assert store.get(used.id) is not None
+            assert store.get(idle.id) is None
+        assert len(store) == 2
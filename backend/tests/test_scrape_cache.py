@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from src.job_scraper import scrape_job
+from src.scrape_cache import (
+    CachedPage,
+    ScrapeCache,
+    normalize_url,
+    scrape_cache,
+)
+
+
+class TestNormalizeUrl:
+    def test_canonical_form(self) -> None:
+        assert normalize_url(
+            "HTTPS://HH.ru:443/vacancy/123/?utm_source=tg&b=2&a=1#top"
+        ) == ("https://hh.ru/vacancy/123?a=1&b=2")
+
+    def test_keeps_meaningful_differences(self) -> None:
+        assert normalize_url("https://hh.ru/vacancy/1") != normalize_url(
+            "https://hh.ru/vacancy/2"
+        )
+        assert normalize_url("http://x.com:8080/") == "http://x.com:8080/"
+
+
+class TestScrapeCache:
+    async def test_hit_within_ttl(self) -> None:
+        cache = ScrapeCache(ttl=60, max_bytes=1024)
+        calls = 0
+
+        async def load(_stale: CachedPage | None) -> CachedPage:
+            nonlocal calls
+            calls += 1
+            return CachedPage(text="job")
+
+        assert await cache.fetch("https://x.com/a", load) == "job"
+        assert await cache.fetch("https://x.com/a/?utm_medium=x", load) == (
+            "job"
+        )
+        assert calls == 1
+
+    async def test_coalesces_concurrent_loads(self) -> None:
+        cache = ScrapeCache(ttl=60, max_bytes=1024)
+        calls = 0
+
+        async def load(_stale: CachedPage | None) -> CachedPage:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return CachedPage(text="job")
+
+        results = await asyncio.gather(
+            *(cache.fetch("https://x.com/a", load) for _ in range(10))
+        )
+
+        assert results == ["job"] * 10
+        assert calls == 1
+
+    async def test_errors_are_not_cached(self) -> None:
+        cache = ScrapeCache(ttl=60, max_bytes=1024)
+
+        async def fail(_stale: CachedPage | None) -> CachedPage:
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        with pytest.raises(RuntimeError):
+            await cache.fetch("https://x.com/a", fail)
+        assert len(cache) == 0
+
+    async def test_evicts_by_size(self) -> None:
+        cache = ScrapeCache(ttl=60, max_bytes=8)
+
+        for name in ("a", "b", "c"):
+
+            async def load(
+                _stale: CachedPage | None, text: str = name * 4
+            ) -> CachedPage:
+                return CachedPage(text=text)
+
+            await cache.fetch(f"https://x.com/{name}", load)
+
+        assert len(cache) == 2
+        assert cache.size == 8
+
+
+class TestScrapeJobRevalidation:
+    @respx.mock
+    async def test_revalidates_expired_entry(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        url = "https://example.com/job/etag"
+        route = respx.get(url).mock(
+            side_effect=[
+                httpx.Response(
+                    200,
+                    text="<html><body><p>Python Developer</p></body></html>",
+                    headers={"ETag": '"v1"'},
+                ),
+                httpx.Response(304),
+            ]
+        )
+        monkeypatch.setattr(scrape_cache, "ttl", 0)
+
+        first = await scrape_job(url)
+        second = await scrape_job(url)
+
+        assert first == second == "Python Developer"
+        assert route.call_count == 2
+        assert route.calls[1].request.headers["If-None-Match"] == '"v1"'
@@ -1,9 +1,29 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterator
 from types import SimpleNamespace
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import pymupdf
 import pytest
+from prometheus_client import REGISTRY
 
-from src.service import GenerationError, generate_cover_letter
+from src.config import settings
+from src.llm_limiter import LLMLimiter
+from src.parse_executor import parse_executor
+from src.resume_parser import parse_resume
+from src.service import (
+    BatchJob,
+    GenerationError,
+    GenerationPipeline,
+    ProgressEvent,
+    QueuedEvent,
+    generate_batch,
+    generate_cover_letter,
+    prepare_resume,
+    stream_cover_letter,
+)
 
 pytestmark = pytest.mark.asyncio
 
@@ -188,3 +208,396 @@ class TestGenerateCoverLetter:
             )
 
         assert result == "Hello!"
+
+    async def test_resume_cache_hit_skips_parsing(self) -> None:
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(return_value=_fake_message("Hi"))
+
+        with (
+            patch(
+                "src.service.parse_resume",
+                return_value="John Doe, engineer",
+            ) as mock_parse,
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            for _ in range(3):
+                await generate_cover_letter(
+                    b"data", "r.pdf", job_text="Python developer"
+                )
+
+        mock_parse.assert_called_once()
+        call_args = mock_chain.ainvoke.call_args[0][0]
+        assert call_args["resume_text"] == "John Doe, engineer"
+
+
+class TestStageOverlap:
+    async def test_parse_and_scrape_run_concurrently(self) -> None:
+        def slow_parse(*_args: object) -> str:
+            time.sleep(0.2)
+            return "resume"
+
+        async def slow_scrape(_url: str) -> str:
+            await asyncio.sleep(0.2)
+            return "job"
+
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(return_value=_fake_message("Hi"))
+
+        with (
+            patch("src.service.parse_resume", side_effect=slow_parse),
+            patch("src.service.scrape_job", side_effect=slow_scrape),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            started = time.perf_counter()
+            await generate_cover_letter(
+                b"data", "r.pdf", job_url="https://example.com/job"
+            )
+            elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.35
+
+    async def test_scrape_failure_cancels_parsing(self) -> None:
+        parse_cancelled = asyncio.Event()
+
+        async def slow_parse(*_args: object) -> str:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                parse_cancelled.set()
+                raise
+            return "resume"
+
+        with (
+            patch("src.service._parse_resume", side_effect=slow_parse),
+            patch(
+                "src.service.scrape_job",
+                new_callable=AsyncMock,
+                side_effect=httpx.ConnectError("refused"),
+            ),
+            pytest.raises(GenerationError) as exc_info,
+        ):
+            await generate_cover_letter(
+                b"data", "r.pdf", job_url="https://example.com/job"
+            )
+
+        assert exc_info.value.status_code == 422
+        assert parse_cancelled.is_set()
+
+    async def test_resume_error_wins_when_both_fail(self) -> None:
+        async def failing_scrape(_url: str) -> str:
+            await asyncio.sleep(0.05)
+            msg = "refused"
+            raise httpx.ConnectError(msg)
+
+        with (
+            patch("src.service.scrape_job", side_effect=failing_scrape),
+            pytest.raises(GenerationError) as exc_info,
+        ):
+            await generate_cover_letter(
+                b"data", "resume.txt", job_url="https://example.com/job"
+            )
+
+        assert exc_info.value.status_code == 400
+
+    async def test_request_errors_do_not_depend_on_timing(self) -> None:
+        for _ in range(5):
+            with pytest.raises(GenerationError, match="Unsupported"):
+                await generate_cover_letter(b"plain", "cv.txt", job_url=None)
+
+
+def _histogram_count(name: str, labels: dict[str, str] | None = None) -> float:
+    return REGISTRY.get_sample_value(f"{name}_count", labels or {}) or 0.0
+
+
+class TestPipelineMetrics:
+    async def test_records_stage_histograms(self) -> None:
+        stages = ("parse", "job", "budget", "queue", "llm")
+        before = {
+            stage: _histogram_count(
+                "generation_stage_seconds", {"stage": stage}
+            )
+            for stage in stages
+        }
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(return_value=_fake_message("Hi"))
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch(
+                "src.service.scrape_job",
+                new_callable=AsyncMock,
+                return_value="job",
+            ),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            await generate_cover_letter(
+                b"data", "r.pdf", job_url="https://example.com/job"
+            )
+
+        for stage in stages:
+            after = _histogram_count(
+                "generation_stage_seconds", {"stage": stage}
+            )
+            assert after == before[stage] + 1, stage
+
+    async def test_stream_records_ttft_and_speed(self) -> None:
+        ttft_before = _histogram_count("llm_time_to_first_token_seconds")
+        speed_before = _histogram_count("llm_output_tokens_per_second")
+
+        async def fake_astream(_input: object) -> AsyncIterator[object]:
+            for word in ("Dear ", "team"):
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(content=word, usage_metadata=None)
+            yield SimpleNamespace(
+                content="",
+                usage_metadata={"input_tokens": 10, "output_tokens": 2},
+            )
+
+        mock_chain = MagicMock()
+        mock_chain.astream = fake_astream
+        pipeline = GenerationPipeline(b"data", "r.pdf", job_text="job")
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            items = [item async for item in pipeline.stream()]
+
+        assert items == [
+            ProgressEvent("parsing"),
+            ProgressEvent("generating"),
+            "Dear ",
+            "team",
+        ]
+        assert pipeline.timer.time_to_first_token is not None
+        assert _histogram_count("llm_time_to_first_token_seconds") == (
+            ttft_before + 1
+        )
+        assert _histogram_count("llm_output_tokens_per_second") == (
+            speed_before + 1
+        )
+
+
+class TestAdmission:
+    @pytest.fixture
+    def limiter(self) -> Iterator[LLMLimiter]:
+        limiter = LLMLimiter(
+            max_inflight=1, tokens_per_minute=0, queue_size=0, max_wait=5
+        )
+        with patch("src.service.llm_limiter", limiter):
+            yield limiter
+
+    async def test_rejects_when_llm_is_saturated(
+        self, limiter: LLMLimiter
+    ) -> None:
+        busy = limiter.enqueue(100)
+        mock_chain = AsyncMock()
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+            pytest.raises(GenerationError) as exc_info,
+        ):
+            await generate_cover_letter(b"data", "r.pdf", job_text="job")
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after == settings.llm_retry_after
+        mock_chain.ainvoke.assert_not_called()
+        busy.release()
+
+    async def test_stream_reports_queue_position(
+        self, limiter: LLMLimiter
+    ) -> None:
+        limiter.queue_size = 1
+        busy = limiter.enqueue(100)
+
+        async def fake_astream(_input: object) -> AsyncIterator[object]:
+            yield SimpleNamespace(content="Hi", usage_metadata=None)
+
+        mock_chain = MagicMock()
+        mock_chain.astream = fake_astream
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            stream = stream_cover_letter(b"data", "r.pdf", job_text="job")
+            assert await stream.__anext__() == ProgressEvent("parsing")
+            assert await stream.__anext__() == QueuedEvent(position=1)
+            busy.release()
+            rest = [item async for item in stream]
+
+        assert rest == [ProgressEvent("generating"), "Hi"]
+        assert limiter.inflight == 0
+
+
+class TestGenerateBatch:
+    async def test_yields_results_as_they_complete(self) -> None:
+        async def fake_ainvoke(chain_input: dict[str, str]) -> object:
+            if "slow" in chain_input["job_description"]:
+                await asyncio.sleep(0.05)
+            return _fake_message(f"Letter: {chain_input['job_description']}")
+
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = fake_ainvoke
+        jobs = [
+            BatchJob(text="slow job"),
+            BatchJob(url="https://example.com/job"),
+            BatchJob(url="not-a-url"),
+        ]
+
+        with (
+            patch(
+                "src.service.scrape_job",
+                new_callable=AsyncMock,
+                return_value="scraped job",
+            ),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            results = [
+                result async for result in generate_batch("resume", jobs)
+            ]
+
+        assert [r.index for r in results][-1] == 0
+        by_index = {r.index: r for r in results}
+        assert by_index[0].cover_letter == "Letter: slow job"
+        assert by_index[1].cover_letter == "Letter: scraped job"
+        assert by_index[2].status_code == 400
+        assert by_index[2].cover_letter is None
+
+    async def test_limits_concurrent_generations(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "batch_llm_concurrency", 2)
+        running = 0
+        peak = 0
+
+        async def fake_ainvoke(_input: object) -> object:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _fake_message("Hi")
+
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = fake_ainvoke
+        jobs = [BatchJob(text=f"job {i}") for i in range(6)]
+
+        with patch("src.service.get_chain", return_value=mock_chain):
+            results = [r async for r in generate_batch("resume", jobs)]
+
+        assert len(results) == 6
+        assert peak == 2
+
+
+class TestGenerationCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(settings, "generation_cache_enabled", True)
+
+    async def test_repeat_is_served_from_cache(self) -> None:
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(return_value=_fake_message("Hi"))
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            first = await generate_cover_letter(
+                b"data", "r.pdf", job_text="job"
+            )
+            second = await generate_cover_letter(
+                b"data", "r.pdf", job_text="job"
+            )
+
+        assert first == second == "Hi"
+        mock_chain.ainvoke.assert_awaited_once()
+
+    async def test_fresh_bypasses_cache(self) -> None:
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(
+            side_effect=[_fake_message("v1"), _fake_message("v2")]
+        )
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            await generate_cover_letter(b"data", "r.pdf", job_text="job")
+            fresh = await generate_cover_letter(
+                b"data", "r.pdf", job_text="job", fresh=True
+            )
+            cached = await generate_cover_letter(
+                b"data", "r.pdf", job_text="job"
+            )
+
+        assert fresh == cached == "v2"
+
+    async def test_stream_replays_cached_letter(self) -> None:
+        mock_chain = AsyncMock()
+        mock_chain.ainvoke = AsyncMock(
+            return_value=_fake_message("Dear team, hello")
+        )
+        mock_chain.astream = MagicMock()
+
+        with (
+            patch("src.service.parse_resume", return_value="resume"),
+            patch("src.service.get_chain", return_value=mock_chain),
+        ):
+            await generate_cover_letter(b"data", "r.pdf", job_text="job")
+            tokens = [
+                token
+                async for token in stream_cover_letter(
+                    b"data", "r.pdf", job_text="job"
+                )
+                if isinstance(token, str)
+            ]
+
+        assert tokens == ["Dear ", "team, ", "hello"]
+        mock_chain.astream.assert_not_called()
+
+
+def _make_pdf(pages: int) -> bytes:
+    with pymupdf.open() as doc:  # type: ignore[no-untyped-call]
+        for number in range(pages):
+            doc.new_page().insert_text((72, 72), f"Page {number} " * 10)
+        return doc.tobytes()  # type: ignore[no-any-return]
+
+
+class TestParallelPdf:
+    @pytest.fixture
+    async def pool(self) -> AsyncIterator[None]:
+        await parse_executor.start(workers=2, queue_size=4)
+        yield
+        await parse_executor.shutdown()
+
+    async def test_matches_serial_extraction(
+        self, pool: None, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "parse_pdf_chunk_pages", 3)
+        pdf = _make_pdf(10)
+
+        text = await prepare_resume(pdf, "cv.pdf")
+
+        assert text == parse_resume(pdf, "cv.pdf")
+        assert "Page 0" in text
+        assert "Page 9" in text
+        assert parse_executor.pending == 0
+
+    async def test_stops_at_char_budget(
+        self, pool: None, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "parse_pdf_chunk_pages", 2)
+        monkeypatch.setattr(settings, "parse_max_chars", 500)
+
+        text = await prepare_resume(_make_pdf(40), "cv.pdf")
+
+        assert "Page 1 " in text
+        assert "Page 39" not in text
+        # A cancelled range keeps its worker busy until it really ends.
+        for _ in range(100):
+            if not parse_executor.pending:
+                break
+            await asyncio.sleep(0.01)
+        assert parse_executor.pending == 0
@@ -0,0 +1,148 @@
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from src.sse import (
+    KEEPALIVE,
+    StreamSessions,
+    coalesce,
+    encode_event,
+    with_keepalive,
+)
+
+
+async def _items(*items: object, delay: float = 0.0) -> AsyncIterator[object]:
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def _collect(items: AsyncIterator[object]) -> list[object]:
+    return [item async for item in items]
+
+
+class TestEncodeEvent:
+    def test_plain_data(self) -> None:
+        assert encode_event("Hello") == "data: Hello\n\n"
+
+    def test_fields_and_multiline_data(self) -> None:
+        frame = encode_event("one\r\ntwo\n\nthree", event="x", event_id="7")
+        assert frame == (
+            "id: 7\nevent: x\ndata: one\ndata: two\ndata: \ndata: three\n\n"
+        )
+
+
+class TestCoalesce:
+    async def test_merges_until_max_bytes(self) -> None:
+        chunks = await _collect(
+            coalesce(_items("ab", "cd", "ef", "g"), window=10.0, max_bytes=4)
+        )
+        assert chunks == ["abcd", "efg"]
+
+    async def test_flushes_after_window(self) -> None:
+        chunks = await _collect(
+            coalesce(
+                _items("a", "b", "c", delay=0.03),
+                window=0.01,
+                max_bytes=1024,
+            )
+        )
+        assert chunks == ["a", "b", "c"]
+
+    async def test_flushes_before_other_items(self) -> None:
+        marker = object()
+        chunks = await _collect(
+            coalesce(
+                _items("a", "b", marker, "c"), window=10.0, max_bytes=1024
+            )
+        )
+        assert chunks == ["ab", marker, "c"]
+
+    async def test_zero_window_passes_through(self) -> None:
+        chunks = await _collect(
+            coalesce(_items("a", "b"), window=0, max_bytes=1024)
+        )
+        assert chunks == ["a", "b"]
+
+
+async def test_keepalive_while_idle() -> None:
+    async def frames() -> AsyncIterator[str]:
+        await asyncio.sleep(0.05)
+        yield "data: x\n\n"
+
+    out = await _collect(with_keepalive(frames(), 0.01))
+    assert out[0] == KEEPALIVE
+    assert out[-1] == "data: x\n\n"
+
+
+class TestStreamSessions:
+    async def _messages(self) -> AsyncIterator[tuple[str | None, str]]:
+        yield "progress", "parsing"
+        yield None, "Hello"
+        yield "done", "[DONE]"
+
+    async def test_follow_and_resume(self) -> None:
+        sessions = StreamSessions(ttl=60)
+        session = sessions.create()
+        session.start(self._messages())
+
+        frames = await _collect(session.follow())
+        assert frames[0] == "id: 1\nevent: progress\ndata: parsing\n\n"
+        assert sessions.get(session.id) is session
+        assert await _collect(session.follow(2)) == frames[2:]
+
+    async def test_producer_failure_becomes_error_event(self) -> None:
+        async def broken() -> AsyncIterator[tuple[str | None, str]]:
+            yield None, "Hello"
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        session = StreamSessions(ttl=60).create()
+        session.start(broken())
+
+        frames = await _collect(session.follow())
+        assert frames[-1].endswith("event: error\ndata: Internal error\n\n")
+
+    async def test_finished_sessions_expire(self) -> None:
+        sessions = StreamSessions(ttl=0)
+        session = sessions.create()
+        session.start(self._messages())
+        await _collect(session.follow())
+        await asyncio.sleep(0.01)
+
+        sessions.create()
+        assert sessions.get(session.id) is None
+        assert len(sessions) == 1
+
+
+class TestDetach:
+    async def _endless(self) -> AsyncIterator[tuple[str | None, str]]:
+        while True:
+            yield None, "x"
+            await asyncio.sleep(0.01)
+
+    async def _read_one(self, frames: AsyncGenerator[str]) -> None:
+        await frames.__anext__()
+        await frames.aclose()
+
+    async def test_last_consumer_leaving_cancels_producer(self) -> None:
+        session = StreamSessions(ttl=60, detach_grace=0.02).create()
+        session.start(self._endless())
+
+        await self._read_one(session.follow())
+        await asyncio.sleep(0.1)
+
+        assert session.done
+
+    async def test_reattaching_within_grace_keeps_producer(self) -> None:
+        session = StreamSessions(ttl=60, detach_grace=0.05).create()
+        session.start(self._endless())
+
+        await self._read_one(session.follow())
+        resumed = session.follow(1)
+        await resumed.__anext__()
+        await asyncio.sleep(0.1)
+
+        assert not session.done
+        await resumed.aclose()
+        session.cancel()
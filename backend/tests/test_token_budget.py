@@ -0,0 +1,194 @@
+import time
+from typing import Any
+
+import pytest
+import tiktoken
+
+from src import token_budget
+from src.config import settings
+from src.token_budget import count_tokens, fit_prompt, warm_tokenizer
+
+_RESUME = "\n".join(
+    [
+        "Иван Иванов",
+        "Python-разработчик",
+        "Опыт работы:",
+        *(f"Проект {i}: FastAPI, PostgreSQL, Kafka" for i in range(40)),
+        "Хобби:",
+        *(f"Увлечение номер {i}, горные походы" for i in range(40)),
+    ]
+)
+
+_JOB = "\n".join(
+    [
+        "Senior Python Developer",
+        "Requirements:",
+        *(f"Experience with technology {i}" for i in range(40)),
+        "What we offer:",
+        *(f"Perk number {i}: free coffee and a gym" for i in range(40)),
+    ]
+)
+
+
+_WORDS = "one two three four five six seven eight"
+
+
+class _Encoding:
+    def encode(self, text: str, **_kwargs: Any) -> list[int]:
+        return [0] * len(text.split())
+
+
+@pytest.fixture
+def tokenizer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        token_budget,
+        "_tokenizer",
+        token_budget._Tokenizer(),  # noqa: SLF001
+    )
+
+
+def test_counts_tokens() -> None:
+    assert count_tokens("") == 0
+    assert count_tokens("Python developer") > 0
+    assert count_tokens("word " * 100) > count_tokens("word " * 10)
+
+
+def test_keeps_text_within_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "prompt_token_budget", 100_000)
+
+    budget = fit_prompt(_RESUME, _JOB)
+
+    assert budget.resume_text == _RESUME
+    assert budget.job_description == _JOB
+    assert budget.resume_tokens == budget.original_resume_tokens
+
+
+def test_drops_low_value_sections_first(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    needed = max(
+        count_tokens(_RESUME.split("Хобби:")[0]),
+        count_tokens(_JOB.split("What we offer:")[0]),
+    )
+    monkeypatch.setattr(settings, "prompt_resume_share", 0.5)
+    monkeypatch.setattr(settings, "prompt_token_budget", 2 * needed + 20)
+
+    budget = fit_prompt(_RESUME, _JOB)
+
+    assert "Хобби" not in budget.resume_text
+    assert "Проект 39" in budget.resume_text
+    assert "Perk number" not in budget.job_description
+    assert "technology 39" in budget.job_description
+
+
+def test_cuts_tail_when_still_over_budget(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "prompt_token_budget", 200)
+
+    budget = fit_prompt(_RESUME, _JOB)
+
+    assert budget.resume_tokens + budget.job_tokens <= 200
+    assert budget.resume_text.startswith("Иван Иванов")
+    assert budget.job_description.startswith("Senior Python Developer")
+
+
+def test_gives_unused_share_to_other_side(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "prompt_token_budget", 1000)
+    monkeypatch.setattr(settings, "prompt_resume_share", 0.5)
+
+    budget = fit_prompt("Иван Иванов, Python", _JOB)
+
+    assert budget.resume_text == "Иван Иванов, Python"
+    assert budget.job_tokens > 500
+
+
+def test_resume_cut_does_not_depend_on_job(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "prompt_token_budget", 300)
+    monkeypatch.setattr(settings, "prompt_resume_share", 0.5)
+    resume = _RESUME * 5
+
+    cuts = {
+        fit_prompt(resume, job).resume_text
+        for job in ("Python", _JOB, _JOB * 5)
+    }
+
+    assert len(cuts) == 1
+
+
+def test_bullet_with_low_value_word_is_not_a_heading(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    job = "\n".join(
+        [
+            "Senior Python Developer",
+            "Требования:",
+            "- Опыт работы в условиях высокой нагрузки",
+            *(f"- Знание технологии {i}" for i in range(40)),
+            "Мы предлагаем:",
+            *(f"Бонус номер {i}: кофе и спортзал" for i in range(40)),
+        ]
+    )
+    needed = count_tokens(job.split("Мы предлагаем:")[0])
+    monkeypatch.setattr(settings, "prompt_resume_share", 0.1)
+    monkeypatch.setattr(settings, "prompt_token_budget", needed - 20)
+
+    budget = fit_prompt("Иван Иванов", job)
+
+    assert "в условиях высокой нагрузки" in budget.job_description
+    assert "технологии 0" in budget.job_description
+    assert "Бонус номер" not in budget.job_description
+
+
+@pytest.mark.usefixtures("tokenizer")
+def test_counts_with_tiktoken_once_loaded(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        tiktoken, "encoding_for_model", lambda _model: _Encoding()
+    )
+
+    assert warm_tokenizer()
+    assert count_tokens(_WORDS) == 8
+
+
+@pytest.mark.usefixtures("tokenizer")
+def test_warmup_is_time_limited(monkeypatch: pytest.MonkeyPatch) -> None:
+    def slow(_model: str) -> _Encoding:
+        time.sleep(0.5)
+        return _Encoding()
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", slow)
+    monkeypatch.setattr(settings, "tokenizer_warmup_timeout", 0.05)
+
+    start = time.monotonic()
+    assert not warm_tokenizer()
+    assert time.monotonic() - start < 0.4
+    assert count_tokens(_WORDS) != 8
+
+    monkeypatch.setattr(settings, "tokenizer_warmup_timeout", 5)
+    assert warm_tokenizer()
+    assert count_tokens(_WORDS) == 8
+
+
+@pytest.mark.usefixtures("tokenizer")
+def test_failed_load_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    def offline(_model: str) -> _Encoding:
+        msg = "no network"
+        raise ConnectionError(msg)
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", offline)
+    assert not warm_tokenizer()
+    assert count_tokens(_WORDS) != 8
+
+    monkeypatch.setattr(
+        tiktoken, "encoding_for_model", lambda _model: _Encoding()
+    )
+    assert not warm_tokenizer()
+    monkeypatch.setattr(settings, "tokenizer_retry_interval", 0)
+    assert warm_tokenizer()
+    assert count_tokens(_WORDS) == 8
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import io
+import tracemalloc
+from collections.abc import AsyncIterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi import UploadFile
+from httpx import ASGITransport, AsyncClient
+
+from src.app import app
+from src.config import settings
+from src.uploads import ResumeUpload, UploadTooLargeError, read_upload
+
+_MIB = 1024 * 1024
+
+
+@pytest.fixture
+def client() -> AsyncClient:
+    return AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    )
+
+
+def _upload(data: bytes, filename: str = "cv.pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+class TestReadUpload:
+    async def test_small_file_stays_in_memory(self) -> None:
+        upload = await read_upload(_upload(b"resume"))
+
+        assert upload.path is None
+        assert upload.source == b"resume"
+        assert upload.size == 6
+        assert upload.sha256 == hashlib.sha256(b"resume").hexdigest()
+
+    async def test_large_file_is_spooled(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        monkeypatch.setattr(settings, "upload_spool_threshold", 1024)
+        monkeypatch.setattr(settings, "upload_spool_dir", tmp_path)
+        data = b"x" * 600_000
+
+        upload = await read_upload(_upload(data))
+
+        assert upload.path is not None
+        assert upload.path.parent == tmp_path
+        assert upload.path.suffix == ".pdf"
+        assert upload.read_bytes() == data
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        upload.close()
+        assert not upload.path.exists()
+
+    async def test_rejects_oversized_file(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        monkeypatch.setattr(settings, "upload_max_bytes", 1000)
+        monkeypatch.setattr(settings, "upload_spool_threshold", 10)
+        monkeypatch.setattr(settings, "upload_spool_dir", tmp_path)
+
+        with pytest.raises(UploadTooLargeError):
+            await read_upload(_upload(b"x" * 1001))
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestUploadLimit:
+    async def test_declared_length_over_limit(
+        self, client: AsyncClient
+    ) -> None:
+        body = b"x" * (settings.upload_max_bytes + 128 * 1024)
+        resp = await client.post(
+            "/api/generate",
+            content=body,
+            headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+        assert resp.status_code == 413
+
+    async def test_streamed_body_over_limit(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "upload_max_bytes", 1024)
+        sent = 0
+
+        async def body() -> AsyncIterator[bytes]:
+            nonlocal sent
+            yield (
+                b"--b\r\nContent-Disposition: form-data; "
+                b'name="resume"; filename="cv.pdf"\r\n\r\n'
+            )
+            for _ in range(64):
+                sent += 1
+                yield b"x" * 64 * 1024
+
+        resp = await client.post(
+            "/api/generate",
+            content=body(),
+            headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+
+        assert resp.status_code == 413
+        assert sent < 64
+
+    async def test_file_over_limit(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(settings, "upload_max_bytes", 1024)
+        resp = await client.post(
+            "/api/generate",
+            files={"resume": ("cv.pdf", b"x" * 2048)},
+            data={"job_text": "Python developer"},
+        )
+        assert resp.status_code == 413
+
+
+async def test_concurrent_uploads_are_not_buffered(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    uploads = 16
+    size = 4 * _MIB
+    monkeypatch.setattr(settings, "upload_spool_dir", tmp_path)
+    source = tmp_path / "source.pdf"
+    source.write_bytes(b"%PDF" + b"0" * (size - 4))
+    seen: list[ResumeUpload] = []
+
+    async def fake_generate(
+        *, resume_data: ResumeUpload, **_kw: object
+    ) -> str:
+        seen.append(resume_data)
+        await asyncio.sleep(0.05)
+        return "Dear team"
+
+    async def post() -> int:
+        with source.open("rb") as file:
+            resp = await client.post(
+                "/api/generate",
+                files={"resume": ("cv.pdf", file)},
+                data={"job_text": "Python developer"},
+            )
+        return resp.status_code
+
+    tracemalloc.start()
+    try:
+        with patch("src.app.generate_cover_letter", side_effect=fake_generate):
+            statuses = await asyncio.gather(*(post() for _ in range(uploads)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert statuses == [200] * uploads
+    assert all(u.size == size and u.path is not None for u in seen)
+    # Reading every upload into memory would peak above uploads * size.
+    assert peak < uploads * size / 2
+    assert [p.name for p in tmp_path.iterdir()] == ["source.pdf"]
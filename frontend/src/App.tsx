@@ -1,15 +1,27 @@
 import { useRef, useState } from "react";
-import { streamCoverLetter, type GenerateFormData } from "./api";
+import {
+  streamCoverLetter,
+  type GenerateFormData,
+  type StreamStage,
+} from "./api";
 import GenerateForm from "./components/GenerateForm";
 import HistoryPanel from "./components/HistoryPanel";
 import ResultCard from "./components/ResultCard";
 import { useHistory } from "./hooks/useHistory";
 
+const STAGE_LABELS: Record<StreamStage, string> = {
+  parsing: "Читаем резюме...",
+  scraping: "Загружаем вакансию...",
+  generating: "Пишем письмо...",
+};
+
 export default function App() {
   const [loading, setLoading] = useState(false);
   const [streaming, setStreaming] = useState(false);
   const [result, setResult] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
+  const [queuePosition, setQueuePosition] = useState<number | null>(null);
+  const [stage, setStage] = useState<StreamStage | null>(null);
   const abortRef = useRef<AbortController | null>(null);
   const { entries, addEntry, removeEntry, clearHistory } = useHistory();
 
@@ -22,14 +34,25 @@ export default function App() {
     setStreaming(true);
     setError(null);
     setResult("");
+    setQueuePosition(null);
+    setStage(null);
 
     try {
       let full = "";
       await streamCoverLetter(
         data,
-        (token) => {
-          full += token;
-          setResult(full);
+        {
+          onToken: (token) => {
+            setQueuePosition(null);
+            setStage(null);
+            full += token;
+            setResult(full);
+          },
+          onProgress: (next) => {
+            setQueuePosition(null);
+            setStage(next);
+          },
+          onQueued: setQueuePosition,
         },
         controller.signal,
       );
@@ -45,6 +68,8 @@ export default function App() {
     } finally {
       setLoading(false);
       setStreaming(false);
+      setQueuePosition(null);
+      setStage(null);
     }
   };
 
@@ -70,6 +95,18 @@ export default function App() {
           <GenerateForm onSubmit={handleSubmit} loading={loading} />
         </div>
 
+        {stage !== null && queuePosition === null && (
+          <div className="mt-6 rounded-xl border border-indigo-200 bg-indigo-50 p-4 text-sm text-indigo-700">
+            {STAGE_LABELS[stage]}
+          </div>
+        )}
+
+        {queuePosition !== null && (
+          <div className="mt-6 rounded-xl border border-indigo-200 bg-indigo-50 p-4 text-sm text-indigo-700">
+            Много запросов — вы в очереди, позиция {queuePosition}
+          </div>
+        )}
+
         {error && (
           <div className="mt-6 rounded-xl border border-red-200 bg-red-50 p-4 text-sm text-red-700">
             {error}
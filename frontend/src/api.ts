@@ -1,30 +1,28 @@
 export interface GenerateFormData {
   resume: File;
+  /** Id from `uploadResume`; sent instead of the file when present. */
+  resumeId?: string;
   jobUrl?: string;
   jobText?: string;
   language: string;
+  fresh?: boolean;
 }
 
 export interface GenerateResponse {
   cover_letter: string;
 }
 
-function buildForm(data: GenerateFormData): FormData {
-  const form = new FormData();
-  form.append("resume", data.resume);
-  form.append("language", data.language);
-  if (data.jobUrl) form.append("job_url", data.jobUrl);
-  if (data.jobText) form.append("job_text", data.jobText);
-  return form;
+export interface UploadedResume {
+  resume_id: string;
+  filename: string;
+  chars: number;
 }
 
-export async function generateCoverLetter(
-  data: GenerateFormData,
-): Promise<GenerateResponse> {
-  const res = await fetch("/api/generate", {
-    method: "POST",
-    body: buildForm(data),
-  });
+/** Uploads and parses a resume once, for reuse across generations. */
+export async function uploadResume(file: File): Promise<UploadedResume> {
+  const form = new FormData();
+  form.append("resume", file);
+  const res = await fetch("/api/resumes", { method: "POST", body: form });
 
   if (!res.ok) {
     const body = await res.json().catch(() => null);
@@ -35,16 +33,40 @@ export async function generateCoverLetter(
   return res.json();
 }
 
-export async function streamCoverLetter(
+function buildForm(data: GenerateFormData): FormData {
+  const form = new FormData();
+  if (data.resumeId) form.append("resume_id", data.resumeId);
+  else form.append("resume", data.resume);
+  form.append("language", data.language);
+  if (data.jobUrl) form.append("job_url", data.jobUrl);
+  if (data.jobText) form.append("job_text", data.jobText);
+  if (data.fresh) form.append("fresh", "true");
+  return form;
+}
+
+/** Posts the form, re-sending the file if the stored resume expired. */
+async function postForm(
+  url: string,
   data: GenerateFormData,
-  onToken: (token: string) => void,
   signal?: AbortSignal,
-): Promise<void> {
-  const res = await fetch("/api/generate/stream", {
+): Promise<Response> {
+  const res = await fetch(url, {
     method: "POST",
     body: buildForm(data),
     signal,
   });
+  if (res.status !== 404 || !data.resumeId) return res;
+  return fetch(url, {
+    method: "POST",
+    body: buildForm({ ...data, resumeId: undefined }),
+    signal,
+  });
+}
+
+export async function generateCoverLetter(
+  data: GenerateFormData,
+): Promise<GenerateResponse> {
+  const res = await postForm("/api/generate", data);
 
   if (!res.ok) {
     const body = await res.json().catch(() => null);
@@ -52,26 +74,111 @@ export async function streamCoverLetter(
     throw new Error(message);
   }
 
-  const reader = res.body?.getReader();
-  if (!reader) throw new Error("No response body");
+  return res.json();
+}
+
+export type StreamStage = "parsing" | "scraping" | "generating";
+
+export interface StreamHandlers {
+  onToken: (token: string) => void;
+  onProgress?: (stage: StreamStage) => void;
+  onQueued?: (position: number) => void;
+}
 
+interface SseEvent {
+  event: string;
+  data: string;
+  id: string | null;
+}
+
+/** Parses a server-sent event stream as described in the HTML spec. */
+async function* readEvents(
+  body: ReadableStream<Uint8Array>,
+): AsyncGenerator<SseEvent> {
+  const reader = body.getReader();
   const decoder = new TextDecoder();
   let buffer = "";
+  let event = "";
+  let data: string[] = [];
+  let id: string | null = null;
 
   while (true) {
     const { done, value } = await reader.read();
-    if (done) break;
+    if (done) return;
 
     buffer += decoder.decode(value, { stream: true });
-    const lines = buffer.split("\n");
+    const lines = buffer.split(/\r\n|\r|\n/);
     buffer = lines.pop() ?? "";
 
     for (const line of lines) {
-      if (line.startsWith("data: ")) {
-        const payload = line.slice(6);
-        if (payload === "[DONE]") return;
-        onToken(payload);
+      if (line === "") {
+        if (data.length > 0) {
+          yield { event: event || "message", data: data.join("\n"), id };
+        }
+        event = "";
+        data = [];
+        continue;
       }
+      // Lines starting with ":" are keep-alive comments.
+      if (line.startsWith(":")) continue;
+      const colon = line.indexOf(":");
+      const field = colon === -1 ? line : line.slice(0, colon);
+      let value = colon === -1 ? "" : line.slice(colon + 1);
+      if (value.startsWith(" ")) value = value.slice(1);
+      if (field === "event") event = value;
+      else if (field === "data") data.push(value);
+      else if (field === "id") id = value;
+    }
+  }
+}
+
+const MAX_RECONNECTS = 3;
+
+export async function streamCoverLetter(
+  data: GenerateFormData,
+  { onToken, onProgress, onQueued }: StreamHandlers,
+  signal?: AbortSignal,
+): Promise<void> {
+  let res = await postForm("/api/generate/stream", data, signal);
+
+  if (!res.ok) {
+    const body = await res.json().catch(() => null);
+    const message = body?.detail ?? `Server error: ${res.status}`;
+    throw new Error(message);
+  }
+
+  const streamId = res.headers.get("X-Stream-Id");
+  let lastEventId: string | null = null;
+
+  for (let attempt = 0; ; attempt++) {
+    if (!res.body) throw new Error("No response body");
+    try {
+      for await (const message of readEvents(res.body)) {
+        lastEventId = message.id ?? lastEventId;
+        if (message.event === "queued") {
+          onQueued?.(Number(message.data));
+        } else if (message.event === "progress") {
+          onProgress?.(message.data as StreamStage);
+        } else if (message.event === "error") {
+          throw new Error(message.data);
+        } else if (message.event === "done") {
+          return;
+        } else {
+          onToken(message.data);
+        }
+      }
+    } catch (err) {
+      if (!(err instanceof TypeError)) throw err;
+    }
+
+    // The connection dropped before the "done" event: pick the stream
+    // up again after the last event we saw.
+    if (!streamId || attempt >= MAX_RECONNECTS) {
+      throw new Error("Connection lost");
     }
+    const headers: Record<string, string> = {};
+    if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+    res = await fetch(`/api/generate/stream/${streamId}`, { headers, signal });
+    if (!res.ok) throw new Error("Connection lost");
   }
 }
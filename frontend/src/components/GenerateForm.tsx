@@ -1,5 +1,5 @@
 import { useCallback, useRef, useState, type FormEvent } from "react";
-import type { GenerateFormData } from "../api";
+import { uploadResume, type GenerateFormData } from "../api";
 import Spinner from "./Spinner";
 
 interface Props {
@@ -24,6 +24,12 @@ export default function GenerateForm({ onSubmit, loading }: Props) {
   const [jobText, setJobText] = useState("");
   const [language, setLanguage] = useState("ru");
   const inputRef = useRef<HTMLInputElement>(null);
+  // Upload of the picked file, started right away so that parsing is
+  // done by the time the form is submitted. Resolves to undefined on
+  // failure, in which case the file is sent with the form as before.
+  const resumeIdRef = useRef<Promise<string | undefined>>(
+    Promise.resolve(undefined),
+  );
 
   const handleFile = useCallback((f: File | undefined) => {
     if (!f) return;
@@ -32,19 +38,24 @@ export default function GenerateForm({ onSubmit, loading }: Props) {
       return;
     }
     setFile(f);
+    resumeIdRef.current = uploadResume(f).then(
+      (uploaded) => uploaded.resume_id,
+      () => undefined,
+    );
   }, []);
 
   const hasJobInput =
     jobInputMode === "url" ? jobUrl.trim() !== "" : jobText.trim() !== "";
 
-  const handleSubmit = (e: FormEvent) => {
+  const handleSubmit = async (e: FormEvent) => {
     e.preventDefault();
     if (!file || !hasJobInput) return;
 
+    const resumeId = await resumeIdRef.current;
     const data: GenerateFormData =
       jobInputMode === "url"
-        ? { resume: file, jobUrl: jobUrl.trim(), language }
-        : { resume: file, jobText: jobText.trim(), language };
+        ? { resume: file, resumeId, jobUrl: jobUrl.trim(), language }
+        : { resume: file, resumeId, jobText: jobText.trim(), language };
 
     onSubmit(data);
   };